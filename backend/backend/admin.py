@@ -1,8 +1,12 @@
 from django.contrib import admin
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
 from django.utils.timezone import localtime
-from datetime import timedelta, datetime
+from datetime import timedelta
 import pytz
 from .models import User, WorkSession, WorkPause
+from .report_cache import bump_data_version
+from .worktime import annotate_work_time, rebuild_session_events, refresh_daily_totals, session_days
 
 # Налаштовуємо київський часовий пояс
 kyiv_tz = pytz.timezone('Europe/Kiev')
@@ -18,38 +22,14 @@ class UserAdmin(admin.ModelAdmin):
 def calculate_actual_work_time(session):
     """
     Обчислює фактичний робочий час сесії з урахуванням перерв.
-    Якщо пауза незавершена, а сесія завершена, час від початку такої паузи не враховується.
+    Час незавершеної паузи (до кінця сесії або, якщо сесія триває, до поточного моменту) не враховується.
+    Для сесій зі списку адмінки використовується вже підраховане значення work_duration.
     """
-    session_start = session.start_time.astimezone(kyiv_tz)
-    actual_end_time = session.end_time.astimezone(kyiv_tz) if session.end_time else None
-
-    work_intervals = []
-    current_start = session_start
-
-    # Використовуємо related_name 'pauses'
-    pauses = session.pauses.all().order_by("pause_time")
-    for pause in pauses:
-        pause_start = pause.pause_time.astimezone(kyiv_tz)
-        if pause.resume_time:
-            pause_end = pause.resume_time.astimezone(kyiv_tz)
-        elif actual_end_time:
-            # Якщо сесія завершена, незавершену паузу вважаємо нульовою (resume_time = session.end_time)
-            pause_end = actual_end_time
-        else:
-            # Якщо сесія триває, незавершена пауза розглядається як завершена в момент її початку
-            pause_end = pause_start
-
-        if pause_start > current_start:
-            work_intervals.append(pause_start - current_start)
-        current_start = pause_end
-
-    if actual_end_time and actual_end_time > current_start:
-        work_intervals.append(actual_end_time - current_start)
-    elif not actual_end_time:
-        # Якщо сесія триває, рахувати до поточного моменту
-        work_intervals.append(datetime.now(kyiv_tz) - current_start)
-
-    return sum(work_intervals, timedelta())
+    if hasattr(session, "work_duration"):
+        return session.work_duration
+    if session.pk is None:
+        return timedelta()
+    return annotate_work_time(WorkSession.objects.filter(pk=session.pk)).values_list("work_duration", flat=True).get()
 
 
 class WorkPauseInline(admin.TabularInline):
@@ -71,6 +51,43 @@ class WorkSessionAdmin(admin.ModelAdmin):
     inlines = [WorkPauseInline]
     readonly_fields = ('calculated_work_time',)
 
+    def get_queryset(self, request):
+        """Робочий час та остання незавершена пауза рахуються в тому ж запиті, що й список сесій"""
+        unfinished_pauses = WorkPause.objects.filter(
+            session=OuterRef("pk"), resume_time__isnull=True
+        ).order_by("-pause_time")
+        return annotate_work_time(super().get_queryset(request)).annotate(
+            unfinished_pause_time=Subquery(unfinished_pauses.values("pause_time")[:1])
+        )
+
+    def save_related(self, request, form, formsets, change):
+        """Після збереження сесії та її пауз перебудовуємо її журнал подій і денні підсумки (старі й нові дні)"""
+        super().save_related(request, form, formsets, change)
+        session = form.instance
+        rebuild_session_events([session.pk])
+        days = session_days(session)
+        if change and form.initial.get("start_time"):
+            days += session_days(WorkSession(
+                user_id=form.initial["user"], start_time=form.initial["start_time"], end_time=form.initial.get("end_time")
+            ))
+        refresh_daily_totals(days)
+        user_ids = {user_id for user_id, _ in days}
+        transaction.on_commit(lambda: bump_data_version(*user_ids))
+
+    def delete_model(self, request, obj):
+        days = session_days(obj)
+        super().delete_model(request, obj)
+        refresh_daily_totals(days)
+        user_id = obj.user_id
+        transaction.on_commit(lambda: bump_data_version(user_id))
+
+    def delete_queryset(self, request, queryset):
+        days = [pair for session in queryset for pair in session_days(session)]
+        super().delete_queryset(request, queryset)
+        refresh_daily_totals(days)
+        user_ids = {user_id for user_id, _ in days}
+        transaction.on_commit(lambda: bump_data_version(*user_ids))
+
     def formatted_start_time(self, obj):
         """Форматуємо дату початку у формат ДД.ММ.РРРР ГГ:ХХ"""
         return localtime(obj.start_time).strftime("%d.%m.%Y %H:%M")
@@ -83,9 +100,8 @@ class WorkSessionAdmin(admin.ModelAdmin):
         """
         if not obj.end_time:
             return "Ще триває"
-        unfinished_pause = obj.pauses.filter(resume_time__isnull=True).order_by('-pause_time').first()
-        if unfinished_pause:
-            return localtime(unfinished_pause.pause_time).strftime("%d.%m.%Y %H:%M")
+        if obj.unfinished_pause_time:
+            return localtime(obj.unfinished_pause_time).strftime("%d.%m.%Y %H:%M")
         return localtime(obj.end_time).strftime("%d.%m.%Y %H:%M")
     formatted_end_time.short_description = "Кінець роботи"
 
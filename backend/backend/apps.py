@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 class BackendConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'backend'
\ No newline at end of file
+    name = 'backend'
+
+    def ready(self):
+        from .authentication import connect_revocation_signals
+        connect_revocation_signals(self.get_model("User"))
@@ -0,0 +1,105 @@
+"""
+Автентифікація за токеном з кешем token → користувач у пам'яті процесу.
+Бот надсилає токен з кожним натисканням кнопки, тому без кешу кожен запит починається з SELECT по authtoken_token.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class TokenUserCache:
+    """Потокобезпечний TTL-кеш {ключ токена: (користувач, токен)} з витісненням найдавніше використаних (LRU)"""
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (expires_at, user, token)
+        self._user_keys = defaultdict(set)  # user_id -> keys
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, user, token = item
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+        # Копія, щоб зміни атрибутів у межах одного запиту не потрапили в інші
+        return copy.copy(user), token
+
+    def set(self, key, user, token):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (time.monotonic() + self.ttl, user, token)
+            self._user_keys[user.pk].add(key)
+            while len(self._data) > self.max_entries:
+                self._remove(next(iter(self._data)))
+
+    def revoke(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def revoke_user(self, user_id):
+        with self._lock:
+            for key in list(self._user_keys.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._user_keys.clear()
+
+    def _remove(self, key):
+        _, user, _ = self._data.pop(key)
+        keys = self._user_keys.get(user.pk)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[user.pk]
+
+
+token_cache = TokenUserCache(settings.AUTH_TOKEN_CACHE_TTL, settings.AUTH_TOKEN_CACHE_SIZE)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication з кешем: запит до БД лише при першому зверненні або після закінчення TTL.
+    Кеш скидається сигналами при зміні/видаленні токена чи користувача (у межах процесу),
+    в інших процесах зміна стає видимою не пізніше ніж через AUTH_TOKEN_CACHE_TTL секунд.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        return user, token
+
+
+def _revoke_token(sender, instance, **kwargs):
+    token_cache.revoke(instance.key)
+
+
+def _revoke_user(sender, instance, **kwargs):
+    token_cache.revoke_user(instance.pk)
+
+
+def connect_revocation_signals(user_model):
+    """Підключає скидання кешу до збереження/видалення токенів та користувачів (викликається з AppConfig.ready)"""
+    post_save.connect(_revoke_token, sender=Token, dispatch_uid="token_cache_token_saved")
+    post_delete.connect(_revoke_token, sender=Token, dispatch_uid="token_cache_token_deleted")
+    post_save.connect(_revoke_user, sender=user_model, dispatch_uid="token_cache_user_saved")
+    post_delete.connect(_revoke_user, sender=user_model, dispatch_uid="token_cache_user_deleted")
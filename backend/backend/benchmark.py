@@ -0,0 +1,203 @@
+"""
+Генератор синтетичних даних та вимірювання звітних ендпоінтів.
+Використовується командою `python manage.py benchmark_reports`.
+"""
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .models import User, WorkEvent, WorkPause, WorkSession
+from .report_cache import bump_data_version
+from .worktime import kyiv_tz, local_midnight, rebuild_daily_totals, session_events
+
+BENCH_PREFIX = "bench_"
+
+FIRST_NAMES = ["Олена", "Андрій", "Марія", "Іван", "Оксана", "Тарас", "Наталія", "Петро", "Ірина", "Богдан"]
+LAST_NAMES = ["Шевченко", "Коваленко", "Бондаренко", "Ткаченко", "Кравченко", "Олійник", "Мельник", "Лисенко"]
+
+
+def _session_plan(rng, day):
+    """
+    Зміни одного працівника за день: (початок, кінець, [(пауза, відновлення)]).
+    Звичайний день – 6–10 годин з 0–3 перервами, іноді дві зміни або нічна зміна через північ.
+    """
+    if rng.random() < 0.25:  # вихідний
+        return []
+
+    day_start = local_midnight(day)
+    if rng.random() < 0.05:
+        starts = [day_start + timedelta(hours=21, minutes=rng.randint(0, 90))]
+    elif rng.random() < 0.1:
+        starts = [day_start + timedelta(hours=8, minutes=rng.randint(0, 30)),
+                  day_start + timedelta(hours=15, minutes=rng.randint(0, 30))]
+    else:
+        starts = [day_start + timedelta(hours=rng.randint(7, 10), minutes=rng.randint(0, 59))]
+
+    plan = []
+    for start in starts:
+        if len(starts) > 1:
+            length = timedelta(minutes=rng.randint(180, 300))
+        elif start.hour >= 21:
+            length = timedelta(minutes=rng.randint(360, 480))  # нічна зміна закінчується до ранкової
+        else:
+            length = timedelta(minutes=rng.randint(360, 600))
+        pauses = []
+        cursor = start
+        for _ in range(rng.randint(0, 3)):
+            pause_start = cursor + timedelta(minutes=rng.randint(60, 150))
+            pause_end = pause_start + timedelta(minutes=rng.randint(10, 60))
+            if pause_end >= start + length:
+                break
+            pauses.append((pause_start, pause_end))
+            cursor = pause_end
+        plan.append((start, start + length, pauses))
+    return plan
+
+
+def generate_staff(workers, months, seed=0, batch_size=5000):
+    """
+    Створює workers синтетичних працівників з історією змін та перерв за останні months місяців.
+    Остання зміна частини працівників лишається відкритою (активною або на паузі), як у реальних даних.
+    Повертає (admin, список працівників).
+    """
+    rng = random.Random(seed)
+    current = now()
+    first_day = (current.astimezone(kyiv_tz) - timedelta(days=round(months * 30.44))).date()
+    last_day = current.astimezone(kyiv_tz).date()
+
+    with transaction.atomic():
+        admin = User.objects.create(username=f"{BENCH_PREFIX}admin", role="admin", first_name="Bench", last_name="Admin")
+        staff = User.objects.bulk_create([
+            User(
+                username=f"{BENCH_PREFIX}{i}",
+                telegram_id=-(i + 1),
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                role="worker",
+            )
+            for i in range(workers)
+        ], batch_size=batch_size)
+
+    sessions = []
+
+    def flush():
+        with transaction.atomic():
+            created = WorkSession.objects.bulk_create([session for session, _ in sessions], batch_size=batch_size)
+            pauses = {
+                session.pk: [
+                    WorkPause(session=session, pause_time=pause_start, resume_time=pause_end)
+                    for pause_start, pause_end in session_pauses
+                ]
+                for session, (_, session_pauses) in zip(created, sessions)
+            }
+            WorkPause.objects.bulk_create([pause for items in pauses.values() for pause in items], batch_size=batch_size)
+            WorkEvent.objects.bulk_create([
+                event for session in created for event in session_events(session, pauses[session.pk])
+            ], batch_size=batch_size)
+        sessions.clear()
+
+    for worker in staff:
+        day = first_day
+        while day <= last_day:
+            for start, end, session_pauses in _session_plan(rng, day):
+                if start >= current:
+                    continue
+                if end >= current:
+                    # Відкрита зміна "сьогодні": активна або на паузі з незавершеною перервою
+                    status = rng.choice(["active", "paused"])
+                    session_pauses = [(p, r) for p, r in session_pauses if r < current]
+                    if status == "paused":
+                        session_pauses.append((current - timedelta(minutes=5), None))
+                    sessions.append((WorkSession(user=worker, start_time=start, status=status), session_pauses))
+                else:
+                    sessions.append((WorkSession(user=worker, start_time=start, end_time=end, status="ended"),
+                                     session_pauses))
+            day += timedelta(days=1)
+        if len(sessions) >= batch_size:
+            flush()
+    flush()
+
+    rebuild_daily_totals([worker.id for worker in staff])
+    return admin, staff
+
+
+def delete_staff():
+    """Видаляє всіх синтетичних користувачів разом з їх сесіями"""
+    return User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+
+
+def measure(view, user, args=(), params=None, repeat=5, user_ids=None):
+    """
+    Викликає view через APIRequestFactory repeat разів.
+    Перед кожним викликом версія даних user_ids (за замовчуванням – користувача запиту) збільшується:
+    вимірюється повне обчислення, а не попадання в кеш, і кеш інших звітів не зачіпається.
+    Повертає латентність (мс), кількість та час SQL-запитів і пікову пам'ять Python (КіБ).
+    """
+    factory = APIRequestFactory()
+    user_ids = user_ids or (user.id,)
+
+    def call():
+        request = factory.get("/", params or {})
+        force_authenticate(request, user=user)
+        response = view.as_view()(request, *args)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        else:
+            response.render()
+        return response.status_code
+
+    return measure_call(call, repeat, setup=lambda: bump_data_version(*user_ids))
+
+
+def measure_call(call, repeat=5, setup=None):
+    """
+    Вимірює довільну функцію (напр. формування Excel-файлу у фоновому завданні); call повертає статус.
+    setup викликається перед кожним викликом call поза вимірюванням.
+    """
+    setup = setup or (lambda: None)
+    latencies, query_counts, query_times = [], [], []
+
+    setup()
+    call()  # прогрів: імпорти, локалі, кеші підключення не повинні потрапляти у вимірювання
+
+    for _ in range(repeat):
+        setup()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            status = call()
+            latencies.append((time.perf_counter() - started) * 1000)
+        query_counts.append(len(queries))
+        query_times.append(sum(float(query["time"]) for query in queries.captured_queries) * 1000)
+
+    # Пам'ять – окремим викликом: tracemalloc у рази сповільнює код і спотворив би латентність
+    setup()
+    tracemalloc.start()
+    call()
+    peak = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+
+    return {
+        "status": status,
+        "latency_ms": {
+            "min": round(min(latencies), 2),
+            "median": round(statistics.median(latencies), 2),
+            "max": round(max(latencies), 2),
+        },
+        "queries": max(query_counts),
+        "db_time_ms": round(statistics.median(query_times), 2),
+        "peak_memory_kib": round(peak, 1),
+    }
+
+
+def previous_month(day):
+    """(рік, місяць) попереднього місяця"""
+    first = date(day.year, day.month, 1) - timedelta(days=1)
+    return first.year, first.month
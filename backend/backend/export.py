@@ -0,0 +1,102 @@
+from itertools import islice
+
+import pandas as pd
+import xlsxwriter
+
+from .intervals import day_parts, work_intervals
+from .models import WorkSession
+from .worktime import filter_overlapping_days
+
+KYIV_TZ_NAME = "Europe/Kyiv"
+
+SESSION_FIELDS = ["session_id", "user_id", "first_name", "last_name", "username", "start_time", "end_time"]
+
+
+def _session_frame(rows, date_from, date_to):
+    """
+    Частина сесій: (рядки аркуша "Зміни", робочі години по (київський день, працівник)).
+    Робочий час береться з журналу подій і ділиться по добах, тож нічна зміна потрапляє в обидва дні,
+    а зміна на межі періоду – лише своєю частиною в періоді.
+    """
+    frame = pd.DataFrame.from_records(rows, columns=SESSION_FIELDS)
+    parts = day_parts(work_intervals(frame["session_id"].tolist()), date_from, date_to)
+
+    names = (frame["first_name"].fillna("") + " " + frame["last_name"].fillna("")).str.strip()
+    frame["name"] = names.where(names != "", frame["username"])
+    start = pd.to_datetime(frame["start_time"], utc=True).dt.tz_convert(KYIV_TZ_NAME).dt.tz_localize(None)
+    end = pd.to_datetime(frame["end_time"], utc=True).dt.tz_convert(KYIV_TZ_NAME).dt.tz_localize(None)
+    frame["start"] = start.dt.strftime("%d.%m.%Y %H:%M")
+    frame["end"] = end.dt.strftime("%d.%m.%Y %H:%M").fillna("Ще триває")
+    session_hours = parts.groupby("session_id")["seconds"].sum() / 3600
+    frame["hours"] = frame["session_id"].map(session_hours).fillna(0).astype(float)
+
+    daily = parts.assign(day=pd.to_datetime(parts["day"]), hours=parts["seconds"].astype(float) / 3600)
+    return frame[["user_id", "name", "start", "end", "hours"]], daily.groupby(["day", "user_id"])["hours"].sum()
+
+
+def session_chunks(date_from, date_to, chunk_size=2000):
+    """
+    Сесії з робочим часом у днях [date_from, date_to] частинами по chunk_size рядків.
+    Рядки читаються курсором (.iterator()), тож у пам'яті одночасно лише одна частина;
+    для кожної частини – один запит до журналу подій.
+    """
+    rows = (
+        filter_overlapping_days(WorkSession.objects.all(), date_from, date_to)
+        .order_by("start_time", "id")
+        .values_list("id", "user_id", "user__first_name", "user__last_name", "user__username",
+                     "start_time", "end_time")
+        .iterator(chunk_size=chunk_size)
+    )
+    while chunk := list(islice(rows, chunk_size)):
+        yield _session_frame(chunk, date_from, date_to)
+
+
+def _column_names(names):
+    """Ім'я працівника для заголовка колонки; однакові імена розрізняємо за ID"""
+    names = pd.Series(names)
+    duplicated = names.duplicated(keep=False)
+    return names.where(~duplicated, names + " (" + names.index.astype(str) + ")")
+
+
+def write_excel_report(output, date_from, date_to, chunk_size=2000):
+    """
+    Записує Excel-звіт за період у файл output (шлях або файловий об'єкт).
+    Аркуш "Зміни" заповнюється рядок за рядком у режимі constant_memory прямо з курсора,
+    а зведені аркуші по місяцях (дні × працівники) – з сум, накопичених векторно по частинах.
+    """
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+
+    all_days = pd.date_range(date_from, date_to, freq="D")
+    periods = all_days.to_period("M")
+    month_sheets = [(period, workbook.add_worksheet(period.strftime("%m.%Y"))) for period in periods.unique()]
+
+    sessions_sheet = workbook.add_worksheet("Зміни")
+    sessions_sheet.write_row(0, 0, ["Працівник", "Початок", "Кінець", "Години"])
+
+    totals = None
+    names = {}
+    row = 1
+    for frame, chunk_totals in session_chunks(date_from, date_to, chunk_size):
+        rows = frame[["name", "start", "end"]].assign(hours=frame["hours"].round(2))
+        for record in rows.itertuples(index=False):
+            sessions_sheet.write_row(row, 0, record)
+            row += 1
+        totals = chunk_totals if totals is None else totals.add(chunk_totals, fill_value=0)
+        names.update(zip(frame["user_id"], frame["name"]))
+
+    # Зведення: рядки – усі дні періоду, колонки – працівники
+    if totals is not None:
+        pivot = totals.unstack(fill_value=0)
+    else:
+        pivot = pd.DataFrame(index=all_days)
+    pivot = pivot.reindex(index=all_days, fill_value=0).round(2)
+    headers = list(_column_names(names).reindex(pivot.columns)) if names else []
+
+    for period, sheet in month_sheets:
+        sheet.write_row(0, 1, headers)
+        month_pivot = pivot[periods == period]
+        for sheet_row, (day, values) in enumerate(zip(month_pivot.index, month_pivot.to_numpy().tolist()), start=1):
+            sheet.write(sheet_row, 0, day.strftime("%d.%m.%Y"))
+            sheet.write_row(sheet_row, 1, values)
+
+    workbook.close()
@@ -0,0 +1,157 @@
+"""
+Черга Excel-експорту в БД: запит лише ставить завдання, а файл формує обмежений пул потоків
+у процесі веб-сервера (EXPORT_WORKERS) та/або окремий процес `python manage.py run_export_jobs`.
+Завдання береться в роботу умовним UPDATE, тому кілька виконавців не обробляють одне завдання двічі.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Max
+from django.utils.timezone import now
+
+from .export import write_excel_report
+from .models import ExportJob, WorkEvent, WorkSession
+from .report_cache import ALL_USERS, data_version
+from .worktime import OPEN_STATUSES, filter_overlapping_days, month_days
+
+logger = logging.getLogger(__name__)
+
+PENDING_STATUSES = ("queued", "running")
+
+
+class QueueFull(Exception):
+    """Незавершених завдань більше, ніж EXPORT_QUEUE_LIMIT"""
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.EXPORT_WORKERS, thread_name_prefix="export")
+        return _executor
+
+
+def export_filename(date_from, date_to):
+    """Ім'я файлу: report_<місяць>_<рік>.xlsx для цілого місяця, інакше report_<з>-<по>.xlsx"""
+    if (date_from, date_to) == month_days(date_from.year, date_from.month):
+        return f"report_{date_from.month}_{date_from.year}.xlsx"
+    return f"report_{date_from:%d.%m.%Y}-{date_to:%d.%m.%Y}.xlsx"
+
+
+def period_last_event_id(date_from, date_to):
+    """Найбільший id події журналу в сесіях, що припадають на період (0, якщо подій немає)"""
+    sessions = filter_overlapping_days(WorkSession.objects.all(), date_from, date_to).values("pk")
+    return WorkEvent.objects.filter(session__in=sessions).aggregate(last=Max("id"))["last"] or 0
+
+
+def submit_export(date_from, date_to, user=None):
+    """
+    Завдання на експорт за період: готове з тією ж версією даних (версія в БД та остання подія журналу
+    в періоді), вже поставлене в чергу, або нове.
+    QueueFull, якщо черга заповнена.
+    """
+    requeue_stale_jobs()
+    version = data_version(ALL_USERS)
+    last_event_id = period_last_event_id(date_from, date_to)
+    same_period = ExportJob.objects.filter(
+        date_from=date_from, date_to=date_to, data_version=version, last_event_id=last_event_id
+    )
+    job = (
+        same_period.filter(status="done", reusable=True).order_by("-finished_at").first()
+        or same_period.filter(status__in=PENDING_STATUSES).order_by("-created_at").first()
+    )
+    if job:
+        if job.status in PENDING_STATUSES:
+            # Завдання могло лишитись у черзі після перезапуску, коли його ніхто не обробляє
+            _schedule_work()
+        return job
+
+    if ExportJob.objects.filter(status__in=PENDING_STATUSES).count() >= settings.EXPORT_QUEUE_LIMIT:
+        # Черга могла заповнитись завданнями, які ніхто не обробляє – запускаємо виконавця
+        _schedule_work()
+        raise QueueFull()
+
+    job = ExportJob.objects.create(
+        requested_by=user, date_from=date_from, date_to=date_to, data_version=version, last_event_id=last_event_id
+    )
+    _schedule_work()
+    return job
+
+
+def _schedule_work():
+    if settings.EXPORT_WORKERS > 0:
+        transaction.on_commit(lambda: _get_executor().submit(_work))
+
+
+def claim_next_job():
+    """Бере в роботу найстаріше завдання з черги (None, якщо черга порожня)"""
+    while True:
+        job = ExportJob.objects.filter(status="queued").order_by("created_at", "id").first()
+        if job is None:
+            return None
+        if ExportJob.objects.filter(pk=job.pk, status="queued").update(status="running", started_at=now()):
+            job.status = "running"
+            return job
+
+
+def run_job(job):
+    """Формує файл для взятого в роботу завдання"""
+    os.makedirs(settings.EXPORT_DIR, exist_ok=True)
+    path = os.path.join(settings.EXPORT_DIR, f"export_{job.pk}.xlsx")
+    try:
+        # Звіт з незавершеними змінами залежить від часу формування – повторно його не віддаємо
+        reusable = not filter_overlapping_days(
+            WorkSession.objects.filter(status__in=OPEN_STATUSES), job.date_from, job.date_to
+        ).exists()
+        with open(path, "wb") as output:
+            write_excel_report(output, job.date_from, job.date_to)
+    except Exception as e:
+        logger.exception(f"Експорт {job.pk} не вдався")
+        if os.path.exists(path):
+            os.remove(path)
+        ExportJob.objects.filter(pk=job.pk).update(status="failed", error=repr(e), finished_at=now())
+        return
+    ExportJob.objects.filter(pk=job.pk).update(status="done", file_path=path, reusable=reusable, finished_at=now())
+
+
+def requeue_stale_jobs(timeout=None):
+    """Повертає в чергу завдання, виконавець яких завершився, не закінчивши роботу"""
+    if timeout is None:
+        timeout = timedelta(minutes=settings.EXPORT_STALE_MINUTES)
+    return ExportJob.objects.filter(status="running", started_at__lt=now() - timeout).update(
+        status="queued", started_at=None
+    )
+
+
+def delete_expired_jobs():
+    """Видаляє завершені завдання старші за EXPORT_RESULT_DAYS разом з файлами"""
+    expired = ExportJob.objects.filter(
+        status__in=("done", "failed"), finished_at__lt=now() - timedelta(days=settings.EXPORT_RESULT_DAYS)
+    )
+    for path in expired.exclude(file_path="").values_list("file_path", flat=True):
+        if os.path.exists(path):
+            os.remove(path)
+    return expired.delete()[0]
+
+
+def _work():
+    # Потік пулу обробляє всі завдання в черзі, включно з тими, що лишились після перезапуску
+    close_old_connections()
+    try:
+        requeue_stale_jobs()
+        while (job := claim_next_job()) is not None:
+            run_job(job)
+        delete_expired_jobs()
+    except Exception:
+        logger.exception("Помилка виконавця експорту")
+    finally:
+        close_old_connections()
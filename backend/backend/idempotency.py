@@ -0,0 +1,97 @@
+"""
+Ідемпотентність запитів на зміну стану: відповідь на ключ (заголовок Idempotency-Key, напр. update_id
+Telegram) зберігається в таблиці IdempotencyKey в одній транзакції з дією, і повторний запит з тим самим
+ключем отримує її знову, не виконуючи дію вдруге – навіть після перезапуску або на іншому воркері.
+Ключі живуть IDEMPOTENCY_TTL.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.timezone import now
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+MAX_KEY_LENGTH = 200
+
+
+def _cutoff():
+    return now() - timedelta(seconds=settings.IDEMPOTENCY_TTL)
+
+
+def _replay(stored):
+    return Response(stored.response, status=stored.status_code, headers={"Idempotent-Replayed": "true"})
+
+
+def idempotent(request, run, key=None):
+    """
+    Відповідь run() з урахуванням ключа ідемпотентності запиту (key або заголовок Idempotency-Key).
+    Без ключа run() просто виконується. Ключ діє в межах користувача та ендпоінта.
+    """
+    key = request.headers.get("Idempotency-Key") or key
+    if not key:
+        return run()
+    key = str(key)
+    if len(key) > MAX_KEY_LENGTH:
+        return Response({"error": f"❌ Idempotency-Key довший за {MAX_KEY_LENGTH} символів."}, status=400)
+    return replay_or_run(request.user, f"{request.path}:{key}", run)
+
+
+def replay_or_run(user, key, run):
+    """
+    Збережена відповідь для (user, key), якщо запит уже виконувався, інакше результат run().
+    Дія та її відповідь фіксуються однією транзакцією; якщо паралельний запит з тим самим ключем
+    встиг першим, дія відкочується, а клієнт отримує його відповідь.
+    Помилки сервера (5xx) не зберігаються, щоб повтор міг виконати дію.
+    """
+    delete_expired_keys(user)
+    stored = IdempotencyKey.objects.filter(user=user, key=key).first()
+    if stored is not None:
+        return _replay(stored)
+
+    try:
+        with transaction.atomic():
+            response = run()
+            if response.status_code < 500:
+                IdempotencyKey.objects.create(
+                    user=user, key=key, status_code=response.status_code, response=response.data
+                )
+    except IntegrityError:
+        stored = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if stored is None:
+            raise
+        return _replay(stored)
+    return response
+
+
+def stored_results(keys):
+    """Збережені результати подій пакета для ключів [(user_id, ключ)]: {(user_id, ключ): результат}"""
+    if not keys:
+        return {}
+    stored = IdempotencyKey.objects.filter(
+        user_id__in={user_id for user_id, _ in keys}, key__in={f"events:{key}" for _, key in keys},
+        created_at__gte=_cutoff(),
+    ).values_list("user_id", "key", "response")
+    return {(user_id, key.removeprefix("events:")): response for user_id, key, response in stored}
+
+
+def store_results(results):
+    """
+    Запам'ятовує результати подій пакета {(user_id, ключ): результат}; викликається в транзакції
+    застосування подій, тож паралельний пакет з тими самими ключами отримає IntegrityError.
+    """
+    if results:
+        user_ids = {user_id for user_id, _ in results}
+        IdempotencyKey.objects.filter(
+            user_id__in=user_ids, key__in={f"events:{key}" for _, key in results}, created_at__lt=_cutoff()
+        ).delete()
+        IdempotencyKey.objects.bulk_create([
+            IdempotencyKey(user_id=user_id, key=f"events:{key}", status_code=200, response=result)
+            for (user_id, key), result in results.items()
+        ])
+
+
+def delete_expired_keys(user):
+    """Видаляє ключі користувача, старші за IDEMPOTENCY_TTL"""
+    return IdempotencyKey.objects.filter(user=user, created_at__lt=_cutoff()).delete()[0]
@@ -0,0 +1,168 @@
+"""
+Робочі інтервали та їх розбиття на київські доби.
+Інтервали відновлюються з журналу подій одним запитом (LEAD), далі все рахується векторно в numpy
+над секундами epoch: межі діб – відсортований масив київських північ (з урахуванням переходу
+на літній/зимовий час, тож доба може тривати 23 або 25 годин), доба інтервалу – np.searchsorted.
+"""
+from datetime import datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+import pytz
+from django.db.models import F, FloatField, Func, Window
+from django.db.models.functions import Lead
+from django.utils.timezone import now
+
+from .models import WorkEvent
+
+kyiv_tz = pytz.timezone("Europe/Kyiv")
+KYIV_TZ_NAME = "Europe/Kyiv"
+
+WORK_KINDS = ("start", "resume")
+
+INTERVAL_COLUMNS = ["session_id", "user_id", "start", "end", "open"]
+PART_COLUMNS = ["session_id", "user_id", "day", "seconds", "start", "end", "open", "last"]
+
+
+class Epoch(Func):
+    """
+    Секунди epoch (float) для DateTimeField на боці БД: значення читаються без конвертерів дат Django,
+    що для десятків тисяч подій на порядок швидше за aware datetime.
+    """
+    template = "CAST(EXTRACT(EPOCH FROM %(expressions)s) AS double precision)"
+    output_field = FloatField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # SQLite зберігає час у UTC як 'РРРР-ММ-ДД ГГ:ХХ:СС[.мкс]': цілі секунди + дробова частина рядка
+        template = (
+            "(CAST(strftime('%%%%s', %(expressions)s) AS REAL)"
+            " + COALESCE(CAST(substr(%(expressions)s, 20) AS REAL), 0))"
+        )
+        return self.as_sql(compiler, connection, template=template, **extra_context)
+
+
+def work_intervals(sessions, at=None, events=None):
+    """
+    Інтервали роботи сесій (queryset, підзапит або список id) з журналу подій: DataFrame з колонками
+    session_id, user_id, start, end (секунди epoch) та open (сесія ще не завершена).
+    Інтервал триває від start/resume до наступної події сесії, останній відкритий – до at.
+    events – менеджер подій (історична модель WorkEvent у міграціях).
+    """
+    at = (at or now()).timestamp()
+    events = (events if events is not None else WorkEvent.objects).filter(session__in=sessions)
+    rows = events.annotate(
+        epoch=Epoch("ts"),
+        next_epoch=Window(Lead(Epoch("ts")), partition_by=[F("session_id")], order_by=[F("ts").asc(), F("id").asc()]),
+    ).values_list("session_id", "user_id", "kind", "epoch", "next_epoch")
+    events = pd.DataFrame.from_records(list(rows), columns=["session_id", "user_id", "kind", "ts", "next_ts"])
+    if events.empty:
+        return pd.DataFrame(columns=INTERVAL_COLUMNS)
+
+    # Сесія відкрита, якщо її остання подія – не stop (зокрема пауза, що триває)
+    next_ts = events["next_ts"].to_numpy(dtype=float)
+    last = np.isnan(next_ts)
+    open_sessions = events.loc[last & (events["kind"] != "stop").to_numpy(), "session_id"]
+
+    work = (events["kind"].isin(WORK_KINDS)).to_numpy()
+    end = next_ts[work]
+    return pd.DataFrame({
+        "session_id": events["session_id"].to_numpy()[work],
+        "user_id": events["user_id"].to_numpy()[work],
+        "start": events["ts"].to_numpy(dtype=float)[work],
+        "end": np.where(np.isnan(end), at, end),
+        "open": events["session_id"].isin(open_sessions).to_numpy()[work],
+    })
+
+
+def day_bounds(date_from, date_to):
+    """Початки київських діб date_from…date_to та наступної за date_to (секунди epoch, n + 1 меж)"""
+    days = [date_from + timedelta(days=offset) for offset in range((date_to - date_from).days + 2)]
+    return days[:-1], np.array([kyiv_tz.localize(datetime.combine(day, time.min)).timestamp() for day in days])
+
+
+def local_days(epochs):
+    """Київські дати для масиву секунд epoch"""
+    return pd.to_datetime(epochs, unit="s", utc=True).tz_convert(KYIV_TZ_NAME).date
+
+
+def local_times(epochs, fmt="%H:%M"):
+    """Київський час у форматі fmt для масиву секунд epoch (векторно, з урахуванням переходу часу)"""
+    return pd.to_datetime(epochs, unit="s", utc=True).tz_convert(KYIV_TZ_NAME).strftime(fmt)
+
+
+def split_by_day(starts, ends, bounds):
+    """
+    Ділить інтервали [starts, ends) межами діб bounds (частини поза [bounds[0], bounds[-1]) відкидаються).
+    Повертає масиви (номер інтервалу, номер доби, початок частини, кінець частини).
+    """
+    starts = np.clip(starts, bounds[0], bounds[-1])
+    ends = np.clip(ends, bounds[0], bounds[-1])
+    index = np.flatnonzero(ends > starts)
+    starts, ends = starts[index], ends[index]
+    # Кінець рівно опівночі належить попередній добі
+    first = np.searchsorted(bounds, starts, side="right") - 1
+    last = np.searchsorted(bounds, ends, side="left") - 1
+
+    single = first == last
+    parts = [(index[single], first[single], starts[single], ends[single])]
+    multi = ~single
+    if multi.any():
+        index, first, last, starts, ends = index[multi], first[multi], last[multi], starts[multi], ends[multi]
+        parts.append((index, first, starts, bounds[first + 1]))
+        parts.append((index, last, bounds[last], ends))
+        # Повні доби між першою та останньою (зміни довші за добу)
+        count = last - first - 1
+        if count.any():
+            offsets = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+            days = np.repeat(first + 1, count) + offsets
+            parts.append((np.repeat(index, count), days, bounds[days], bounds[days + 1]))
+    return tuple(np.concatenate(column) for column in zip(*parts))
+
+
+def day_parts(intervals, date_from=None, date_to=None):
+    """
+    Робочий час кожної сесії по київських добах [date_from, date_to] (за замовчуванням – усі доби інтервалів).
+    DataFrame, впорядкований за (session_id, day): seconds – робочі секунди сесії в цю добу,
+    start/end – перший та останній робочий момент доби (секунди epoch), open – сесія не завершена,
+    last – остання доба сесії в періоді.
+    """
+    if intervals.empty:
+        return pd.DataFrame(columns=PART_COLUMNS)
+    if date_from is None or date_to is None:
+        first, last = local_days(np.array([intervals["start"].min(), intervals["end"].max()]))
+        date_from, date_to = date_from or first, date_to or last
+
+    days, bounds = day_bounds(date_from, date_to)
+    index, day, start, end = split_by_day(intervals["start"].to_numpy(), intervals["end"].to_numpy(), bounds)
+    if not len(index):
+        return pd.DataFrame(columns=PART_COLUMNS)
+
+    parts = pd.DataFrame({
+        "session_id": intervals["session_id"].to_numpy()[index],
+        "user_id": intervals["user_id"].to_numpy()[index],
+        "day": day,
+        "seconds": end - start,
+        "start": start,
+        "end": end,
+        "open": intervals["open"].to_numpy()[index],
+    })
+    parts = (
+        parts.groupby(["session_id", "day"], sort=True)
+        .agg(user_id=("user_id", "first"), seconds=("seconds", "sum"), start=("start", "min"),
+             end=("end", "max"), open=("open", "first"))
+        .reset_index()
+    )
+    parts["last"] = parts["session_id"].ne(parts["session_id"].shift(-1)).to_numpy()
+    parts["day"] = np.array(days, dtype=object)[parts["day"].to_numpy()]
+    return parts[PART_COLUMNS]
+
+
+def daily_seconds(parts):
+    """Робочі секунди та кількість сесій по (user_id, день): {(user_id, день): (секунди, сесій)}"""
+    if parts.empty:
+        return {}
+    grouped = parts.groupby(["user_id", "day"]).agg(seconds=("seconds", "sum"), sessions=("session_id", "nunique"))
+    return {
+        (int(user_id), day): (seconds, int(sessions))
+        for (user_id, day), seconds, sessions in zip(grouped.index, grouped["seconds"], grouped["sessions"])
+    }
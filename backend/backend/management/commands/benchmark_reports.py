@@ -0,0 +1,130 @@
+import json
+import platform
+import subprocess
+import tempfile
+from datetime import datetime
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils.timezone import now
+
+from backend import views
+from backend.benchmark import delete_staff, generate_staff, measure, measure_call, previous_month
+from backend.export import write_excel_report
+from backend.worktime import kyiv_tz, month_days
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерує синтетичних працівників та вимірює латентність, кількість SQL-запитів і пам'ять звітних ендпоінтів. "
+        "Результат записується у JSON для порівняння між комітами."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=50, help="Кількість працівників (10–10000)")
+        parser.add_argument("--months", type=int, default=3, help="Глибина історії в місяцях (1–60)")
+        parser.add_argument("--repeat", type=int, default=5, help="Кількість вимірювань кожного ендпоінту")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", default="bench_results.json", help="Файл з результатами")
+        parser.add_argument("--compare", help="Попередній файл результатів для порівняння")
+        parser.add_argument("--keep", action="store_true", help="Не видаляти синтетичні дані після вимірювань")
+        parser.add_argument("--allow-writes", action="store_true",
+                            help="Дозволити запис синтетичних даних у не-SQLite БД (лише для тестової бази!)")
+
+    def handle(self, *args, **options):
+        # Команда масово створює та видаляє користувачів і сесії – за замовчуванням лише в локальному SQLite
+        if connection.vendor != "sqlite" and not options["allow_writes"]:
+            raise CommandError(
+                f"🚫 БД {connection.vendor} ({connection.settings_dict.get('NAME')}) може бути робочою. "
+                "Запустіть з DATABASE_URL=sqlite:///bench.sqlite3 або, якщо це тестова база, з --allow-writes."
+            )
+        delete_staff()
+
+        self.stdout.write(f"⏳ Генерація: {options['workers']} працівників × {options['months']} міс.")
+        started = datetime.now()
+        admin, staff = generate_staff(options["workers"], options["months"], seed=options["seed"])
+        self.stdout.write(f"✅ Дані згенеровано за {(datetime.now() - started).total_seconds():.1f} с")
+
+        try:
+            results = self.run_benchmarks(admin, staff[0], options["repeat"])
+        finally:
+            if not options["keep"]:
+                delete_staff()
+
+        report = {
+            "meta": {
+                "commit": _git_commit(),
+                "timestamp": now().isoformat(),
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "workers": options["workers"],
+                "months": options["months"],
+                "repeat": options["repeat"],
+                "seed": options["seed"],
+            },
+            "results": results,
+        }
+        with open(options["output"], "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<22} {result['latency_ms']['median']:>10.1f} мс  "
+                f"{result['queries']:>5} запитів  {result['peak_memory_kib']:>10.1f} КіБ"
+            )
+        if options["compare"]:
+            self.compare(options["compare"], results)
+        self.stdout.write(self.style.SUCCESS(f"📄 Результати збережено у {options['output']}"))
+
+    def run_benchmarks(self, admin, worker, repeat):
+        today = now().astimezone(kyiv_tz)
+        year, month = previous_month(today)
+        window = {"date_from": f"{year}-{month:02d}-01", "date_to": today.date().isoformat()}
+
+        cases = {
+            "MyHours": (views.MyHours, worker, (), None),
+            "MonthlyReport": (views.MonthlyReport, admin, (worker.id, year, month), None),
+            "AdminReport": (views.AdminReport, admin, (), None),
+            "AdminReport[window]": (views.AdminReport, admin, (), window),
+            "AvailableWorkers": (views.AvailableWorkers, admin, (), None),
+        }
+        results = {}
+        for name, (view, user, view_args, params) in cases.items():
+            self.stdout.write(f"⏱ {name}")
+            results[name] = measure(view, user, view_args, params, repeat=repeat, user_ids=(worker.id,))
+
+        # Excel формується фоновим завданням, тому вимірюємо саме формування файлу, а не постановку в чергу
+        self.stdout.write("⏱ ExportExcelReport")
+
+        def export():
+            with tempfile.TemporaryFile() as output:
+                write_excel_report(output, *month_days(year, month))
+            return 200
+
+        results["ExportExcelReport"] = measure_call(export, repeat=repeat)
+        return results
+
+    def compare(self, path, results):
+        """Виводить зміну медіанної латентності та кількості запитів відносно попереднього запуску"""
+        with open(path, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+
+        self.stdout.write(f"\nПорівняння з {path}:")
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            before, after = baseline[name]["latency_ms"]["median"], result["latency_ms"]["median"]
+            change = (after - before) / before * 100 if before else 0
+            self.stdout.write(
+                f"{name:<22} {before:>10.1f} → {after:>10.1f} мс ({change:+.0f}%)  "
+                f"запити {baseline[name]['queries']} → {result['queries']}"
+            )
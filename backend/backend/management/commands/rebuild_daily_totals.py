@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from backend.worktime import rebuild_daily_totals
+
+
+class Command(BaseCommand):
+    help = "Перебудовує денні підсумки робочого часу (DailyWorkTotal) з історії сесій"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="user_ids",
+                            help="ID користувача (можна вказати кілька разів); за замовчуванням – усі")
+
+    def handle(self, *args, **options):
+        created = rebuild_daily_totals(options["user_ids"])
+        self.stdout.write(self.style.SUCCESS(f"✅ Перебудовано денних підсумків: {created}"))
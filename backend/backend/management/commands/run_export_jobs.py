@@ -0,0 +1,32 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend.export_jobs import claim_next_job, delete_expired_jobs, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Виконує завдання Excel-експорту з черги в БД (окремий процес замість пулу у веб-сервері)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Обробити чергу один раз і завершитись")
+        parser.add_argument("--interval", type=float, default=2, help="Пауза між перевірками черги, секунди")
+        parser.add_argument("--stale-minutes", type=int, default=settings.EXPORT_STALE_MINUTES,
+                            help="Через скільки хвилин завдання в роботі вважається покинутим")
+
+    def handle(self, *args, **options):
+        while True:
+            requeue_stale_jobs(timedelta(minutes=options["stale_minutes"]))
+            processed = 0
+            while (job := claim_next_job()) is not None:
+                run_job(job)
+                processed += 1
+                self.stdout.write(f"Експорт {job.pk} ({job.date_from} – {job.date_to}) оброблено")
+            delete_expired_jobs()
+
+            if options["once"]:
+                self.stdout.write(self.style.SUCCESS(f"✅ Оброблено завдань: {processed}"))
+                return
+            time.sleep(options["interval"])
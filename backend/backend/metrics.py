@@ -0,0 +1,117 @@
+"""
+Метрики API у текстовому форматі Prometheus (/metrics) та структурований лог кожного запиту.
+Для кожного view: гістограми латентності, кількості SQL-запитів та часу в БД.
+Значення зберігаються в пам'яті процесу – кожен воркер gunicorn віддає власні лічильники.
+"""
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger("backend.requests")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    """Гістограма з мітками: накопичувальні лічильники по кошиках, сума та кількість спостережень"""
+
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}  # значення міток -> [лічильники кошиків..., +Inf], сума
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            counts, total = self._series.get(label_values, ([0] * (len(self.buckets) + 1), 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            self._series[label_values] = (counts, total + value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for label_values, (counts, total) in series:
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.labels, label_values))
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {counts[-1]}")
+        return "\n".join(lines)
+
+
+request_latency = Histogram(
+    "api_request_duration_seconds", "Час обробки запиту", ("view", "method", "status"), LATENCY_BUCKETS
+)
+request_queries = Histogram("api_request_db_queries", "Кількість SQL-запитів на запит", ("view",), QUERY_BUCKETS)
+request_db_time = Histogram("api_request_db_seconds", "Сумарний час SQL-запитів на запит", ("view",), LATENCY_BUCKETS)
+
+HISTOGRAMS = (request_latency, request_queries, request_db_time)
+
+
+class QueryStats:
+    """Обгортка виконання SQL (connection.execute_wrapper): рахує запити та їх сумарний час"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        started = time.perf_counter()
+        with connection.execute_wrapper(stats):
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = (match.view_name or match.func.__name__) if match else "unmatched"
+        if view == "metrics":
+            return response
+
+        request_latency.observe(duration, view, request.method, response.status_code)
+        request_queries.observe(stats.count, view)
+        request_db_time.observe(stats.duration, view)
+
+        logger.info(json.dumps({
+            "view": view,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 1),
+            "db_queries": stats.count,
+            "db_ms": round(stats.duration * 1000, 1),
+            "user_id": getattr(getattr(request, "user", None), "id", None),
+        }, ensure_ascii=False))
+        return response
+
+
+def metrics_view(request):
+    """Метрики у форматі Prometheus; якщо задано METRICS_TOKEN – лише із заголовком Authorization: Bearer <токен>"""
+    if settings.METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {settings.METRICS_TOKEN}":
+        return HttpResponseForbidden()
+    body = "\n\n".join(histogram.render() for histogram in HISTOGRAMS) + "\n"
+    return HttpResponse(body, content_type="text/plain; version=0.0.4; charset=utf-8")
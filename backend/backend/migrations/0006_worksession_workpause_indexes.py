@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0005_workpause'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workpause',
+            index=models.Index(fields=['session', 'pause_time'], name='workpause_session_pause_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workpause',
+            index=models.Index(condition=models.Q(('resume_time__isnull', True)), fields=['session'], name='workpause_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(fields=['user', 'status'], name='worksession_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(fields=['user', 'start_time'], name='worksession_user_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(fields=['start_time'], name='worksession_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(condition=models.Q(('status__in', ['active', 'paused'])), fields=['user'], name='worksession_open_idx'),
+        ),
+    ]
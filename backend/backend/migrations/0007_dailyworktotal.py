@@ -0,0 +1,59 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:38
+
+from collections import defaultdict
+from datetime import timedelta
+
+import django.db.models.deletion
+import pytz
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_daily_totals(apps, schema_editor):
+    """Заповнює підсумки з уже завершених сесій (те саме робить команда rebuild_daily_totals)"""
+    WorkSession = apps.get_model('backend', 'WorkSession')
+    DailyWorkTotal = apps.get_model('backend', 'DailyWorkTotal')
+    kyiv_tz = pytz.timezone('Europe/Kyiv')
+
+    totals = defaultdict(lambda: [timedelta(), 0])
+    sessions = WorkSession.objects.filter(status='ended', end_time__isnull=False).prefetch_related('pauses')
+    for session in sessions.iterator(chunk_size=1000):
+        paused = sum(
+            ((pause.resume_time or session.end_time) - pause.pause_time for pause in session.pauses.all()),
+            timedelta(),
+        )
+        key = (session.user_id, session.start_time.astimezone(kyiv_tz).date())
+        totals[key][0] += session.end_time - session.start_time - paused
+        totals[key][1] += 1
+
+    DailyWorkTotal.objects.bulk_create(
+        [
+            DailyWorkTotal(user_id=user_id, date=day, net_seconds=max(int(net.total_seconds()), 0), session_count=count)
+            for (user_id, day), (net, count) in totals.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0006_worksession_workpause_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyWorkTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('net_seconds', models.PositiveIntegerField(default=0)),
+                ('session_count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_totals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'date'), name='dailyworktotal_user_date_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:44
+
+from datetime import timedelta
+
+import pytz
+from django.db import migrations, models
+
+
+def close_duplicate_open_sessions(apps, schema_editor):
+    """
+    Закриває зайві відкриті сесії (наслідок подвійного натискання "Почати роботу"):
+    для кожного користувача лишається відкритою лише остання, попередні завершуються
+    в момент початку наступної. Денні підсумки оновлюються для закритих сесій.
+    """
+    WorkSession = apps.get_model('backend', 'WorkSession')
+    DailyWorkTotal = apps.get_model('backend', 'DailyWorkTotal')
+    kyiv_tz = pytz.timezone('Europe/Kyiv')
+
+    duplicated_users = (
+        WorkSession.objects.filter(status__in=['active', 'paused'])
+        .values('user_id').annotate(count=models.Count('id')).filter(count__gt=1)
+        .values_list('user_id', flat=True)
+    )
+    for user_id in list(duplicated_users):
+        sessions = list(
+            WorkSession.objects.filter(user_id=user_id, status__in=['active', 'paused'])
+            .order_by('start_time', 'id').prefetch_related('pauses')
+        )
+        for session, following in zip(sessions, sessions[1:]):
+            session.end_time = max(following.start_time, session.start_time)
+            session.status = 'ended'
+            session.save(update_fields=['end_time', 'status'])
+
+            paused = sum(
+                (
+                    (pause.resume_time or session.end_time) - pause.pause_time
+                    for pause in session.pauses.all() if pause.pause_time < session.end_time
+                ),
+                timedelta(),
+            )
+            net_seconds = max(int((session.end_time - session.start_time - paused).total_seconds()), 0)
+            total, _ = DailyWorkTotal.objects.get_or_create(
+                user_id=user_id, date=session.start_time.astimezone(kyiv_tz).date()
+            )
+            total.net_seconds += net_seconds
+            total.session_count += 1
+            total.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0007_dailyworktotal'),
+    ]
+
+    operations = [
+        migrations.RunPython(close_duplicate_open_sessions, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='worksession',
+            name='worksession_open_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='worksession',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['active', 'paused'])), fields=('user',), name='worksession_one_open_per_user'),
+        ),
+    ]
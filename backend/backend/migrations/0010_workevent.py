@@ -0,0 +1,60 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_events(apps, schema_editor):
+    """Журнал подій з уже наявних сесій та пауз: start, pause/resume кожної паузи, stop для завершених"""
+    WorkSession = apps.get_model('backend', 'WorkSession')
+    WorkEvent = apps.get_model('backend', 'WorkEvent')
+
+    events = []
+    sessions = WorkSession.objects.order_by('pk').prefetch_related('pauses')
+    for session in sessions.iterator(chunk_size=1000):
+        events.append(WorkEvent(user_id=session.user_id, session_id=session.pk, kind='start', ts=session.start_time))
+        for pause in sorted(session.pauses.all(), key=lambda pause: pause.pause_time):
+            events.append(WorkEvent(user_id=session.user_id, session_id=session.pk, kind='pause', ts=pause.pause_time))
+            if pause.resume_time:
+                events.append(
+                    WorkEvent(user_id=session.user_id, session_id=session.pk, kind='resume', ts=pause.resume_time)
+                )
+        if session.end_time:
+            events.append(WorkEvent(user_id=session.user_id, session_id=session.pk, kind='stop', ts=session.end_time))
+        if len(events) >= 5000:
+            WorkEvent.objects.bulk_create(events)
+            events = []
+    WorkEvent.objects.bulk_create(events)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0009_exportjob'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='worksession',
+            name='pause_time',
+        ),
+        migrations.RemoveField(
+            model_name='worksession',
+            name='resume_time',
+        ),
+        migrations.CreateModel(
+            name='WorkEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('start', 'Start'), ('pause', 'Pause'), ('resume', 'Resume'), ('stop', 'Stop')], max_length=10)),
+                ('ts', models.DateTimeField()),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='backend.worksession')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='work_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'ts'], name='workevent_user_ts_idx'), models.Index(fields=['session', 'ts'], name='workevent_session_ts_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_events, migrations.RunPython.noop),
+    ]
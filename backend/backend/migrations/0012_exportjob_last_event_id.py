@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0011_dataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='last_event_id',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
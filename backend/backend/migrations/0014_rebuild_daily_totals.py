@@ -0,0 +1,76 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+import pytz
+from django.db import migrations
+from django.utils.timezone import now
+
+# Логіку заморожено на момент міграції (без імпорту backend.intervals / backend.worktime),
+# щоб подальші зміни живого коду не змінювали результат міграції
+KYIV_TZ = pytz.timezone('Europe/Kyiv')
+WORK_KINDS = ('start', 'resume')
+
+
+def kyiv_day_parts(start, end):
+    """Частини інтервалу [start, end) по київських добах: (день, секунди); кінець опівночі – попередня доба"""
+    day = start.astimezone(KYIV_TZ).date()
+    while start < end:
+        midnight = KYIV_TZ.localize(datetime.combine(day + timedelta(days=1), time.min))
+        part_end = min(end, midnight)
+        yield day, (part_end - start).total_seconds()
+        start, day = part_end, day + timedelta(days=1)
+
+
+def work_intervals(events, at):
+    """
+    Інтервали роботи (session_id, user_id, початок, кінець) з подій, впорядкованих за (сесія, ts, id):
+    start/resume триває до наступної події сесії, остання – до at.
+    """
+    previous = None
+    for event in events:
+        if previous is not None and previous[2] in WORK_KINDS:
+            end = event[3] if event[0] == previous[0] else at
+            yield previous[0], previous[1], previous[3], end
+        previous = event
+    if previous is not None and previous[2] in WORK_KINDS:
+        yield previous[0], previous[1], previous[3], at
+
+
+def rebuild_daily_totals(apps, schema_editor):
+    """
+    Перебудовує DailyWorkTotal з журналу подій з розбиттям змін по київських добах
+    (0007 відносив усю зміну до дня її початку). Те саме робить команда rebuild_daily_totals.
+    """
+    WorkSession = apps.get_model('backend', 'WorkSession')
+    WorkEvent = apps.get_model('backend', 'WorkEvent')
+    DailyWorkTotal = apps.get_model('backend', 'DailyWorkTotal')
+
+    DailyWorkTotal.objects.all().delete()
+    events = (
+        WorkEvent.objects.filter(session__in=WorkSession.objects.filter(status='ended').values('pk'))
+        .order_by('session_id', 'ts', 'id')
+        .values_list('session_id', 'user_id', 'kind', 'ts')
+    )
+    seconds = defaultdict(float)
+    sessions = defaultdict(set)
+    for session_id, user_id, start, end in work_intervals(events.iterator(chunk_size=5000), now()):
+        for day, part in kyiv_day_parts(start, end):
+            seconds[user_id, day] += part
+            sessions[user_id, day].add(session_id)
+
+    DailyWorkTotal.objects.bulk_create([
+        DailyWorkTotal(user_id=user_id, date=day, net_seconds=max(int(total), 0),
+                       session_count=len(sessions[user_id, day]))
+        for (user_id, day), total in seconds.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0013_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_daily_totals, migrations.RunPython.noop),
+    ]
@@ -25,11 +25,24 @@ class WorkSession(models.Model):
 
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     start_time = models.DateTimeField()
-    pause_time = models.DateTimeField(null=True, blank=True)
-    resume_time = models.DateTimeField(null=True, blank=True)
     end_time = models.DateTimeField(null=True, blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active')
 
+    class Meta:
+        indexes = [
+            # Пошук поточної сесії користувача (StartWork/PauseWork/StopWork/ActiveSession)
+            models.Index(fields=['user', 'status'], name='worksession_user_status_idx'),
+            # Діапазони за місяць для звітів користувача та експорту
+            models.Index(fields=['user', 'start_time'], name='worksession_user_start_idx'),
+            models.Index(fields=['start_time'], name='worksession_start_idx'),
+        ]
+        constraints = [
+            # Не більше однієї незавершеної сесії на користувача (частковий унікальний індекс)
+            models.UniqueConstraint(
+                fields=['user'], condition=models.Q(status__in=['active', 'paused']), name='worksession_one_open_per_user'
+            ),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.status}"
 
@@ -38,8 +51,129 @@ class WorkPause(models.Model):
     pause_time = models.DateTimeField()
     resume_time = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['session', 'pause_time'], name='workpause_session_pause_idx'),
+            # Лише незавершені паузи
+            models.Index(fields=['session'], condition=models.Q(resume_time__isnull=True), name='workpause_open_idx'),
+        ]
+
     def duration(self):
         """Повертає тривалість паузи"""
         if self.resume_time:
             return self.resume_time - self.pause_time
-        return timedelta(0)  # Якщо пауза ще не завершена
\ No newline at end of file
+        return timedelta(0)  # Якщо пауза ще не завершена
+
+class WorkEvent(models.Model):
+    """
+    Журнал дій зі змінами (лише додавання): з нього відновлюються робочі інтервали.
+    WorkSession та WorkPause лишаються поточним станом для переходів, обмежень та адмінки.
+    """
+    KIND_CHOICES = [
+        ('start', 'Start'),
+        ('pause', 'Pause'),
+        ('resume', 'Resume'),
+        ('stop', 'Stop'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="work_events")
+    session = models.ForeignKey(WorkSession, on_delete=models.CASCADE, related_name="events")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    ts = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # Події користувача за період (діапазонне читання)
+            models.Index(fields=['user', 'ts'], name='workevent_user_ts_idx'),
+            # Події сесій звіту у порядку часу (LEAD по сесії)
+            models.Index(fields=['session', 'ts'], name='workevent_session_ts_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.kind} {self.ts}"
+
+class DailyWorkTotal(models.Model):
+    """Підсумок фактичного робочого часу працівника за день (лише завершені сесії)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_totals")
+    date = models.DateField()
+    net_seconds = models.PositiveIntegerField(default=0)
+    session_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='dailyworktotal_user_date_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.date}"
+
+class IdempotencyKey(models.Model):
+    """
+    Відповідь на запит з ключем ідемпотентності (Idempotency-Key, ключ події пакета).
+    Записується в тій самій транзакції, що й дія, тож повтор після перезапуску чи на іншому воркері
+    не виконає дію вдруге.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="idempotency_keys")
+    key = models.CharField(max_length=255)
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotencykey_user_key_uniq'),
+        ]
+        indexes = [
+            # Видалення ключів, старших за IDEMPOTENCY_TTL
+            models.Index(fields=['user', 'created_at'], name='idemkey_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.key}"
+
+class DataVersion(models.Model):
+    """
+    Версія робочих даних (id користувача або "all" для всіх разом) – ключ кешу звітів та Excel-експорту.
+    Зберігається в БД, тож зміна в одному процесі веб-сервера одразу видна всім іншим.
+    """
+    scope = models.CharField(max_length=32, primary_key=True)
+    version = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.scope} - {self.version}"
+
+class ExportJob(models.Model):
+    """Фонове формування Excel-звіту за період (черга в БД, виконується пулом потоків або run_export_jobs)"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="export_jobs")
+    date_from = models.DateField()
+    date_to = models.DateField()
+    # Версія даних на момент постановки; готовий файл повторно використовується лише з тією ж версією
+    data_version = models.BigIntegerField()
+    # Остання подія журналу в сесіях періоду: будь-яка нова дія або перезапис змін адміном її змінює
+    last_event_id = models.BigIntegerField(default=0)
+    # False, якщо в періоді є незавершені зміни – такий звіт залежить від часу формування
+    reusable = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    file_path = models.CharField(max_length=500, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Вибір наступного завдання з черги
+            models.Index(fields=['status', 'created_at'], name='exportjob_status_created_idx'),
+            # Пошук готового або вже поставленого звіту за той самий період
+            models.Index(fields=['date_from', 'date_to', 'data_version'], name='exportjob_params_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date_from} – {self.date_to} ({self.status})"
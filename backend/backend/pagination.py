@@ -0,0 +1,46 @@
+"""
+Keyset-пагінація змін за (start_time, id) від новіших до старіших.
+Курсор короткий (вміщується в callback_data Telegram, ліміт 64 байти): n|p + мікросекунди start_time + _ + id,
+де n – сторінка старіших записів після курсора, p – сторінка новіших перед ним.
+"""
+from datetime import datetime, timezone
+
+from django.db.models import Q
+
+
+def encode_cursor(direction, start_time, pk):
+    return f"{direction}{int(start_time.timestamp() * 1_000_000)}_{pk}"
+
+
+def decode_cursor(cursor):
+    """(напрямок, start_time, id); ValueError, якщо курсор пошкоджений"""
+    direction, value = cursor[:1], cursor[1:]
+    if direction not in ("n", "p"):
+        raise ValueError(cursor)
+    micros, pk = map(int, value.split("_"))
+    seconds, microsecond = divmod(micros, 1_000_000)
+    return direction, datetime.fromtimestamp(seconds, tz=timezone.utc).replace(microsecond=microsecond), pk
+
+
+def keyset_page(queryset, cursor=None, limit=20):
+    """
+    Сторінка queryset без OFFSET: читається limit + 1 рядок від курсора по індексу start_time.
+    Повертає (записи від новіших до старіших, курсор наступної сторінки, курсор попередньої).
+    """
+    direction, start_time, pk = decode_cursor(cursor) if cursor else ("n", None, None)
+
+    if direction == "n":
+        if start_time is not None:
+            queryset = queryset.filter(Q(start_time__lt=start_time) | Q(start_time=start_time, id__lt=pk))
+        rows = list(queryset.order_by("-start_time", "-id")[:limit + 1])
+        has_more, rows = len(rows) > limit, rows[:limit]
+        has_next, has_prev = has_more, start_time is not None
+    else:
+        queryset = queryset.filter(Q(start_time__gt=start_time) | Q(start_time=start_time, id__gt=pk))
+        rows = list(queryset.order_by("start_time", "id")[:limit + 1])
+        has_more, rows = len(rows) > limit, rows[:limit][::-1]
+        has_next, has_prev = True, has_more
+
+    next_cursor = encode_cursor("n", rows[-1].start_time, rows[-1].id) if rows and has_next else None
+    prev_cursor = encode_cursor("p", rows[0].start_time, rows[0].id) if rows and has_prev else None
+    return rows, next_cursor, prev_cursor
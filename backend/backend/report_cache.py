@@ -0,0 +1,81 @@
+"""
+Кеш звітів з умовними GET-запитами.
+Ключ звіту містить версію даних користувача (в БД), яка змінюється при кожному записі його сесій,
+тому застарілі записи просто перестають читатися і витісняються за таймаутом.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_etags, quote_etag
+from rest_framework.response import Response
+
+from .models import DataVersion
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def data_version(user_id):
+    """
+    Версія робочих даних користувача – час останньої зміни в мілісекундах (таблиця DataVersion,
+    спільна для всіх процесів). Якщо версії ще немає, вона створюється з поточним часом.
+    """
+    scope = str(user_id)
+    version = DataVersion.objects.filter(scope=scope).values_list("version", flat=True).first()
+    if version is None:
+        DataVersion.objects.bulk_create([DataVersion(scope=scope, version=_now_ms())], ignore_conflicts=True)
+        version = DataVersion.objects.filter(scope=scope).values_list("version", flat=True).get()
+    return version
+
+
+# Версія даних усіх користувачів разом (для звітів по всіх працівниках, напр. Excel-експорту)
+ALL_USERS = "all"
+
+
+def bump_data_version(*user_ids):
+    """Позначає дані користувачів зміненими – усі їхні закешовані звіти стають недійсними"""
+    scopes = [str(user_id) for user_id in {*user_ids, ALL_USERS}]
+    stamp = _now_ms()
+    DataVersion.objects.bulk_create([DataVersion(scope=scope, version=stamp) for scope in scopes], ignore_conflicts=True)
+    # Версія лише зростає, навіть якщо дві зміни припали на одну мілісекунду
+    DataVersion.objects.filter(scope__in=scopes).update(version=Greatest(Value(stamp), F("version") + 1))
+
+
+def _etag(payload):
+    body = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode()
+    return quote_etag(hashlib.md5(body).hexdigest())
+
+
+def cached_report(request, name, user_id, params, build):
+    """
+    Відповідь звітного view через кеш.
+    build() повертає (payload, cacheable); payload з незавершеними сесіями (cacheable=False)
+    залежить від поточного часу, тому не кешується і віддається без валідаторів.
+    Якщо ETag з If-None-Match збігається – 304 без тіла.
+    """
+    version = data_version(user_id)
+    key = f"report:{name}:{user_id}:{':'.join(map(str, params))}:{version}"
+
+    entry = cache.get(key)
+    if entry is None:
+        payload, cacheable = build()
+        if not cacheable:
+            return Response(payload)
+        entry = {"payload": payload, "etag": _etag(payload)}
+        cache.set(key, entry, settings.REPORT_CACHE_TIMEOUT)
+
+    if entry["etag"] in parse_etags(request.headers.get("If-None-Match", "")):
+        response = Response(status=304)
+    else:
+        response = Response(entry["payload"])
+    response["ETag"] = entry["etag"]
+    response["Last-Modified"] = http_date(version / 1000)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
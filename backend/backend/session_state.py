@@ -0,0 +1,241 @@
+"""
+Переходи стану робочої сесії: start → (pause ⇄ resume)* → stop.
+Кожен перехід виконується в одній транзакції з блокуванням рядка сесії (select_for_update),
+а унікальне обмеження worksession_one_open_per_user не дає створити дві відкриті сесії.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max
+from django.utils.timezone import now
+
+from .models import WorkEvent, WorkPause, WorkSession
+from .report_cache import bump_data_version
+from .worktime import (
+    OPEN_STATUSES, kyiv_tz, last_resume_subquery, open_pause_start_subquery, refresh_daily_totals, session_days,
+)
+
+
+class TransitionError(Exception):
+    """Перехід неможливий у поточному стані сесії (повідомлення показується користувачу)"""
+
+
+ALREADY_OPEN = "❌ У вас вже є активна зміна! Використовуйте /pause_work для перерви або /stop_work для завершення."
+NOT_ACTIVE = "❌ Ви ще не почали роботу! Використовуйте /start_work."
+NOT_PAUSED = "❌ Ваша зміна не була поставлена на паузу!"
+NOT_OPEN = "❌ Ви ще не почали зміну! Використовуйте /start_work."
+BEFORE_START = "❌ Час дії раніший за початок зміни."
+OUT_OF_ORDER = "❌ Час дії раніший за попередню дію зі зміною."
+
+
+def _locked_session(user, statuses):
+    return WorkSession.objects.select_for_update().filter(user=user, status__in=statuses).first()
+
+
+def _last_event_time(user):
+    return WorkEvent.objects.filter(user=user).aggregate(last=Max("ts"))["last"]
+
+
+def _action_time(user, session, at):
+    """
+    Час дії: at клієнта (черга бота) або поточний. Журнал подій має лишатися впорядкованим за часом,
+    тож дія клієнта не може бути раніше за початок зміни та за останню подію користувача,
+    а поточний час не буває раніше за подію, яку клієнт з годинником, що поспішає, надіслав перед тим.
+    """
+    last = _last_event_time(user)
+    if at is None:
+        current = now().astimezone(kyiv_tz)
+        return max(current, last) if last else current
+    if session is not None and at < session.start_time:
+        raise TransitionError(BEFORE_START)
+    if last is not None and at < last:
+        raise TransitionError(OUT_OF_ORDER)
+    return at
+
+
+def _event(session, kind, ts):
+    return WorkEvent(user_id=session.user_id, session=session, kind=kind, ts=ts)
+
+
+def _changed(user):
+    # Версію даних змінюємо лише після коміту, щоб паралельний запит не закешував старий стан під новою версією
+    transaction.on_commit(lambda: bump_data_version(user.id))
+
+
+def start_session(user, at=None):
+    """Створює нову активну сесію; другу відкриту сесію відхиляє сама БД"""
+    at = _action_time(user, None, at)
+    try:
+        with transaction.atomic():
+            session = WorkSession.objects.create(user=user, start_time=at, status="active")
+            _event(session, "start", session.start_time).save()
+            _changed(user)
+            return session
+    except IntegrityError:
+        raise TransitionError(ALREADY_OPEN)
+
+
+@transaction.atomic
+def pause_session(user, at=None):
+    session = _locked_session(user, ["active"])
+    if not session:
+        raise TransitionError(NOT_ACTIVE)
+    at = _action_time(user, session, at)
+    WorkPause.objects.create(session=session, pause_time=at)
+    _event(session, "pause", at).save()
+    WorkSession.objects.filter(pk=session.pk).update(status="paused")
+    session.status = "paused"
+    _changed(user)
+    return session
+
+
+@transaction.atomic
+def resume_session(user, at=None):
+    session = _locked_session(user, ["paused"])
+    if not session:
+        raise TransitionError(NOT_PAUSED)
+    at = _action_time(user, session, at)
+    WorkPause.objects.filter(session=session, resume_time__isnull=True).update(resume_time=at)
+    _event(session, "resume", at).save()
+    WorkSession.objects.filter(pk=session.pk).update(status="active")
+    session.status = "active"
+    _changed(user)
+    return session
+
+
+@transaction.atomic
+def stop_session(user, at=None):
+    session = _locked_session(user, OPEN_STATUSES)
+    if not session:
+        raise TransitionError(NOT_OPEN)
+    session.end_time = _action_time(user, session, at)
+    session.status = "ended"
+    WorkSession.objects.filter(pk=session.pk).update(end_time=session.end_time, status="ended")
+    _event(session, "stop", session.end_time).save()
+    refresh_daily_totals(session_days(session))
+    _changed(user)
+    return session
+
+
+def _event_error(session, action, at, last_at):
+    """Текст помилки, якщо подія недопустима в змодельованому стані користувача, інакше None"""
+    if action == "start":
+        if session is not None:
+            return ALREADY_OPEN
+    elif session is None:
+        return NOT_OPEN if action == "stop" else NOT_ACTIVE
+    elif action == "pause" and session.status != "active":
+        return NOT_ACTIVE
+    elif action == "resume" and session.status != "paused":
+        return NOT_PAUSED
+    if last_at is not None and at < last_at:
+        return OUT_OF_ORDER
+    return None
+
+
+@transaction.atomic
+def apply_events(events):
+    """
+    Застосовує впорядковані події (user_id, action, at) однією транзакцією.
+    Стан кожного користувача моделюється в пам'яті за тими самими правилами, що й окремі переходи;
+    недопустима подія пропускається, решта застосовується. Запис – bulk_create/bulk_update,
+    тож кількість запитів не залежить від кількості подій.
+    Повертає у порядку подій (сесія, її статус після події, None) або (None, None, текст помилки).
+    """
+    user_ids = {user_id for user_id, _, _ in events}
+    current = {
+        session.user_id: session
+        for session in WorkSession.objects.select_for_update().filter(user_id__in=user_ids, status__in=OPEN_STATUSES)
+    }
+    pauses = {
+        pause.session.user_id: pause
+        for pause in WorkPause.objects.select_related("session").filter(
+            session__in=list(current.values()), resume_time__isnull=True
+        )
+    }
+    # Нова подія не може бути раніше за останню подію користувача в журналі (як і окремий перехід)
+    last_at = dict(
+        WorkEvent.objects.filter(user_id__in=user_ids).values("user_id").annotate(last=Max("ts"))
+        .values_list("user_id", "last")
+    )
+
+    new_sessions, new_pauses, new_events, changed_sessions, changed_pauses, touched = [], [], [], {}, {}, []
+    results = []
+    for user_id, action, at in events:
+        session = current.get(user_id)
+        error = _event_error(session, action, at, last_at.get(user_id))
+        if error:
+            results.append((None, None, error))
+            continue
+
+        if action == "start":
+            session = WorkSession(user_id=user_id, start_time=at, status="active")
+            new_sessions.append(session)
+            current[user_id] = session
+        elif action == "pause":
+            pause = WorkPause(session=session, pause_time=at)
+            new_pauses.append(pause)
+            pauses[user_id] = pause
+            session.status = "paused"
+        elif action == "resume":
+            pause = pauses.pop(user_id, None)
+            if pause is not None:
+                pause.resume_time = at
+                if pause.pk:
+                    changed_pauses[pause.pk] = pause
+            session.status = "active"
+        else:
+            session.end_time, session.status = at, "ended"
+            current[user_id] = None
+            touched.append(session)
+
+        if session.pk:
+            changed_sessions[session.pk] = session
+        new_events.append(_event(session, action, at))
+        last_at[user_id] = at
+        results.append((session, session.status, None))
+
+    # Спершу завершуємо наявні зміни, щоб нові відкриті не порушили worksession_one_open_per_user
+    WorkSession.objects.bulk_update(list(changed_sessions.values()), ["status", "end_time"])
+    WorkSession.objects.bulk_create(new_sessions)
+    WorkPause.objects.bulk_update(list(changed_pauses.values()), ["resume_time"])
+    WorkPause.objects.bulk_create(new_pauses)
+    WorkEvent.objects.bulk_create(new_events)
+    refresh_daily_totals([pair for session in touched for pair in session_days(session)])
+
+    changed_users = {session.user_id for session, _, _ in results if session is not None}
+    if changed_users:
+        transaction.on_commit(lambda: bump_data_version(*changed_users))
+    return results
+
+
+@transaction.atomic
+def close_sessions(session_ids, max_duration, at=None):
+    """
+    Автоматичне завершення забутих змін; кількість запитів не залежить від кількості сесій.
+    Зміна на паузі завершується в момент початку паузи, активна – через max_duration після початку
+    (не раніше останнього відновлення після паузи і не пізніше за at). Повертає завершені сесії з user.
+    """
+    at = at or now()
+    sessions = list(
+        WorkSession.objects.select_for_update(of=("self",)).select_related("user")
+        .filter(pk__in=session_ids, status__in=OPEN_STATUSES)
+        .annotate(paused_since=open_pause_start_subquery(), last_resume=last_resume_subquery())
+    )
+    if not sessions:
+        return []
+
+    for session in sessions:
+        if session.status == "paused" and session.paused_since:
+            session.end_time = session.paused_since
+        else:
+            session.end_time = min(at, max(session.start_time + max_duration, session.last_resume or session.start_time))
+        session.status = "ended"
+
+    WorkSession.objects.bulk_update(sessions, ["end_time", "status"])
+    # Незавершена пауза закінчується разом зі зміною (нульова тривалість – вона і є кінцем зміни)
+    WorkPause.objects.filter(session__in=sessions, resume_time__isnull=True).update(resume_time=F("pause_time"))
+    WorkEvent.objects.bulk_create([_event(session, "stop", session.end_time) for session in sessions])
+    refresh_daily_totals([pair for session in sessions for pair in session_days(session)])
+
+    user_ids = {session.user_id for session in sessions}
+    transaction.on_commit(lambda: bump_data_version(*user_ids))
+    return sessions
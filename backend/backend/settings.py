@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 # -------------------------------
 # 1️⃣ Базові налаштування
@@ -48,6 +49,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "backend.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -82,7 +84,10 @@ WSGI_APPLICATION = "backend.wsgi.application"
 # -------------------------------
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-if DATABASE_URL:
+if DATABASE_URL and DATABASE_URL.startswith("sqlite"):
+    # Локальний SQLite (наприклад, для бенчмарків: DATABASE_URL=sqlite:///bench.sqlite3)
+    DATABASES = {"default": dj_database_url.parse(DATABASE_URL)}
+elif DATABASE_URL:
     DATABASES = {
         "default": dj_database_url.config(
             default=DATABASE_URL, engine="django.db.backends.postgresql"
@@ -100,6 +105,53 @@ else:
         }
     }
 
+# Кеш звітів, спільний для всіх воркерів: CACHE_URL=redis://...
+# Без CACHE_URL – кеш у пам'яті кожного процесу (версії даних у БД, тож застарілих звітів не буде,
+# але кожен воркер рахує звіт окремо)
+CACHE_URL = os.getenv("CACHE_URL") or "locmem://"
+if CACHE_URL.startswith(("redis://", "rediss://")):
+    CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_URL},
+    }
+elif CACHE_URL == "locmem://":
+    CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "worktime-reports"},
+    }
+else:
+    raise ImproperlyConfigured("CACHE_URL має бути redis://... (спільний кеш) або locmem:// (кеш процесу).")
+
+# Скільки секунд зберігати закешований звіт (версія даних користувача все одно інвалідує його при змінах)
+REPORT_CACHE_TIMEOUT = int(os.getenv("REPORT_CACHE_TIMEOUT", str(24 * 3600)))
+
+# Скільки секунд пам'ятати відповіді на запити з ключем ідемпотентності (таблиця IdempotencyKey;
+# черга бота може повторювати довго)
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", str(7 * 24 * 3600)))
+
+# Максимальна кількість подій в одному запиті /api/events/batch/
+EVENT_BATCH_LIMIT = int(os.getenv("EVENT_BATCH_LIMIT", "5000"))
+
+# Фонове формування Excel-звітів: каталог файлів, потоки у процесі веб-сервера (0 – лише команда
+# run_export_jobs), максимум завдань у черзі до відповіді 429 та скільки днів зберігати готові файли
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join(BASE_DIR, "exports"))
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "1"))
+EXPORT_QUEUE_LIMIT = int(os.getenv("EXPORT_QUEUE_LIMIT", "10"))
+EXPORT_RESULT_DAYS = int(os.getenv("EXPORT_RESULT_DAYS", "7"))
+# Через скільки хвилин завдання в роботі вважається покинутим і повертається в чергу
+EXPORT_STALE_MINUTES = int(os.getenv("EXPORT_STALE_MINUTES", "15"))
+
+# Метрики (/metrics): якщо задано, доступ лише з Authorization: Bearer <METRICS_TOKEN>
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Структурований лог запитів (backend.requests) – один JSON-рядок на запит у stdout
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "backend": {"handlers": ["console"], "level": os.getenv("LOG_LEVEL", "INFO")},
+    },
+}
+
 # -------------------------------
 # 5️⃣ Аутентифікація та REST Framework
 # -------------------------------
@@ -112,9 +164,13 @@ AUTH_PASSWORD_VALIDATORS = [
 
 AUTH_USER_MODEL = "backend.User"
 
+# Кеш token → користувач у процесі: час життя запису (секунди) та максимальна кількість токенів
+AUTH_TOKEN_CACHE_TTL = int(os.getenv("AUTH_TOKEN_CACHE_TTL", "300"))
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework.authentication.TokenAuthentication",
+        "backend.authentication.CachedTokenAuthentication",
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     )
 }
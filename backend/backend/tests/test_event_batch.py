@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from backend.models import User, WorkEvent, WorkSession
+from backend.session_state import OUT_OF_ORDER, pause_session, resume_session, start_session
+from backend.worktime import kyiv_tz
+
+from .test_session_state import kyiv
+
+
+class EventBatchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="worker", telegram_id=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.day = (now().astimezone(kyiv_tz) - timedelta(days=3)).date()
+
+    def post(self, *events):
+        return self.client.post("/api/events/batch/", {"events": [
+            {"action": action, "at": kyiv(self.day, hour, minute).isoformat(), "key": f"{action}:{hour}:{minute}"}
+            for action, hour, minute in events
+        ]}, format="json")
+
+    def assertEventsOrdered(self):
+        events = list(WorkEvent.objects.order_by("ts", "id").values_list("kind", flat=True))
+        self.assertEqual(events, list(WorkEvent.objects.order_by("id").values_list("kind", flat=True)))
+
+    def test_batch_is_applied_in_order(self):
+        response = self.post(("start", 9, 0), ("pause", 12, 0), ("resume", 12, 30), ("stop", 18, 0))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result["ok"] for result in response.data["results"]], [True] * 4)
+        self.assertEqual(response.data["results"][-1]["status"], "ended")
+        self.assertEqual(WorkSession.objects.get().status, "ended")
+        self.assertEventsOrdered()
+
+    def test_out_of_order_events_in_batch_are_rejected(self):
+        response = self.post(("start", 9, 0), ("pause", 12, 0), ("resume", 11, 0), ("stop", 10, 0))
+
+        results = response.data["results"]
+        self.assertEqual([result["ok"] for result in results], [True, True, False, False])
+        self.assertEqual(results[2]["error"], OUT_OF_ORDER)
+        self.assertEqual(WorkSession.objects.get().status, "paused")
+        self.assertEventsOrdered()
+
+    def test_older_batch_after_newer_single_action_is_rejected(self):
+        start_session(self.user, kyiv(self.day, 9))
+        pause_session(self.user, kyiv(self.day, 10))
+        resume_session(self.user, kyiv(self.day, 11))
+
+        response = self.post(("pause", 10, 30), ("stop", 10, 45))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result["error"] for result in response.data["results"]], [OUT_OF_ORDER] * 2)
+        self.assertEqual(WorkSession.objects.get().status, "active")
+        self.assertEqual(WorkEvent.objects.count(), 3)
+
+    def test_replayed_key_returns_stored_result(self):
+        self.post(("start", 9, 0))
+        response = self.post(("start", 9, 0))
+
+        self.assertTrue(response.data["results"][0]["replayed"])
+        self.assertEqual(WorkSession.objects.count(), 1)
+
+    def test_malformed_batch_is_rejected(self):
+        response = self.client.post("/api/events/batch/", {"events": []}, format="json")
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+
+from backend import export_jobs
+from backend.export_jobs import QueueFull, submit_export
+from backend.models import ExportJob
+from backend.report_cache import ALL_USERS, data_version
+
+
+@override_settings(EXPORT_WORKERS=1, EXPORT_QUEUE_LIMIT=1, EXPORT_STALE_MINUTES=15)
+class SubmitExportTests(TestCase):
+    def setUp(self):
+        self.period = (date(2026, 3, 1), date(2026, 3, 31))
+        executor = mock.Mock()
+        patcher = mock.patch.object(export_jobs, "_get_executor", return_value=executor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.submit = executor.submit
+
+    def make_job(self, **fields):
+        fields = {"date_from": self.period[0], "date_to": self.period[1], **fields}
+        return ExportJob.objects.create(data_version=data_version(ALL_USERS), **fields)
+
+    def test_abandoned_running_job_is_requeued_and_worked(self):
+        job = self.make_job(status="running", started_at=now() - timedelta(hours=1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            returned = submit_export(*self.period)
+
+        self.assertEqual(returned.pk, job.pk)
+        self.assertEqual(ExportJob.objects.get(pk=job.pk).status, "queued")
+        self.submit.assert_called_once_with(export_jobs._work)
+
+    def test_existing_queued_job_starts_worker(self):
+        job = self.make_job()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            returned = submit_export(*self.period)
+
+        self.assertEqual(returned.pk, job.pk)
+        self.submit.assert_called_once_with(export_jobs._work)
+
+    def test_full_queue_starts_worker(self):
+        self.make_job(date_from=date(2026, 2, 1))
+
+        with self.captureOnCommitCallbacks(execute=True), self.assertRaises(QueueFull):
+            submit_export(*self.period)
+
+        self.submit.assert_called_once_with(export_jobs._work)
@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from backend.models import DailyWorkTotal, IdempotencyKey, User, WorkSession
+from backend.worktime import kyiv_tz
+
+from .test_session_state import kyiv
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="worker", telegram_id=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.day = (now().astimezone(kyiv_tz) - timedelta(days=3)).date()
+
+    def test_keyed_start_is_replayed(self):
+        first = self.client.post("/api/start_work/", HTTP_IDEMPOTENCY_KEY="update-1")
+        cache.clear()
+        second = self.client.post("/api/start_work/", HTTP_IDEMPOTENCY_KEY="update-1")
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(second.data["session_id"], first.data["session_id"])
+        self.assertEqual(WorkSession.objects.count(), 1)
+
+    def test_replayed_batch_does_not_duplicate_work(self):
+        events = {"events": [
+            {"action": action, "at": kyiv(self.day, hour).isoformat(), "key": f"{action}:{hour}"}
+            for action, hour in [("start", 9), ("pause", 12), ("resume", 13), ("stop", 18)]
+        ]}
+        self.client.post("/api/events/batch/", events, format="json")
+        cache.clear()
+        response = self.client.post("/api/events/batch/", events, format="json")
+
+        self.assertTrue(all(result["replayed"] for result in response.data["results"]))
+        self.assertEqual(WorkSession.objects.count(), 1)
+        self.assertEqual(DailyWorkTotal.objects.get().net_seconds, 8 * 3600)
+
+    def test_expired_key_runs_again(self):
+        self.client.post("/api/start_work/", HTTP_IDEMPOTENCY_KEY="update-1")
+        self.client.post("/api/stop_work/")
+        IdempotencyKey.objects.update(created_at=now() - timedelta(days=30))
+
+        response = self.client.post("/api/start_work/", HTTP_IDEMPOTENCY_KEY="update-1")
+
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(WorkSession.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_keys_are_scoped_to_user(self):
+        other = APIClient()
+        other.force_authenticate(User.objects.create(username="other", telegram_id=2))
+
+        self.client.post("/api/start_work/", HTTP_IDEMPOTENCY_KEY="same")
+        other.post("/api/start_work/", HTTP_IDEMPOTENCY_KEY="same")
+
+        self.assertEqual(WorkSession.objects.count(), 2)
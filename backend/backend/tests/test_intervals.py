@@ -0,0 +1,104 @@
+from datetime import date, timedelta
+from importlib import import_module
+
+import numpy as np
+from django.apps import apps
+from django.test import TestCase
+
+from backend.intervals import day_bounds, day_parts, split_by_day, work_intervals
+from backend.models import DailyWorkTotal, User
+from backend.session_state import pause_session, resume_session, start_session, stop_session
+from backend.worktime import rebuild_daily_totals, rolled_up_daily_totals
+
+from .test_session_state import kyiv
+
+HOUR = 3600
+
+
+class SplitByDayTests(TestCase):
+    def test_interval_ending_at_midnight_stays_in_its_day(self):
+        days, bounds = day_bounds(date(2026, 3, 1), date(2026, 3, 2))
+        index, day, start, end = split_by_day(np.array([bounds[0] + 20 * HOUR]), np.array([bounds[1]]), bounds)
+
+        self.assertEqual(list(day), [0])
+        self.assertEqual(list(end - start), [4 * HOUR])
+
+    def test_multi_day_interval_gets_full_middle_days(self):
+        days, bounds = day_bounds(date(2026, 3, 1), date(2026, 3, 4))
+        index, day, start, end = split_by_day(np.array([bounds[0] + 22 * HOUR]), np.array([bounds[3] + HOUR]), bounds)
+
+        self.assertEqual(sorted(zip(day, end - start)), [(0, 2 * HOUR), (1, 24 * HOUR), (2, 24 * HOUR), (3, HOUR)])
+
+    def test_dst_days_are_23_and_25_hours(self):
+        _, spring = day_bounds(date(2026, 3, 29), date(2026, 3, 29))
+        _, autumn = day_bounds(date(2026, 10, 25), date(2026, 10, 25))
+
+        self.assertEqual(spring[1] - spring[0], 23 * HOUR)
+        self.assertEqual(autumn[1] - autumn[0], 25 * HOUR)
+
+
+class DayPartsTests(TestCase):
+    """Сесії з журналу подій розбиваються на київські доби"""
+
+    def setUp(self):
+        self.user = User.objects.create(username="worker", telegram_id=1)
+
+    def shift(self, start, end, pauses=()):
+        start_session(self.user, start)
+        for pause_at, resume_at in pauses:
+            pause_session(self.user, pause_at)
+            resume_session(self.user, resume_at)
+        return stop_session(self.user, end)
+
+    def parts(self, session, date_from=None, date_to=None):
+        parts = day_parts(work_intervals([session.pk]), date_from, date_to)
+        return dict(zip(parts["day"], parts["seconds"]))
+
+    def test_night_shift_is_split_at_midnight(self):
+        session = self.shift(kyiv(date(2026, 3, 10), 22), kyiv(date(2026, 3, 11), 6),
+                             [(kyiv(date(2026, 3, 11), 1), kyiv(date(2026, 3, 11), 1, 30))])
+
+        self.assertEqual(self.parts(session), {date(2026, 3, 10): 2 * HOUR, date(2026, 3, 11): 5.5 * HOUR})
+
+    def test_spring_forward_night_loses_an_hour(self):
+        session = self.shift(kyiv(date(2026, 3, 28), 22), kyiv(date(2026, 3, 29), 7))
+
+        self.assertEqual(self.parts(session), {date(2026, 3, 28): 2 * HOUR, date(2026, 3, 29): 6 * HOUR})
+
+    def test_fall_back_day_is_25_hours(self):
+        session = self.shift(kyiv(date(2026, 10, 25), 0), kyiv(date(2026, 10, 26), 0))
+
+        self.assertEqual(self.parts(session), {date(2026, 10, 25): 25 * HOUR})
+
+    def test_month_boundary_only_counts_days_in_period(self):
+        session = self.shift(kyiv(date(2026, 1, 31), 20), kyiv(date(2026, 2, 1), 4))
+
+        self.assertEqual(self.parts(session, date(2026, 1, 1), date(2026, 1, 31)), {date(2026, 1, 31): 4 * HOUR})
+        self.assertEqual(self.parts(session, date(2026, 2, 1), date(2026, 2, 28)), {date(2026, 2, 1): 4 * HOUR})
+
+    def test_rollup_matches_rebuild(self):
+        self.shift(kyiv(date(2026, 3, 28), 22), kyiv(date(2026, 3, 29), 7))
+        self.shift(kyiv(date(2026, 3, 29), 15), kyiv(date(2026, 3, 29), 20))
+        rolled_up = list(DailyWorkTotal.objects.order_by("date").values_list("date", "net_seconds", "session_count"))
+
+        rebuild_daily_totals()
+
+        rebuilt = list(DailyWorkTotal.objects.order_by("date").values_list("date", "net_seconds", "session_count"))
+        self.assertEqual(rolled_up, rebuilt)
+        self.assertEqual(rebuilt, [(date(2026, 3, 28), 2 * HOUR, 1), (date(2026, 3, 29), 11 * HOUR, 2)])
+        totals = rolled_up_daily_totals(date(2026, 3, 1), date(2026, 3, 31), user_id=self.user.id)
+        self.assertEqual(totals[(self.user.id, date(2026, 3, 29))], timedelta(hours=11))
+
+    def test_data_migration_matches_rebuild(self):
+        self.shift(kyiv(date(2026, 3, 10), 22), kyiv(date(2026, 3, 11), 6),
+                   [(kyiv(date(2026, 3, 11), 1), kyiv(date(2026, 3, 11), 1, 30))])
+        self.shift(kyiv(date(2026, 3, 28), 22), kyiv(date(2026, 3, 29), 7))
+        self.shift(kyiv(date(2026, 10, 25), 0), kyiv(date(2026, 10, 26), 0))
+        rebuild_daily_totals()
+        rebuilt = list(DailyWorkTotal.objects.order_by("date").values_list("date", "net_seconds", "session_count"))
+
+        import_module("backend.migrations.0014_rebuild_daily_totals").rebuild_daily_totals(apps, None)
+
+        migrated = list(DailyWorkTotal.objects.order_by("date").values_list("date", "net_seconds", "session_count"))
+        self.assertEqual(migrated, rebuilt)
+        self.assertEqual(migrated[:2], [(date(2026, 3, 10), 2 * HOUR, 1), (date(2026, 3, 11), 5.5 * HOUR, 1)])
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+from django.test import TestCase
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from backend.models import User, WorkEvent, WorkSession
+from backend.session_state import (
+    BEFORE_START, OUT_OF_ORDER, TransitionError, pause_session, resume_session, start_session, stop_session,
+)
+from backend.worktime import kyiv_tz
+
+
+def kyiv(day, hour, minute=0):
+    return kyiv_tz.localize(datetime.combine(day, datetime.min.time()) + timedelta(hours=hour, minutes=minute))
+
+
+class ActionTimeTests(TestCase):
+    """Дії з часом клієнта не можуть порушити порядок журналу подій"""
+
+    def setUp(self):
+        self.user = User.objects.create(username="worker", telegram_id=1)
+        self.day = (now().astimezone(kyiv_tz) - timedelta(days=3)).date()
+
+    def test_transitions_write_events_in_order(self):
+        start_session(self.user, kyiv(self.day, 9))
+        pause_session(self.user, kyiv(self.day, 10))
+        resume_session(self.user, kyiv(self.day, 11))
+        session = stop_session(self.user, kyiv(self.day, 17))
+
+        kinds = list(WorkEvent.objects.filter(session=session).order_by("ts").values_list("kind", flat=True))
+        self.assertEqual(kinds, ["start", "pause", "resume", "stop"])
+
+    def test_action_before_last_event_is_rejected(self):
+        start_session(self.user, kyiv(self.day, 9))
+        pause_session(self.user, kyiv(self.day, 10))
+        resume_session(self.user, kyiv(self.day, 11))
+
+        with self.assertRaisesMessage(TransitionError, OUT_OF_ORDER):
+            pause_session(self.user, kyiv(self.day, 10, 30))
+        with self.assertRaisesMessage(TransitionError, OUT_OF_ORDER):
+            stop_session(self.user, kyiv(self.day, 10, 15))
+        self.assertEqual(WorkSession.objects.get().status, "active")
+        self.assertEqual(WorkEvent.objects.count(), 3)
+
+    def test_action_before_start_is_rejected(self):
+        start_session(self.user, kyiv(self.day, 9))
+        with self.assertRaisesMessage(TransitionError, BEFORE_START):
+            stop_session(self.user, kyiv(self.day, 8))
+
+    def test_start_before_previous_session_end_is_rejected(self):
+        start_session(self.user, kyiv(self.day, 9))
+        stop_session(self.user, kyiv(self.day, 17))
+
+        with self.assertRaisesMessage(TransitionError, OUT_OF_ORDER):
+            start_session(self.user, kyiv(self.day, 9))
+        self.assertEqual(WorkSession.objects.count(), 1)
+
+    def test_server_time_does_not_precede_client_event(self):
+        ahead = now() + timedelta(minutes=3)
+        start_session(self.user, ahead)
+        session = stop_session(self.user)
+        self.assertEqual(session.end_time, ahead)
+
+
+class SessionActionApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="worker", telegram_id=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.day = (now().astimezone(kyiv_tz) - timedelta(days=3)).date()
+
+    def post(self, action, hour, minute=0):
+        return self.client.post("/api/actions/", {
+            "action": action, "at": kyiv(self.day, hour, minute).isoformat(), "key": f"{action}:{hour}:{minute}",
+        }, format="json")
+
+    def test_out_of_order_actions_return_400(self):
+        self.assertEqual(self.post("start", 9).status_code, 200)
+        self.assertEqual(self.post("pause", 10).status_code, 200)
+        self.assertEqual(self.post("resume", 11).status_code, 200)
+
+        response = self.post("pause", 10, 30)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["error"], OUT_OF_ORDER)
+        self.assertEqual(self.post("stop", 10, 15).status_code, 400)
+        self.assertEqual(WorkSession.objects.get().status, "active")
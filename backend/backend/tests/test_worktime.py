@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils.timezone import now
+
+from backend.intervals import work_intervals
+from backend.models import User, WorkEvent, WorkSession
+from backend.session_state import pause_session, resume_session, start_session, stop_session
+from backend.worktime import annotate_work_time, kyiv_tz, rebuild_session_events
+
+from .test_session_state import kyiv
+
+
+class WorkIntervalsTests(TestCase):
+    """Робочі інтервали з журналу подій (LEAD) та підзапити для списку сесій мають збігатися"""
+
+    def setUp(self):
+        self.user = User.objects.create(username="worker", telegram_id=1)
+        self.day = (now().astimezone(kyiv_tz) - timedelta(days=3)).date()
+
+    def work_seconds(self, session, at=None):
+        intervals = work_intervals([session.pk], at=at)
+        return float((intervals["end"] - intervals["start"]).sum())
+
+    def annotated_seconds(self, session):
+        return annotate_work_time(WorkSession.objects.filter(pk=session.pk)).get().work_duration.total_seconds()
+
+    def test_intervals_exclude_pauses(self):
+        start_session(self.user, kyiv(self.day, 9))
+        pause_session(self.user, kyiv(self.day, 12))
+        resume_session(self.user, kyiv(self.day, 12, 45))
+        session = stop_session(self.user, kyiv(self.day, 18))
+
+        intervals = work_intervals([session.pk])
+        self.assertEqual(len(intervals), 2)
+        self.assertFalse(intervals["open"].any())
+        self.assertEqual(self.work_seconds(session), 8.25 * 3600)
+        self.assertEqual(self.annotated_seconds(session), 8.25 * 3600)
+
+    def test_running_pause_is_not_work(self):
+        start = now() - timedelta(hours=3)
+        start_session(self.user, start)
+        session = pause_session(self.user, start + timedelta(hours=1))
+
+        intervals = work_intervals([session.pk])
+        self.assertTrue(intervals["open"].all())
+        self.assertEqual(self.work_seconds(session), 3600)
+        self.assertAlmostEqual(self.annotated_seconds(session), 3600, delta=1)
+
+    def test_active_session_runs_until_now(self):
+        start_session(self.user, now() - timedelta(hours=2))
+        session = WorkSession.objects.get()
+
+        self.assertAlmostEqual(self.work_seconds(session), 2 * 3600, delta=5)
+        self.assertAlmostEqual(self.annotated_seconds(session), 2 * 3600, delta=5)
+
+    def test_rebuilt_events_match_live_log(self):
+        start_session(self.user, kyiv(self.day, 9))
+        pause_session(self.user, kyiv(self.day, 13))
+        resume_session(self.user, kyiv(self.day, 14))
+        session = stop_session(self.user, kyiv(self.day, 17))
+        live = list(WorkEvent.objects.order_by("ts").values_list("kind", "ts"))
+
+        rebuild_session_events([session.pk])
+
+        self.assertEqual(list(WorkEvent.objects.order_by("ts").values_list("kind", "ts")), live)
+        self.assertEqual(self.work_seconds(session), 7 * 3600)
@@ -1,8 +1,9 @@
 from django.contrib import admin
 from django.http import JsonResponse
-from django.urls import path, get_resolver
+from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import StartWork, PauseWork, ResumeWork, StopWork, MyHours, TelegramAuth, AdminReport, AvailableWorkers, AvailableYears, AvailableMonths, MonthlyReport, ActiveSession, ExportExcelReport
+from .metrics import metrics_view
+from .views import StartWork, PauseWork, ResumeWork, StopWork, SessionAction, EventBatch, MyHours, TelegramAuth, AdminReport, AdminSessions, OpenSessions, CloseSessions, AvailableWorkers, AvailableYears, AvailableMonths, MonthlyReport, ActiveSession, MyState, ExportExcelReport, ExportJobs, ExportJobDetail, ExportJobDownload
 
 def home(request):
     return JsonResponse({"message": "API is working!"})
@@ -10,23 +11,30 @@ def home(request):
 urlpatterns = [
     path("", home, name="home"),  # Головна сторінка
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),
     path("api/start_work/", StartWork.as_view(), name="start_work"),
     path("api/pause_work/", PauseWork.as_view(), name="pause_work"),
     path("api/resume_work/", ResumeWork.as_view(), name="resume_work"),
     path("api/stop_work/", StopWork.as_view(), name="stop_work"),
+    path("api/actions/", SessionAction.as_view(), name="session_action"),
+    path("api/events/batch/", EventBatch.as_view(), name="event_batch"),
     path("api/my_hours/", MyHours.as_view(), name="my_hours"),
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("api/auth/", TelegramAuth.as_view(), name="telegram_auth"),
     path("api/admin/report/", AdminReport.as_view(), name="admin_report"),
+    path("api/admin/sessions/", AdminSessions.as_view(), name="admin_sessions"),
+    path("api/admin/open_sessions/", OpenSessions.as_view(), name="open_sessions"),
+    path("api/admin/sessions/close/", CloseSessions.as_view(), name="close_sessions"),
     path("api/admin/workers/", AvailableWorkers.as_view(), name="available_workers"),
     path("api/admin/years/<int:user_id>/", AvailableYears.as_view(), name="available_years"),
     path("api/admin/months/<int:user_id>/<int:year>/", AvailableMonths.as_view(), name="available_months"),
     path("api/admin/report/<int:user_id>/<int:year>/<int:month>/", MonthlyReport.as_view(), name="monthly_report"),
     path("api/active_session/", ActiveSession.as_view(), name="active_session"),
+    path("api/me/state/", MyState.as_view(), name="my_state"),
     path("api/admin/export_excel/<int:year>/<int:month>/", ExportExcelReport.as_view(), name="export_excel"),
+    path("api/admin/export_excel/", ExportExcelReport.as_view(), name="export_excel_range"),
+    path("api/admin/export_jobs/", ExportJobs.as_view(), name="export_jobs"),
+    path("api/admin/export_jobs/<int:job_id>/", ExportJobDetail.as_view(), name="export_job_detail"),
+    path("api/admin/export_jobs/<int:job_id>/download/", ExportJobDownload.as_view(), name="export_job_download"),
 ]
-
-print("DEBUG: Виводимо всі URL Django")
-for url in get_resolver().url_patterns:
-    print(f"DEBUG: {url}")
\ No newline at end of file
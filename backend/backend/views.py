@@ -1,13 +1,15 @@
 from collections import defaultdict
-from datetime import datetime, timedelta
+import os
+from datetime import date, timedelta
 import pytz
 from babel.dates import format_date
-import pandas as pd
-from io import BytesIO
-from django.http import HttpResponse
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import FileResponse
 
 
-from django.db.models import Count, Sum
+from django.db.models import Count, Exists, OuterRef, Sum
+from django.utils.dateparse import parse_datetime
 from django.utils.timezone import now
 
 from rest_framework.authtoken.models import Token
@@ -15,10 +17,36 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import User, WorkSession, WorkPause
+from .authentication import token_cache
+from .export_jobs import QueueFull, export_filename, submit_export
+from .idempotency import MAX_KEY_LENGTH, idempotent, store_results, stored_results
+from .intervals import day_parts, local_times, work_intervals
+from .models import ExportJob, User, WorkSession
+from .pagination import keyset_page
+from .report_cache import cached_report
+from .session_state import (
+    TransitionError, apply_events, close_sessions, pause_session, resume_session, start_session, stop_session,
+)
+from .worktime import (
+    OPEN_STATUSES, annotate_work_time, filter_by_days, filter_overlapping_days, month_days, open_pause_start_subquery,
+    rolled_up_daily_totals, year_range,
+)
 
 kyiv_tz = pytz.timezone("Europe/Kyiv")
 
+# Наскільки час дії від клієнта може випереджати час сервера (розбіжність годинників)
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+
+def parse_date_param(value):
+    """Дата з query-параметра у форматі РРРР-ММ-ДД (None, якщо параметр не передано)"""
+    return date.fromisoformat(value) if value else None
+
+
+def worker_name(user):
+    """Ім'я та прізвище працівника, або username, якщо їх не заповнено"""
+    return f"{user.first_name or ''} {user.last_name or ''}".strip() or user.username
+
 class TelegramAuth(APIView):
     def post(self, request):
         telegram_id = request.data.get("telegram_id")
@@ -27,120 +55,199 @@ class TelegramAuth(APIView):
         if not telegram_id:
             return Response({"error": "Не вказано Telegram ID"}, status=400)
 
-        user, created = User.objects.get_or_create(telegram_id=telegram_id, defaults={"username": username})
-        token, _ = Token.objects.get_or_create(user=user)
+        # Звичайний випадок – користувач з токеном уже існує: один SELECT з JOIN
+        token = Token.objects.select_related("user").filter(user__telegram_id=telegram_id).first()
+        if token is None:
+            # Перший вхід: upsert користувача за telegram_id (без гонки між паралельними /start) і створення токена
+            user = User.objects.bulk_create(
+                [User(telegram_id=telegram_id, username=username)],
+                update_conflicts=True, unique_fields=["telegram_id"], update_fields=["telegram_id"],
+            )[0]
+            user_id = user.pk or User.objects.values_list("pk", flat=True).get(telegram_id=telegram_id)
+            Token.objects.get_or_create(user_id=user_id)
+            token = Token.objects.select_related("user").get(user_id=user_id)
+        user = token.user
+        token_cache.set(token.key, user, token)
 
         return Response({"token": token.key, "user_id": user.id, "role": user.role})
 
+SESSION_ACTIONS = {
+    "start": (start_session, "✅ Роботу розпочато!"),
+    "pause": (pause_session, "⏸ Робота поставлена на паузу!"),
+    "resume": (resume_session, "▶️ Робота відновлена!"),
+    "stop": (stop_session, "✅ Робоча зміна завершена!"),
+}
+
+
+def apply_action(user, action, at=None):
+    """Виконує перехід стану зміни і повертає відповідь API (400 з текстом помилки, якщо перехід неможливий)"""
+    transition, message = SESSION_ACTIONS[action]
+    try:
+        session = transition(user, at=at)
+    except TransitionError as e:
+        return Response({"error": str(e)}, status=400)
+    return Response({"message": message, "session_id": session.id, "status": session.status})
+
 class StartWork(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        user = request.user
-        current_time = now().astimezone(kyiv_tz)
-
-        existing_session = WorkSession.objects.filter(user=user, status="active").last()
-        if existing_session:
-            return Response({"error": "❌ У вас вже є активна зміна! Використовуйте /pause_work для перерви або /stop_work для завершення."}, status=400)
-
-        session = WorkSession.objects.create(user=user, start_time=current_time, status="active")
-        return Response({"message": "✅ Роботу розпочато!", "session_id": session.id})
+        return idempotent(request, lambda: apply_action(request.user, "start"))
 
 class PauseWork(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        session = WorkSession.objects.filter(user=request.user, status="active").last()
-        if not session:
-            return Response({"error": "❌ Ви ще не почали роботу! Використовуйте /start_work."}, status=400)
-
-        WorkPause.objects.create(session=session, pause_time=now().astimezone(kyiv_tz))
-        session.status = "paused"
-        session.save()
-        return Response({"message": "⏸ Робота поставлена на паузу!"})
+        return idempotent(request, lambda: apply_action(request.user, "pause"))
 
 class ResumeWork(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        session = WorkSession.objects.filter(user=request.user, status="paused").last()
-        if not session:
-            return Response({"error": "❌ Ваша зміна не була поставлена на паузу!"}, status=400)
-
-        pause = WorkPause.objects.filter(session=session, resume_time__isnull=True).last()
-        if pause:
-            pause.resume_time = now().astimezone(kyiv_tz)
-            pause.save()
-
-        session.status = "active"
-        session.save()
-        return Response({"message": "▶️ Робота відновлена!"})
+        return idempotent(request, lambda: apply_action(request.user, "resume"))
 
 class StopWork(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        session = WorkSession.objects.filter(user=request.user, status__in=["active", "paused"]).last()
+        return idempotent(request, lambda: apply_action(request.user, "stop"))
+
+class SessionAction(APIView):
+    """
+    Дія зі зміною з часом, зафіксованим клієнтом (черга бота): POST {"action", "at", "key"}.
+    action – start/pause/resume/stop, at – ISO-час з часовим поясом, key – ключ ідемпотентності
+    (або заголовок Idempotency-Key): повтор з тим самим ключем повертає збережену відповідь і нічого не змінює.
+    """
+    permission_classes = [IsAuthenticated]
 
-        if not session:
-            return Response({"error": "❌ Ви ще не почали зміну! Використовуйте /start_work."}, status=400)
+    def post(self, request):
+        action = request.data.get("action")
+        key = request.headers.get("Idempotency-Key") or request.data.get("key")
+        at = parse_datetime(str(request.data.get("at") or ""))
 
-        session.end_time = now().astimezone(kyiv_tz)
-        session.status = "ended"
-        session.save()
-        return Response({"message": "✅ Робоча зміна завершена!"})
+        if action not in SESSION_ACTIONS or not key or at is None or at.tzinfo is None:
+            return Response(
+                {"error": "❌ Очікується action (start/pause/resume/stop), at (ISO-час з поясом) та key."}, status=400
+            )
+        if at > now() + MAX_CLOCK_SKEW:
+            return Response({"error": "❌ Час дії в майбутньому."}, status=400)
+
+        return idempotent(request, lambda: apply_action(request.user, action, at), key=key)
+
+class EventBatch(APIView):
+    """
+    Пакетне застосування дій зі змінами: POST {"events": [{"user_id", "action", "at", "key"}, ...]}.
+    Події застосовуються по порядку в одній транзакції, відповідь – {"results": [...]} у тому ж порядку:
+    {"ok": true, "message", "session_id", "status"} або {"ok": false, "error"}.
+    Працівник надсилає лише власні події (user_id можна не вказувати), адміністратор – будь-чиї.
+    key – необов'язковий ключ ідемпотентності події: повтор повертає збережений результат з "replayed": true.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        events = request.data.get("events")
+        if not isinstance(events, list) or not events or not all(isinstance(event, dict) for event in events):
+            return Response({"error": "❌ Очікується непорожній список events."}, status=400)
+        if len(events) > settings.EVENT_BATCH_LIMIT:
+            return Response({"error": f"❌ Не більше {settings.EVENT_BATCH_LIMIT} подій за запит."}, status=400)
+
+        results = [None] * len(events)
+        parsed = [self.parse(request.user, event) for event in events]
+        known_users = set(User.objects.filter(
+            pk__in={item[0] for item in parsed if not isinstance(item, str)}
+        ).values_list("pk", flat=True))
+
+        # Ключі, що вже оброблялись (раніше або в цьому ж пакеті), не застосовуються вдруге
+        cache_keys = {
+            index: (item[0], item[3])
+            for index, item in enumerate(parsed) if not isinstance(item, str) and item[3]
+        }
+        stored = stored_results(set(cache_keys.values()))
+        first_index, pending = {}, []
+        for index, item in enumerate(parsed):
+            cache_key = cache_keys.get(index)
+            if isinstance(item, str):
+                results[index] = {"ok": False, "error": item}
+            elif item[0] not in known_users:
+                results[index] = {"ok": False, "error": "❌ Користувача не знайдено."}
+            elif cache_key in stored:
+                results[index] = {**stored[cache_key], "replayed": True}
+            elif cache_key in first_index:
+                continue
+            else:
+                if cache_key:
+                    first_index[cache_key] = index
+                pending.append(index)
+
+        try:
+            # Події та результати їх ключів фіксуються разом: повтор пакета після збою не застосує їх удруге
+            with transaction.atomic():
+                applied = apply_events([parsed[index][:3] for index in pending])
+                for index, (session, status, error) in zip(pending, applied):
+                    if error:
+                        results[index] = {"ok": False, "error": error}
+                    else:
+                        action = parsed[index][1]
+                        results[index] = {
+                            "ok": True, "message": SESSION_ACTIONS[action][1], "session_id": session.id,
+                            "status": status,
+                        }
+                store_results({cache_keys[index]: results[index] for index in pending if index in cache_keys})
+        except IntegrityError:
+            # Паралельний запит відкрив зміну одному з користувачів або вже обробив ці ключі –
+            # увесь пакет можна повторити
+            return Response({"error": "⏳ Стан змін змінився під час обробки, повторіть запит."}, status=409)
+
+        for index, cache_key in cache_keys.items():
+            if results[index] is None:
+                results[index] = {**results[first_index[cache_key]], "replayed": True}
+        return Response({"results": results})
+
+    @staticmethod
+    def parse(user, event):
+        """(user_id, action, at, key) або текст помилки"""
+        user_id = event.get("user_id", user.id)
+        action, key = event.get("action"), event.get("key")
+        at = parse_datetime(str(event.get("at") or ""))
+        if not isinstance(user_id, int):
+            return "❌ user_id має бути числом."
+        if user_id != user.id and user.role != "admin":
+            return "🚫 Події інших користувачів може надсилати лише адміністратор."
+        if action not in SESSION_ACTIONS or at is None or at.tzinfo is None:
+            return "❌ Очікується action (start/pause/resume/stop) та at (ISO-час з поясом)."
+        if at > now() + MAX_CLOCK_SKEW:
+            return "❌ Час дії в майбутньому."
+        if key is not None and (not isinstance(key, str) or len(key) > MAX_KEY_LENGTH):
+            return f"❌ key має бути рядком до {MAX_KEY_LENGTH} символів."
+        return user_id, action, at, key
 
 class MyHours(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         today = now().astimezone(kyiv_tz)
+        return cached_report(
+            request, "my_hours", request.user.id, (today.year, today.month),
+            lambda: self.build(request.user, today),
+        )
+
+    @staticmethod
+    def build(user, today):
+        """(payload, cacheable): звіт поточного місяця кешується, лише поки немає незавершеної зміни"""
         year, month = today.year, today.month
 
-        sessions = WorkSession.objects.filter(
-            user=request.user,
-            start_time__year=year,
-            start_time__month=month
-        )
+        # Завершені сесії – з денних підсумків, наживо рахується лише незавершена
+        first_day, last_day = month_days(year, month)
+        daily_data = {
+            day: total
+            for (_, day), total in rolled_up_daily_totals(first_day, last_day, user_id=user.id).items()
+        }
+        cacheable = not WorkSession.objects.filter(user=user, status__in=OPEN_STATUSES).exists()
+
+        if not daily_data:
+            return {"error": "📊 У вас ще немає робочих годин у цьому місяці."}, cacheable
 
-        if not sessions.exists():
-            return Response({"error": "📊 У вас ще немає робочих годин у цьому місяці."})
-
-        total_work_time = timedelta()
-        daily_data = defaultdict(timedelta)
-
-        for session in sessions:
-            session_start = session.start_time.astimezone(kyiv_tz)
-            actual_end_time = session.end_time.astimezone(kyiv_tz) if session.end_time else now().astimezone(kyiv_tz)
-
-            # Створюємо список робочих інтервалів
-            work_intervals = []
-            current_start = session_start
-
-            # Отримуємо всі паузи, впорядковані за часом початку
-            pauses = WorkPause.objects.filter(session=session).order_by("pause_time")
-            for pause in pauses:
-                pause_start = pause.pause_time.astimezone(kyiv_tz)
-                if pause.resume_time:
-                    pause_end = pause.resume_time.astimezone(kyiv_tz)
-                elif session.end_time:
-                    # Якщо сесія завершена, незавершену паузу вважаємо нульовою
-                    pause_end = actual_end_time
-                else:
-                    # Якщо сесія ще триває, незавершену паузу розглядаємо як завершену в момент її початку
-                    pause_end = pause_start
-
-                if pause_start > current_start:
-                    work_intervals.append(pause_start - current_start)
-                current_start = pause_end
-
-            if actual_end_time > current_start:
-                work_intervals.append(actual_end_time - current_start)
-
-            # Фактичний робочий час сесії – сума робочих інтервалів
-            actual_work_time = sum(work_intervals, timedelta())
-            daily_data[session_start.date()] += actual_work_time
-            total_work_time += actual_work_time
+        total_work_time = sum(daily_data.values(), timedelta())
 
         total_hours, remainder = divmod(total_work_time.total_seconds(), 3600)
         total_minutes, _ = divmod(remainder, 60)
@@ -152,66 +259,170 @@ class MyHours(APIView):
 
         formatted_date = format_date(today, format='LLLL yyyy', locale='uk').capitalize()
 
-        return Response({
+        return {
             "summary": f"📆 **{formatted_date}**\n🔹 Всього відпрацьовано: {int(total_hours)} год {int(total_minutes)} хв",
             "days": formatted_days
-        })
+        }, cacheable
 
 class AdminReport(APIView):
+    """
+    Звіт по всіх працівниках з розбивкою по днях.
+    Необов'язкові фільтри: ?date_from=РРРР-ММ-ДД&date_to=РРРР-ММ-ДД&user_id=...
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         if request.user.role != "admin":
             return Response({"error": "🚫 У вас немає прав для перегляду звіту."}, status=403)
 
-        sessions = WorkSession.objects.select_related("user").all()
+        try:
+            date_from = parse_date_param(request.query_params.get("date_from"))
+            date_to = parse_date_param(request.query_params.get("date_to"))
+        except ValueError:
+            return Response({"error": "❌ Невірний формат дати, очікується РРРР-ММ-ДД."}, status=400)
+
+        user_id = request.query_params.get("user_id")
+        if user_id and not user_id.isdigit():
+            return Response({"error": "❌ Невірний user_id."}, status=400)
+        user_id = int(user_id) if user_id else None
+
+        sessions = filter_overlapping_days(WorkSession.objects.all(), date_from, date_to)
+        if user_id:
+            sessions = sessions.filter(user_id=user_id)
+
+        # Один запит до журналу подій за вікно; робочий час ділиться по київських добах,
+        # тож нічна зміна показується в обох днях своїми частинами
+        parts = day_parts(work_intervals(sessions.values("pk")), date_from, date_to)
+        if parts.empty:
+            return Response("")
+        parts = parts.sort_values(["user_id", "day", "start"], ascending=[True, False, False])
+        user_names = {
+            user.id: worker_name(user)
+            for user in User.objects.filter(pk__in=parts["user_id"].unique().tolist()).only("first_name", "last_name", "username")
+        }
 
         report_data = defaultdict(lambda: defaultdict(list))
-
-        for session in sessions:
-            start_date = session.start_time.strftime("%d.%m.%Y")  # Формат ДД.ММ.РРРР
-            end_time = session.end_time.strftime("%H:%M") if session.end_time else "Ще триває"
-            duration = session.end_time - session.start_time if session.end_time else now() - session.start_time
-            hours, minutes = divmod(duration.total_seconds() // 60, 60)
-
-            full_name = f"{session.user.first_name} {session.user.last_name}".strip()
-            if not full_name or full_name == "None None":
-                full_name = session.user.username  # Якщо ім'я відсутнє, використовуємо username
-
-            report_data[full_name][start_date].append({
-                "start": session.start_time.strftime("%H:%M"),
-                "end": end_time,
-                "hours": f"{int(hours)} год {int(minutes)} хв"
+        day_totals = defaultdict(float)
+        for user_id, day, seconds, start, end, still_open in zip(
+            parts["user_id"], parts["day"], parts["seconds"], local_times(parts["start"].to_numpy()),
+            local_times(parts["end"].to_numpy()), parts["open"] & parts["last"],
+        ):
+            hours, minutes = divmod(int(seconds) // 60, 60)
+            report_data[user_id][day].append({
+                "start": start,
+                "end": "Ще триває" if still_open else end,
+                "hours": f"{hours} год {minutes} хв"
             })
+            day_totals[(user_id, day)] += seconds
 
         formatted_report = []
-        for user, days in report_data.items():
-            user_report = f"👤 **{user}**\n"
-            # Сортуємо дні від новіших до старіших
-            sorted_days = sorted(days.keys(), reverse=True)  
-            for day in sorted_days:
+        for user_id, days in report_data.items():
+            user_report = f"👤 **{user_names[user_id]}**\n"
+            # Дні від новіших до старіших
+            for day in sorted(days.keys(), reverse=True):
                 logs = days[day]
-                total_duration = sum(
-                    (session.end_time - session.start_time).total_seconds() if session.end_time else (now() - session.start_time).total_seconds()
-                    for session in WorkSession.objects.filter(user__first_name=user.split()[0], start_time__date=datetime.strptime(day, "%d.%m.%Y"))
-                )
-                total_hours, total_minutes = divmod(total_duration // 60, 60)
-                day_report = f"📅 {day} (🔹 {int(total_hours)} год {int(total_minutes)} хв)"
+                total_hours, total_minutes = divmod(int(day_totals[(user_id, day)]) // 60, 60)
+                day_report = f"📅 {day.strftime('%d.%m.%Y')} (🔹 {int(total_hours)} год {int(total_minutes)} хв)"
                 shifts = "\n".join([f"  🕒 {log['start']} - {log['end']} ({log['hours']})" for log in logs])
                 user_report += f"{day_report}\n{shifts}\n"
             formatted_report.append(user_report)
 
         return Response("\n".join(formatted_report))
 
+class AdminSessions(APIView):
+    """
+    Зміни працівників у JSON з keyset-пагінацією від новіших до старіших.
+    Параметри: ?user_id=&date_from=РРРР-ММ-ДД&date_to=РРРР-ММ-ДД&status=active,paused,ended
+    &fields=id,user_name,...&limit=1..100&cursor=<next/prev з попередньої відповіді>
+    """
+    permission_classes = [IsAuthenticated]
+
+    FIELDS = {
+        "id": lambda s: s.id,
+        "user_id": lambda s: s.user_id,
+        "user_name": lambda s: worker_name(s.user),
+        "start_time": lambda s: s.start_time.astimezone(kyiv_tz).isoformat(),
+        "end_time": lambda s: s.end_time.astimezone(kyiv_tz).isoformat() if s.end_time else None,
+        "status": lambda s: s.status,
+        "work_seconds": lambda s: int(s.work_duration.total_seconds()),
+        "paused_seconds": lambda s: int(s.paused_duration.total_seconds()),
+    }
+    STATUSES = ("active", "paused", "ended")
+
+    def get(self, request):
+        if request.user.role != "admin":
+            return Response({"error": "🚫 У вас немає прав для перегляду звіту."}, status=403)
+
+        params = request.query_params
+        try:
+            date_from = parse_date_param(params.get("date_from"))
+            date_to = parse_date_param(params.get("date_to"))
+        except ValueError:
+            return Response({"error": "❌ Невірний формат дати, очікується РРРР-ММ-ДД."}, status=400)
+
+        user_id = params.get("user_id")
+        if user_id and not user_id.isdigit():
+            return Response({"error": "❌ Невірний user_id."}, status=400)
+
+        statuses = params.get("status", "").split(",") if params.get("status") else []
+        fields = params.get("fields", "").split(",") if params.get("fields") else list(self.FIELDS)
+        if set(statuses) - set(self.STATUSES) or set(fields) - set(self.FIELDS):
+            return Response({"error": "❌ Невірний status або fields."}, status=400)
+
+        limit = params.get("limit", "20")
+        if not limit.isdigit() or not 1 <= int(limit) <= 100:
+            return Response({"error": "❌ limit має бути від 1 до 100."}, status=400)
+
+        sessions = filter_by_days(WorkSession.objects.all(), date_from, date_to)
+        if user_id:
+            sessions = sessions.filter(user_id=int(user_id))
+        if statuses:
+            sessions = sessions.filter(status__in=statuses)
+        # Зайві JOIN та підзапит пауз – лише коли відповідні поля запитані
+        if "user_name" in fields:
+            sessions = sessions.select_related("user")
+        if {"work_seconds", "paused_seconds"} & set(fields):
+            sessions = annotate_work_time(sessions)
+
+        try:
+            rows, next_cursor, prev_cursor = keyset_page(sessions, params.get("cursor"), int(limit))
+        except ValueError:
+            return Response({"error": "❌ Невірний cursor."}, status=400)
+
+        return Response({
+            "results": [{field: self.FIELDS[field](session) for field in fields} for session in rows],
+            "next": next_cursor,
+            "prev": prev_cursor,
+        })
+
 class AvailableWorkers(APIView):
+    """
+    Працівники, у яких є хоча б одна зміна.
+    З ?limit=N відповідь посторінкова за id: {"results": [...], "next": <after для наступної сторінки>}.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         if request.user.role != "admin":
             return Response({"error": "🚫 Звіт доступний тільки адміну 🙅🏻‍♀️"}, status=403)
 
-        workers = User.objects.filter(worksession__isnull=False).distinct()
-        return Response([{"id": worker.id, "name": f"{worker.first_name} {worker.last_name}".strip() or worker.username} for worker in workers])
+        workers = (
+            User.objects.filter(Exists(WorkSession.objects.filter(user_id=OuterRef("pk"))))
+            .only("id", "first_name", "last_name", "username").order_by("id")
+        )
+
+        limit, after = request.query_params.get("limit"), request.query_params.get("after", "0")
+        if limit is None:
+            return Response([{"id": worker.id, "name": worker_name(worker)} for worker in workers])
+
+        if not limit.isdigit() or not 1 <= int(limit) <= 100 or not after.isdigit():
+            return Response({"error": "❌ limit має бути від 1 до 100, after – id працівника."}, status=400)
+        page = list(workers.filter(id__gt=int(after))[:int(limit) + 1])
+        has_more, page = len(page) > int(limit), page[:int(limit)]
+        return Response({
+            "results": [{"id": worker.id, "name": worker_name(worker)} for worker in page],
+            "next": page[-1].id if has_more else None,
+        })
 
 class AvailableYears(APIView):
     permission_classes = [IsAuthenticated]
@@ -220,8 +431,11 @@ class AvailableYears(APIView):
         if request.user.role != "admin":
             return Response({"error": "🚫 Звіт доступний тільки адміну."}, status=403)
 
-        years = WorkSession.objects.filter(user_id=user_id).dates("start_time", "year").distinct()
-        return Response([year.year for year in years])
+        def build():
+            years = WorkSession.objects.filter(user_id=user_id).dates("start_time", "year").distinct()
+            return [year.year for year in years], True
+
+        return cached_report(request, "years", user_id, (), build)
 
 class AvailableMonths(APIView):
     permission_classes = [IsAuthenticated]
@@ -230,8 +444,14 @@ class AvailableMonths(APIView):
         if request.user.role != "admin":
             return Response({"error": "🚫 Звіт доступний тільки адміну."}, status=403)
 
-        months = WorkSession.objects.filter(user_id=user_id, start_time__year=year).dates("start_time", "month").distinct()
-        return Response([month.month for month in months])
+        def build():
+            year_start, year_end = year_range(year)
+            months = WorkSession.objects.filter(
+                user_id=user_id, start_time__gte=year_start, start_time__lt=year_end
+            ).dates("start_time", "month").distinct()
+            return [month.month for month in months], True
+
+        return cached_report(request, "months", user_id, (year,), build)
 
 class MonthlyReport(APIView):
     permission_classes = [IsAuthenticated]
@@ -240,130 +460,250 @@ class MonthlyReport(APIView):
         if request.user.role != "admin":
             return Response({"error": "🚫 Звіт доступний тільки адміну."}, status=403)
 
-        sessions = WorkSession.objects.filter(
-            user_id=user_id,
-            start_time__year=year,
-            start_time__month=month
+        return cached_report(
+            request, "monthly", user_id, (year, month), lambda: self.build(user_id, year, month)
         )
 
-        if not sessions.exists():
-            return Response({"error": "📊 Немає даних за цей місяць."})
+    @staticmethod
+    def build(user_id, year, month):
+        """
+        (payload, cacheable): робочий час ділиться по київських добах, тож нічна зміна та зміна на межі
+        місяців потрапляють у кожен день своєю частиною; місяць з незавершеною зміною не кешується
+        """
+        first_day, last_day = month_days(year, month)
+        sessions = filter_overlapping_days(WorkSession.objects.filter(user_id=user_id), first_day, last_day)
+        parts = day_parts(work_intervals(sessions.values("pk")), first_day, last_day)
 
-        total_work_time = timedelta()
-        daily_data = defaultdict(list)
+        if parts.empty:
+            return {"error": "📊 Немає даних за цей місяць."}, True
 
-        for session in sessions:
-            # Переконуємось, що всі часи приведені до київського часу
-            session_start = session.start_time.astimezone(kyiv_tz)
-            actual_end_time = session.end_time.astimezone(kyiv_tz) if session.end_time else None
-            day = session_start.strftime("%d.%m.%Y")
-
-            # Створимо список інтервалів роботи
-            work_intervals = []
-
-            # Початковий час роботи – від початку сесії
-            current_start = session_start
-
-            # Отримуємо всі паузи, впорядковані за часом початку
-            pauses = WorkPause.objects.filter(session=session).order_by("pause_time")
-            for pause in pauses:
-                pause_start = pause.pause_time.astimezone(kyiv_tz)
-                # Якщо пауза завершена – беремо resume_time
-                if pause.resume_time:
-                    pause_end = pause.resume_time.astimezone(kyiv_tz)
-                # Якщо пауза незавершена, але сесія завершена – вважаємо, що resume_time = session.end_time,
-                # тобто відлік робочого часу припиняється з моменту натискання кнопки "Завершити"
-                elif actual_end_time:
-                    pause_end = actual_end_time
-                else:
-                    # Якщо сесія не завершена, незавершену паузу не враховуємо (працюється як 0)
-                    pause_end = pause_start
-
-                # Записуємо інтервал роботи від current_start до початку паузи
-                if pause_start > current_start:
-                    work_intervals.append(pause_start - current_start)
-                # Оновлюємо current_start: після паузи робота відновиться з моменту pause_end
-                current_start = pause_end
-
-            # Після обробки всіх пауз додаємо останній інтервал (якщо сесія завершена)
-            if actual_end_time and actual_end_time > current_start:
-                work_intervals.append(actual_end_time - current_start)
-            elif not actual_end_time:
-                # Якщо сесія ще триває, поточний інтервал можна розрахувати до поточного моменту
-                work_intervals.append(datetime.now(kyiv_tz) - current_start)
-
-            # Обчислюємо фактичний робочий час для сесії як суму інтервалів
-            actual_work_time = sum(work_intervals, timedelta())
-            total_work_time += actual_work_time
-
-            hours, remainder = divmod(actual_work_time.total_seconds(), 3600)
+        parts = parts.sort_values(["day", "start"])
+        daily_data = defaultdict(list)
+        for day, seconds, start, end, still_open in zip(
+            parts["day"], parts["seconds"], local_times(parts["start"].to_numpy()),
+            local_times(parts["end"].to_numpy()), parts["open"] & parts["last"],
+        ):
+            hours, remainder = divmod(int(seconds), 3600)
             minutes, seconds = divmod(remainder, 60)
             daily_data[day].append(
-                f"🕒 {session_start.strftime('%H:%M')} - "
-                f"{actual_end_time.strftime('%H:%M') if actual_end_time else 'Ще триває'} "
-                f"({int(hours)} год {int(minutes)} хв {int(seconds)} сек)"
+                f"🕒 {start} - {'Ще триває' if still_open else end} ({hours} год {minutes} хв {seconds} сек)"
             )
 
-        total_hours, remainder = divmod(total_work_time.total_seconds(), 3600)
+        total_hours, remainder = divmod(int(parts["seconds"].sum()), 3600)
         total_minutes, total_seconds = divmod(remainder, 60)
 
-        report = f"📆 **{month:02d}.{year}**\n🔹 Загальна кількість: {int(total_hours)} год {int(total_minutes)} хв {int(total_seconds)} сек\n\n"
-        sorted_days = sorted(daily_data.keys(), reverse=True)
-        for day in sorted_days:
-            report += f"📅 {day}:\n" + "\n".join(daily_data[day]) + "\n"
+        report = f"📆 **{month:02d}.{year}**\n🔹 Загальна кількість: {total_hours} год {total_minutes} хв {total_seconds} сек\n\n"
+        for day in sorted(daily_data, reverse=True):
+            report += f"📅 {day.strftime('%d.%m.%Y')}:\n" + "\n".join(daily_data[day]) + "\n"
 
-        return Response({"report": report})
+        return {"report": report}, not parts["open"].any()
     
 class ActiveSession(APIView):
-    """Перевіряє, чи є у користувача активна сесія"""
+    """Перевіряє, чи є у користувача відкрита (активна або на паузі) сесія"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        status = (
+            WorkSession.objects.filter(user=request.user, status__in=OPEN_STATUSES)
+            .values_list("status", flat=True).first()
+        )
+        return Response({"active": status is not None, "status": status or "none"})
+
+class MyState(APIView):
+    """
+    Поточний стан користувача одним запитом: статус зміни (none/active/paused),
+    відпрацьоване сьогодні з урахуванням незавершеної зміни та роль.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        active_session = WorkSession.objects.filter(user=request.user, status="active").exists()
-        return Response({"active": active_session})
+        today = now().astimezone(kyiv_tz).date()
+        session = (
+            WorkSession.objects.filter(user=request.user, status__in=OPEN_STATUSES)
+            .values("id", "status").first()
+        )
+        today_total = rolled_up_daily_totals(today, today, user_id=request.user.id).get(
+            (request.user.id, today), timedelta()
+        )
+        seconds = int(today_total.total_seconds())
+
+        return Response({
+            "status": session["status"] if session else "none",
+            "session_id": session["id"] if session else None,
+            "role": request.user.role,
+            "today_seconds": seconds,
+            "today": f"{seconds // 3600} год {(seconds % 3600) // 60} хв",
+        })
     
-class ExportExcelReport(APIView):
+class OpenSessions(APIView):
+    """Незавершені зміни, розпочаті понад older_than секунд тому (для нагадувань та автозавершення)"""
     permission_classes = [IsAuthenticated]
 
-    def get(self, request, year, month):
-        print(f"DEBUG: Отримано запит на експорт {year}-{month} від {request.user}")
+    def get(self, request):
+        if request.user.role != "admin":
+            return Response({"error": "🚫 Доступ дозволено лише адміністратору."}, status=403)
 
+        older_than = request.query_params.get("older_than", "0")
+        if not older_than.isdigit():
+            return Response({"error": "❌ older_than – кількість секунд."}, status=400)
 
+        # Один запит незалежно від кількості працівників
+        sessions = (
+            WorkSession.objects.filter(
+                status__in=OPEN_STATUSES, start_time__lt=now() - timedelta(seconds=int(older_than))
+            )
+            .select_related("user").annotate(paused_since=open_pause_start_subquery()).order_by("start_time")
+        )
+        return Response([
+            {
+                "id": session.id,
+                "user_id": session.user_id,
+                "telegram_id": session.user.telegram_id,
+                "status": session.status,
+                "start_time": session.start_time.astimezone(kyiv_tz).isoformat(),
+                "paused_since": session.paused_since.astimezone(kyiv_tz).isoformat() if session.paused_since else None,
+            }
+            for session in sessions
+        ])
+
+class CloseSessions(APIView):
+    """Автозавершення забутих змін: POST {"session_ids": [...], "max_duration": секунди}"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
         if request.user.role != "admin":
             return Response({"error": "🚫 Доступ дозволено лише адміністратору."}, status=403)
 
-        # Отримуємо всіх користувачів
-        users = User.objects.filter(worksession__start_time__year=year, worksession__start_time__month=month).distinct()
+        session_ids = request.data.get("session_ids")
+        max_duration = request.data.get("max_duration")
+        if (
+            not isinstance(session_ids, list) or not all(isinstance(pk, int) for pk in session_ids)
+            or not isinstance(max_duration, int) or max_duration <= 0
+        ):
+            return Response({"error": "❌ Очікується session_ids (список id) та max_duration (секунди)."}, status=400)
+
+        closed = close_sessions(session_ids, timedelta(seconds=max_duration))
+        return Response({"closed": [
+            {
+                "id": session.id,
+                "user_id": session.user_id,
+                "telegram_id": session.user.telegram_id,
+                "start_time": session.start_time.astimezone(kyiv_tz).isoformat(),
+                "end_time": session.end_time.astimezone(kyiv_tz).isoformat(),
+            }
+            for session in closed
+        ]})
+
+
+def export_period(params, year=None, month=None):
+    """
+    Період експорту з URL (рік, місяць), з параметрів year/month або date_from/date_to.
+    Повертає ((date_from, date_to), None) або (None, Response з помилкою 400).
+    """
+    year, month = year or params.get("year"), month or params.get("month")
+    try:
+        if year and month:
+            return month_days(int(year), int(month)), None
+        date_from = parse_date_param(params.get("date_from"))
+        date_to = parse_date_param(params.get("date_to"))
+    except ValueError:
+        return None, Response({"error": "❌ Невірний формат періоду, очікується рік і місяць або дати РРРР-ММ-ДД."}, status=400)
+    if not date_from or not date_to or date_from > date_to:
+        return None, Response({"error": "❌ Вкажіть коректний період date_from та date_to."}, status=400)
+    return (date_from, date_to), None
+
+
+def export_job_data(job):
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "date_from": job.date_from.isoformat(),
+        "date_to": job.date_to.isoformat(),
+        "error": job.error or None,
+    }
+
+
+def queue_export(request, period):
+    """Ставить експорт у чергу; 429 з Retry-After, якщо черга заповнена"""
+    try:
+        return submit_export(*period, user=request.user), None
+    except QueueFull:
+        return None, Response(
+            {"error": "⏳ Зараз формується забагато звітів, спробуйте за хвилину."}, status=429,
+            headers={"Retry-After": "30"},
+        )
 
-        # Отримуємо всі робочі сесії
-        sessions = WorkSession.objects.filter(start_time__year=year, start_time__month=month)
 
-        # Формуємо структуру для DataFrame
-        data = {}
-        for user in users:
-            user_sessions = sessions.filter(user=user)
-            user_hours = {day: 0 for day in range(1, 32)}
+def export_file_response(job):
+    return FileResponse(
+        open(job.file_path, "rb"),
+        as_attachment=True,
+        filename=export_filename(job.date_from, job.date_to),
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
 
-            for session in user_sessions:
-                start_day = session.start_time.day
-                work_duration = session.end_time - session.start_time if session.end_time else timedelta(0)
-                user_hours[start_day] += round(work_duration.total_seconds() / 3600, 2)  # Години
 
-            data[f"{user.first_name} {user.last_name}"] = list(user_hours.values())
+class ExportExcelReport(APIView):
+    """
+    Excel-звіт годин усіх працівників: за місяць (/export_excel/<рік>/<місяць>/)
+    або за довільний період (?date_from=РРРР-ММ-ДД&date_to=РРРР-ММ-ДД), кожен місяць – окремий аркуш.
+    Файл формується у фоні: якщо готового звіту з актуальними даними ще немає – 202 з job_id
+    для опитування /api/admin/export_jobs/<job_id>/.
+    """
+    permission_classes = [IsAuthenticated]
 
-        # Створення DataFrame
-        df = pd.DataFrame(data, index=[f"{day}.{month}.{year}" for day in range(1, 32)])
+    def get(self, request, year=None, month=None):
+        if request.user.role != "admin":
+            return Response({"error": "🚫 Доступ дозволено лише адміністратору."}, status=403)
 
-        # Генерація Excel
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-            df.to_excel(writer, sheet_name="Звіт")
-            writer.book.close()
+        period, error = export_period(request.query_params, year, month)
+        if error:
+            return error
+        job, error = queue_export(request, period)
+        if error:
+            return error
+        if job.status == "done":
+            return export_file_response(job)
+        return Response(export_job_data(job), status=202)
+
+class ExportJobs(APIView):
+    """Постановка Excel-експорту: POST {"year", "month"} або {"date_from", "date_to"}"""
+    permission_classes = [IsAuthenticated]
 
-        response = HttpResponse(
-            output.getvalue(),
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        response["Content-Disposition"] = f'attachment; filename="report_{month}_{year}.xlsx"'
+    def post(self, request):
+        if request.user.role != "admin":
+            return Response({"error": "🚫 Доступ дозволено лише адміністратору."}, status=403)
+
+        period, error = export_period(request.data)
+        if error:
+            return error
+        job, error = queue_export(request, period)
+        if error:
+            return error
+        return Response(export_job_data(job), status=200 if job.status == "done" else 202)
+
+class ExportJobDetail(APIView):
+    """Статус завдання експорту: queued, running, done або failed"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        if request.user.role != "admin":
+            return Response({"error": "🚫 Доступ дозволено лише адміністратору."}, status=403)
+
+        job = ExportJob.objects.filter(pk=job_id).first()
+        if job is None:
+            return Response({"error": "❌ Завдання не знайдено."}, status=404)
+        return Response(export_job_data(job))
+
+class ExportJobDownload(APIView):
+    """Готовий файл завдання експорту"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        if request.user.role != "admin":
+            return Response({"error": "🚫 Доступ дозволено лише адміністратору."}, status=403)
 
-        return response
\ No newline at end of file
+        job = ExportJob.objects.filter(pk=job_id, status="done").first()
+        if job is None or not os.path.exists(job.file_path):
+            return Response({"error": "❌ Файл ще не готовий або вже видалений."}, status=404)
+        return export_file_response(job)
@@ -0,0 +1,233 @@
+import calendar
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+import pytz
+from django.db import transaction
+from django.db.models import DurationField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Now
+
+from .intervals import daily_seconds, day_parts, work_intervals
+from .models import DailyWorkTotal, WorkEvent, WorkPause, WorkSession
+
+kyiv_tz = pytz.timezone("Europe/Kyiv")
+
+OPEN_STATUSES = ("active", "paused")
+
+
+def local_midnight(day):
+    """Початок доби day за київським часом (aware datetime)"""
+    return kyiv_tz.localize(datetime.combine(day, time.min))
+
+
+def month_range(year, month):
+    """
+    Межі місяця [початок, початок наступного) за київським часом.
+    Фільтр діапазоном по start_time використовує індекси, на відміну від start_time__month (EXTRACT).
+    """
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return local_midnight(date(year, month, 1)), local_midnight(date(next_year, next_month, 1))
+
+
+def month_days(year, month):
+    """Перший та останній день місяця"""
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def year_range(year):
+    """Межі року [1 січня, 1 січня наступного року) за київським часом"""
+    return local_midnight(date(year, 1, 1)), local_midnight(date(year + 1, 1, 1))
+
+
+def filter_by_days(queryset, date_from=None, date_to=None):
+    """Сесії, що почалися між date_from та date_to включно (дні за київським часом)"""
+    if date_from:
+        queryset = queryset.filter(start_time__gte=local_midnight(date_from))
+    if date_to:
+        queryset = queryset.filter(start_time__lt=local_midnight(date_to + timedelta(days=1)))
+    return queryset
+
+
+# Найдовша очікувана зміна: сесії, що почалися раніше, не шукаються (фільтр по індексу start_time)
+MAX_SHIFT_SPAN = timedelta(days=7)
+
+
+def overlapping_days_q(date_from=None, date_to=None):
+    """Умова для сесій, що мають робочий час у днях [date_from, date_to] (дні за київським часом)"""
+    condition = Q()
+    if date_from:
+        start = local_midnight(date_from)
+        condition &= Q(start_time__gte=start - MAX_SHIFT_SPAN) & (Q(end_time__isnull=True) | Q(end_time__gt=start))
+    if date_to:
+        condition &= Q(start_time__lt=local_midnight(date_to + timedelta(days=1)))
+    return condition
+
+
+def filter_overlapping_days(queryset, date_from=None, date_to=None):
+    """Сесії, робочий час яких (повністю або частково, напр. нічна зміна) припадає на дні [date_from, date_to]"""
+    return queryset.filter(overlapping_days_q(date_from, date_to))
+
+
+def pause_duration_subquery():
+    """
+    Сумарна тривалість пауз сесії одним підзапитом.
+    Незавершена пауза завершеної сесії триває до кінця сесії, сесії на паузі – до поточного моменту
+    (як і в інтервалах з журналу подій: пауза, що триває, не є робочим часом).
+    """
+    pause_end = Coalesce(F("resume_time"), OuterRef("end_time"), Now())
+    pauses = (
+        WorkPause.objects.filter(session=OuterRef("pk"))
+        .values("session")
+        .annotate(total=Sum(ExpressionWrapper(pause_end - F("pause_time"), output_field=DurationField())))
+        .values("total")
+    )
+    return Coalesce(Subquery(pauses, output_field=DurationField()), Value(timedelta()))
+
+
+def open_pause_start_subquery():
+    """Початок незавершеної паузи сесії (NULL, якщо сесія не на паузі)"""
+    return Subquery(
+        WorkPause.objects.filter(session=OuterRef("pk"), resume_time__isnull=True)
+        .order_by("-pause_time").values("pause_time")[:1]
+    )
+
+
+def last_resume_subquery():
+    """Останнє відновлення після паузи (NULL, якщо пауз не було)"""
+    return Subquery(
+        WorkPause.objects.filter(session=OuterRef("pk"), resume_time__isnull=False)
+        .order_by("-resume_time").values("resume_time")[:1]
+    )
+
+
+def annotate_work_time(queryset):
+    """
+    Додає до кожної сесії paused_duration (сума пауз) та work_duration (фактичний робочий час).
+    Сесія, що триває, рахується до поточного моменту.
+    """
+    return queryset.annotate(paused_duration=pause_duration_subquery()).annotate(
+        work_duration=ExpressionWrapper(
+            Coalesce(F("end_time"), Now()) - F("start_time") - F("paused_duration"),
+            output_field=DurationField(),
+        )
+    )
+
+
+def session_events(session, pauses):
+    """Події, що відповідають поточному стану сесії та її пауз (для перебудови журналу після правок адміна)"""
+    events = [WorkEvent(user_id=session.user_id, session=session, kind="start", ts=session.start_time)]
+    for pause in sorted(pauses, key=lambda pause: pause.pause_time):
+        events.append(WorkEvent(user_id=session.user_id, session=session, kind="pause", ts=pause.pause_time))
+        if pause.resume_time:
+            events.append(WorkEvent(user_id=session.user_id, session=session, kind="resume", ts=pause.resume_time))
+    if session.end_time:
+        events.append(WorkEvent(user_id=session.user_id, session=session, kind="stop", ts=session.end_time))
+    return events
+
+
+def rebuild_session_events(session_ids):
+    """Замінює журнал подій сесій на відновлений з WorkSession/WorkPause"""
+    WorkEvent.objects.filter(session_id__in=session_ids).delete()
+    sessions = WorkSession.objects.filter(pk__in=session_ids).prefetch_related("pauses")
+    WorkEvent.objects.bulk_create([event for session in sessions for event in session_events(session, session.pauses.all())])
+
+
+def _rollup_rows(parts, pairs=None):
+    """Рядки DailyWorkTotal з частин сесій по добах (лише для пар pairs, якщо їх задано)"""
+    return [
+        DailyWorkTotal(user_id=user_id, date=day, net_seconds=max(int(seconds), 0), session_count=sessions)
+        for (user_id, day), (seconds, sessions) in daily_seconds(parts).items()
+        if pairs is None or (user_id, day) in pairs
+    ]
+
+
+def refresh_daily_totals(pairs, chunk_size=300):
+    """
+    Перераховує DailyWorkTotal для пар (user_id, день) із завершених сесій.
+    Викликається в тій самій транзакції, що й зміна сесії. Пари обробляються порціями по chunk_size,
+    щоб фільтр з OR-умов не впирався в ліміт глибини виразу БД (пакети подій зачіпають тисячі днів).
+    """
+    pairs = sorted(set(pairs))
+    for start in range(0, len(pairs), chunk_size):
+        _refresh_daily_chunk(set(pairs[start:start + chunk_size]))
+
+
+def _refresh_daily_chunk(pairs):
+    # Завершені сесії працівників, що мають робочий час у днях порції
+    days_by_user = defaultdict(list)
+    for user_id, day in pairs:
+        days_by_user[user_id].append(day)
+    users_filter = Q()
+    for user_id, days in days_by_user.items():
+        users_filter |= Q(user_id=user_id) & overlapping_days_q(min(days), max(days))
+    sessions = WorkSession.objects.filter(users_filter, status="ended")
+
+    date_from, date_to = min(day for _, day in pairs), max(day for _, day in pairs)
+    rows = _rollup_rows(day_parts(work_intervals(sessions.values("pk")), date_from, date_to), pairs)
+
+    DailyWorkTotal.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["user", "date"],
+        update_fields=["net_seconds", "session_count"],
+    )
+
+    # Дні, в яких не залишилось завершених сесій (наприклад, сесію видалено)
+    stale = pairs - {(row.user_id, row.date) for row in rows}
+    if stale:
+        stale_filter = Q()
+        for user_id, day in stale:
+            stale_filter |= Q(user_id=user_id, date=day)
+        DailyWorkTotal.objects.filter(stale_filter).delete()
+
+
+def session_days(session):
+    """Пари (user_id, день) усіх київських діб, на які припадає сесія (від початку до кінця або початку)"""
+    first = session.start_time.astimezone(kyiv_tz).date()
+    last = session.end_time.astimezone(kyiv_tz).date() if session.end_time else first
+    return [(session.user_id, first + timedelta(days=offset)) for offset in range((last - first).days + 1)]
+
+
+@transaction.atomic
+def rebuild_daily_totals(user_ids=None, users_per_batch=200):
+    """
+    Повністю перебудовує DailyWorkTotal з історії сесій. Повертає кількість створених рядків.
+    Працівники обробляються групами по users_per_batch, щоб у пам'яті була історія лише однієї групи.
+    """
+    rollup = DailyWorkTotal.objects.all()
+    sessions = WorkSession.objects.filter(status="ended")
+    if user_ids:
+        rollup = rollup.filter(user_id__in=user_ids)
+        sessions = sessions.filter(user_id__in=user_ids)
+    rollup.delete()
+
+    all_users = sorted(set(sessions.values_list("user_id", flat=True)))
+    created = 0
+    for start in range(0, len(all_users), users_per_batch):
+        batch = sessions.filter(user_id__in=all_users[start:start + users_per_batch])
+        created += len(DailyWorkTotal.objects.bulk_create(_rollup_rows(day_parts(work_intervals(batch.values("pk"))))))
+    return created
+
+
+def rolled_up_daily_totals(date_from=None, date_to=None, user_id=None):
+    """
+    Фактичний робочий час {(user_id, день): тривалість} за дні [date_from, date_to].
+    Завершені сесії читаються з DailyWorkTotal, наживо рахуються лише незавершені (з розбиттям по добах).
+    """
+    rollup = DailyWorkTotal.objects.all()
+    if date_from:
+        rollup = rollup.filter(date__gte=date_from)
+    if date_to:
+        rollup = rollup.filter(date__lte=date_to)
+    open_sessions = filter_overlapping_days(WorkSession.objects.filter(status__in=OPEN_STATUSES), date_from, date_to)
+    if user_id is not None:
+        rollup = rollup.filter(user_id=user_id)
+        open_sessions = open_sessions.filter(user_id=user_id)
+
+    totals = defaultdict(timedelta)
+    for row_user_id, day, net_seconds in rollup.values_list("user_id", "date", "net_seconds"):
+        totals[(row_user_id, day)] += timedelta(seconds=net_seconds)
+    live = day_parts(work_intervals(open_sessions.values("pk")), date_from, date_to)
+    for key, (seconds, _) in daily_seconds(live).items():
+        totals[key] += timedelta(seconds=seconds)
+    return totals
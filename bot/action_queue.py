@@ -0,0 +1,225 @@
+"""
+Локальна черга дій зі зміною (write-ahead): start/pause/resume/stop спершу записуються у файл SQLite
+з часом повідомлення Telegram, а потім фоновий флашер по черзі надсилає їх на /api/events/batch/
+з ключами ідемпотентності і повідомляє користувачу результат кожної дії рівно один раз.
+Так час початку/завершення зміни не губиться, коли бекенд повільний або перезапускається.
+"""
+import asyncio
+import logging
+import sqlite3
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytz
+from aiogram.exceptions import TelegramAPIError
+
+from bot.api import api
+from bot.auth import invalidate_worker_cache, request_token, stored_auth
+from bot.config import ACTION_QUEUE_PATH, ACTION_FLUSH_INTERVAL, ACTION_FLUSH_TIMEOUT, ACTION_MAX_ATTEMPTS
+from bot.keyboards import main_menu_keyboard
+from bot.messaging import send_throttled
+
+kyiv_tz = pytz.timezone("Europe/Kyiv")
+
+ACTION_LABELS = {
+    "start": "▶️ Почати роботу",
+    "pause": "⏸ Пауза",
+    "resume": "▶️ Відновити",
+    "stop": "🛑 Завершити",
+}
+
+
+def _rejected(status):
+    """Бекенд відхилив запит і повтор без змін нічого не дасть (на відміну від 5xx, 409 та 429)"""
+    return status is not None and 400 <= status < 500 and status not in (408, 409, 429)
+
+
+class ActionQueue:
+    """
+    Черга дій у SQLite (переживає перезапуск бота). Ключ дії – chat_id:message_id, тому повторна доставка
+    того самого оновлення Telegram не додає дію вдруге. Дії кожного користувача надсилаються строго
+    за порядком запису: якщо для користувача надсилання не вдалося, його дії чекають наступної спроби,
+    а дії інших користувачів надсилаються далі. Дії, які бекенд відхиляє (4xx), повторюються
+    не більше max_attempts разів, після чого видаляються з черги з повідомленням користувачу.
+    """
+
+    def __init__(self, path=ACTION_QUEUE_PATH, interval=ACTION_FLUSH_INTERVAL, timeout=ACTION_FLUSH_TIMEOUT,
+                 max_attempts=ACTION_MAX_ATTEMPTS):
+        self.interval = interval
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.bot = None
+        self._task = None
+        self._db_lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS actions ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL UNIQUE, telegram_id INTEGER NOT NULL, "
+            "username TEXT, chat_id INTEGER NOT NULL, action TEXT NOT NULL, at TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0)"
+        )
+        # Черга, створена попередньою версією бота, ще не має лічильника спроб
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(actions)")}
+        if "attempts" not in columns:
+            self._connection.execute("ALTER TABLE actions ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+
+    async def _execute(self, sql, params=()):
+        async with self._db_lock:
+            return await asyncio.to_thread(lambda: self._connection.execute(sql, params).fetchall())
+
+    async def enqueue(self, user, chat_id, action, at, key):
+        """Записує дію (at – час з часовим поясом); дубль ключа ігнорується"""
+        await self._execute(
+            "INSERT OR IGNORE INTO actions (key, telegram_id, username, chat_id, action, at) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, user.id, user.username, chat_id, action, at.isoformat()),
+        )
+
+    def wake(self):
+        """Просить фоновий флашер надіслати чергу зараз, не чекаючи ACTION_FLUSH_INTERVAL"""
+        self._wakeup.set()
+
+    async def pending(self, limit=100, skip_users=()):
+        """Найстаріші дії в черзі, крім дій користувачів skip_users (telegram_id)"""
+        skip_users = list(skip_users)
+        rows = await self._execute(
+            "SELECT id, key, telegram_id, username, chat_id, action, at, attempts FROM actions "
+            f"WHERE telegram_id NOT IN ({', '.join('?' * len(skip_users))}) ORDER BY id LIMIT ?",
+            (*skip_users, limit),
+        )
+        return [
+            SimpleNamespace(id=row[0], key=row[1], user=SimpleNamespace(id=row[2], username=row[3]),
+                            chat_id=row[4], action=row[5], at=datetime.fromisoformat(row[6]), attempts=row[7])
+            for row in rows
+        ]
+
+    async def _remove(self, row_ids):
+        await self._execute(f"DELETE FROM actions WHERE id IN ({', '.join('?' * len(row_ids))})", row_ids)
+
+    async def _count_attempt(self, row_ids):
+        await self._execute(
+            f"UPDATE actions SET attempts = attempts + 1 WHERE id IN ({', '.join('?' * len(row_ids))})", row_ids
+        )
+
+    async def _token(self, user, refresh=False):
+        """(токен, None) або (None, HTTP-статус невдалої автентифікації)"""
+        if not refresh:
+            auth = await stored_auth(user)
+            if auth:
+                return auth["token"], None
+        token, status = await request_token(user)
+        return (token, None) if token else (None, status)
+
+    async def _send(self, user, items):
+        """
+        Дії одного користувача одним запитом на /api/events/batch/: (список результатів у порядку дій, None)
+        або (None, HTTP-статус), якщо надсилання не вдалося (503 – бекенд недоступний).
+        """
+        payload = {"events": [{"action": item.action, "at": item.at.isoformat(), "key": item.key} for item in items]}
+        token, status = await self._token(user)
+        if not token:
+            return None, status
+        response = await api.post("events/batch/", token=token, json=payload, timeout=self.timeout)
+        if response.status_code == 401:
+            # Токен відкликано – автентифікуємось заново і повторюємо з тими самими ключами
+            token, status = await self._token(user, refresh=True)
+            if not token:
+                return None, status
+            response = await api.post("events/batch/", token=token, json=payload, timeout=self.timeout)
+        if response.status_code != 200:
+            if _rejected(response.status_code):
+                logging.warning(f"Пакет дій відхилено ({response.status_code}): {response.content[:500]!r}")
+            return None, response.status_code
+        return response.json()["results"], None
+
+    async def flush(self, limit=100):
+        """
+        Надсилає дії пакетами (до limit за раз, окремий запит для кожного користувача), доки в черзі
+        не лишаться лише дії користувачів, для яких надсилання в цьому проході не вдалося.
+        Про результат кожної надісланої дії ({"ok", "status"/"error"}) користувач отримує одне повідомлення.
+        Повертає кількість надісланих дій.
+        """
+        sent = 0
+        failed_users = set()
+        async with self._flush_lock:
+            while items := await self.pending(limit, skip_users=failed_users):
+                by_user = {}
+                for item in items:
+                    by_user.setdefault(item.user.id, []).append(item)
+
+                for user_id, user_items in by_user.items():
+                    user_results, status = await self._send(user_items[0].user, user_items)
+                    if user_results is None:
+                        failed_users.add(user_id)
+                        if _rejected(status):
+                            await self._reject(user_items, status)
+                        continue
+                    await self._remove([item.id for item in user_items])
+                    sent += len(user_items)
+                    if any(result["ok"] for result in user_results):
+                        started = any(
+                            result["ok"] and item.action == "start" for item, result in zip(user_items, user_results)
+                        )
+                        await invalidate_worker_cache(user_items[0].user, started=started)
+                    for item, result in zip(user_items, user_results):
+                        await self._notify(item, result)
+        return sent
+
+    async def _reject(self, items, status):
+        """Бекенд відхилив дії (4xx): рахуємо спробу, а після max_attempts видаляємо їх і повідомляємо"""
+        await self._count_attempt([item.id for item in items])
+        given_up = [item for item in items if item.attempts + 1 >= self.max_attempts]
+        if not given_up:
+            return
+        logging.warning(f"Дії {[item.key for item in given_up]} видалено з черги після {self.max_attempts} відмов")
+        await self._remove([item.id for item in given_up])
+        for item in given_up:
+            await self._notify(item, {"ok": False, "error": f"сервер відхилив дію (HTTP {status})."})
+
+    async def _notify(self, item, result):
+        if self.bot is None:
+            return
+        label = ACTION_LABELS[item.action]
+        at = item.at.astimezone(kyiv_tz).strftime("%d.%m %H:%M")
+        if result["ok"]:
+            text, keyboard = f"✅ Дію «{label}» від {at} збережено на сервері.", main_menu_keyboard(result["status"])
+        else:
+            text, keyboard = f"❌ Дію «{label}» від {at} не виконано: {result['error']}", None
+        try:
+            await send_throttled(item.chat_id, lambda: self.bot.send_message(item.chat_id, text, reply_markup=keyboard))
+        except TelegramAPIError as e:
+            logging.warning(f"Не вдалося повідомити {item.chat_id} про дію {item.key}: {e}")
+
+    def start(self, bot):
+        self.bot = bot
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def close(self):
+        await asyncio.to_thread(self._connection.close)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logging.exception("Помилка надсилання черги дій")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+action_queue = ActionQueue()
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import logging
+import time
+
+import aiohttp
+from multidict import CIMultiDict
+
+from bot.cache import ResponseCache
+from bot.config import API_URL, CONDITIONAL_CACHE_TTL, CONDITIONAL_CACHE_SIZE, API_TIMEOUT, API_CONNECT_TIMEOUT, API_MAX_CONNECTIONS, API_MAX_CONCURRENCY
+from bot.metrics import observe_api_call
+
+
+class ApiResponse:
+    """Відповідь бекенду, прочитана повністю (інтерфейс як у requests.Response)"""
+
+    def __init__(self, status_code, content, headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def json(self):
+        try:
+            return json.loads(self.content or b"null")
+        except ValueError:
+            return {}
+
+
+class ApiClient:
+    """
+    Асинхронний клієнт до бекенду.
+    Одна спільна aiohttp-сесія з пулом keep-alive з'єднань, таймаутом на кожен виклик
+    та обмеженням кількості одночасних запитів, щоб повільний бекенд не блокував event loop.
+    GET-відповіді з ETag запам'ятовуються, і повторний запит стає умовним (If-None-Match → 304 без тіла).
+    """
+
+    def __init__(self, base_url, timeout=API_TIMEOUT, connect_timeout=API_CONNECT_TIMEOUT,
+                 max_connections=API_MAX_CONNECTIONS, max_concurrency=API_MAX_CONCURRENCY):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session = None
+        self._validated = ResponseCache(CONDITIONAL_CACHE_TTL, CONDITIONAL_CACHE_SIZE)
+
+    def _get_session(self):
+        # Сесію створюємо ліниво, вже всередині запущеного event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def _timeout(self, timeout):
+        return aiohttp.ClientTimeout(total=timeout or self.timeout, connect=self.connect_timeout)
+
+    @staticmethod
+    def _headers(token):
+        return {"Authorization": f"Token {token}"} if token else {}
+
+    async def request(self, method, path, token=None, json=None, timeout=None, headers=None):
+        url = f"{self.base_url}{path}"
+
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                async with self._get_session().request(
+                    method, url, json=json, headers={**self._headers(token), **(headers or {})},
+                    timeout=self._timeout(timeout)
+                ) as response:
+                    content = await response.read()
+                    observe_api_call(method, path, response.status, time.perf_counter() - started)
+                    return ApiResponse(response.status, content, CIMultiDict(response.headers))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.warning(f"API {method} {path} не виконано: {e!r}")
+                observe_api_call(method, path, "error", time.perf_counter() - started)
+                # 503 – бекенд недоступний, обробники покажуть своє повідомлення про помилку
+                return ApiResponse(503, b"{}")
+
+    async def get(self, path, token=None, timeout=None):
+        key = (token, path)
+        cached = self._validated.get(key)
+        headers = {"If-None-Match": cached.headers["ETag"]} if cached else None
+
+        response = await self.request("GET", path, token=token, timeout=timeout, headers=headers)
+        if response.status_code == 304 and cached:
+            return cached
+        if response.status_code == 200 and "ETag" in response.headers:
+            self._validated.set(key, response)
+        return response
+
+    async def post(self, path, token=None, json=None, timeout=None, idempotency_key=None):
+        """idempotency_key – заголовок Idempotency-Key: повтор з тим самим ключем бекенд не виконує вдруге"""
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+        return await self.request("POST", path, token=token, json=json, timeout=timeout, headers=headers)
+
+    async def download(self, path, destination, token=None, timeout=None, chunk_size=64 * 1024):
+        """
+        Потоково записує тіло відповіді у файловий об'єкт destination частинами по chunk_size,
+        не тримаючи весь файл у пам'яті. Повертає HTTP-статус (503, якщо бекенд недоступний).
+        """
+        url = f"{self.base_url}{path}"
+
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                async with self._get_session().get(
+                    url, headers=self._headers(token), timeout=self._timeout(timeout)
+                ) as response:
+                    if response.status == 200:
+                        async for chunk in response.content.iter_chunked(chunk_size):
+                            destination.write(chunk)
+                    observe_api_call("GET", path, response.status, time.perf_counter() - started)
+                    return response.status
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.warning(f"API GET {path} не виконано: {e!r}")
+                observe_api_call("GET", path, "error", time.perf_counter() - started)
+                return 503
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+api = ApiClient(API_URL)
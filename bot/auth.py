@@ -0,0 +1,53 @@
+from bot.api import api
+from bot.cache import WORKERS_TAG, response_cache
+from bot.storage import token_storage
+
+# telegram_id -> id користувача в бекенді: потрібен для скидання кешу і тоді, коли токена вже немає
+# у сховищі (TTL); кеш відповідей теж у пам'яті процесу, тож словника в процесі достатньо
+_user_ids = {}
+
+
+async def request_token(user):
+    """Автентифікація через /api/auth/: (токен або None, HTTP-статус); токен зберігається у спільному сховищі"""
+    response = await api.post("auth/", json={"telegram_id": user.id, "username": user.username or f"user_{user.id}"})
+    if response.status_code != 200:
+        return None, response.status_code
+
+    data = response.json()
+    _user_ids[user.id] = data["user_id"]
+    await token_storage.set(user.id, {"token": data["token"], "user_id": data["user_id"], "role": data["role"]})
+    return data["token"], response.status_code
+
+
+async def authenticate(user):
+    """Автентифікація через /api/auth/; токен зберігається у спільному сховищі"""
+    token, _ = await request_token(user)
+    return token
+
+
+async def stored_auth(user):
+    """Дані автентифікації зі сховища ({"token", "user_id", "role"}) або None"""
+    auth = await token_storage.get(user.id)
+    if auth:
+        _user_ids[user.id] = auth["user_id"]
+    return auth
+
+
+async def get_token(user):
+    """Токен користувача зі сховища; якщо його немає або він прострочений – прозора повторна автентифікація"""
+    auth = await stored_auth(user)
+    if auth:
+        return auth["token"]
+    return await authenticate(user)
+
+
+async def invalidate_worker_cache(user, started=False):
+    """Скидає закешовані звіти працівника після start/pause/resume/stop, а після start – і список працівників"""
+    if started:
+        response_cache.invalidate(WORKERS_TAG)
+    user_id = _user_ids.get(user.id)
+    if user_id is None:
+        auth = await stored_auth(user)
+        user_id = auth["user_id"] if auth else None
+    if user_id is not None:
+        response_cache.invalidate(user_id)
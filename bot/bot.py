@@ -1,20 +1,109 @@
 import logging
 import asyncio
+import sys
+from urllib.parse import urlparse
+from aiohttp import web
 from aiogram import Bot, Dispatcher
-from bot.config import BOT_TOKEN
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from bot.action_queue import action_queue
+from bot.api import api
+from bot.config import (
+    API_URL, BOT_TOKEN, BOT_MODE, WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBAPP_HOST, WEBAPP_PORT,
+    TELEGRAM_API_SERVER, SCHEDULER_API_TOKEN, METRICS_PORT,
+)
 from bot.handlers import router
+from bot.metrics import HandlerMetricsMiddleware, metrics
+from bot.scheduler import SessionScheduler
+from bot.storage import fsm_storage, token_storage
 
 logging.basicConfig(level=logging.INFO)
 logging.info("Bot is starting...")
+logging.info(f"API_URL: {API_URL}")
 
-bot = Bot(token=BOT_TOKEN)
-dp = Dispatcher()
+# Для локального або фейкового Bot API сервера підміняємо адресу Telegram
+session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_SERVER)) if TELEGRAM_API_SERVER else None
+bot = Bot(token=BOT_TOKEN, session=session)
+dp = Dispatcher(storage=fsm_storage)
 
 dp.include_router(router)
 
+# Латентність кожного обробника (внутрішній middleware знає, який обробник обрано)
+dp.message.middleware(HandlerMetricsMiddleware())
+dp.callback_query.middleware(HandlerMetricsMiddleware())
+
+scheduler = SessionScheduler(bot)
+
+@dp.startup()
+async def on_startup(bot: Bot):
+    if BOT_MODE == "webhook":
+        # Кожна репліка реєструє ту саму адресу, повторний виклик нічого не змінює
+        await bot.set_webhook(f"{WEBHOOK_BASE_URL}{WEBHOOK_PATH}", secret_token=WEBHOOK_SECRET or None)
+        logging.info(f"Webhook set to {WEBHOOK_BASE_URL}{WEBHOOK_PATH}")
+    else:
+        # Polling не працює, поки встановлено webhook
+        await bot.delete_webhook()
+
+    # Дії, що лишились у черзі після перезапуску, надсилаються у фоні
+    action_queue.start(bot)
+
+    # При кількох репліках токен планувальника задається лише одній, щоб не дублювати нагадування
+    if SCHEDULER_API_TOKEN:
+        scheduler.start()
+
+@dp.shutdown()
+async def on_shutdown():
+    await scheduler.stop()
+    await action_queue.stop()
+    await action_queue.close()
+    # Закриваємо спільну HTTP-сесію до бекенду та сховища
+    await api.close()
+    await token_storage.close()
+    await fsm_storage.close()
+
+async def health(request):
+    """Перевірка стану для балансувальника навантаження"""
+    return web.json_response({"status": "ok", "mode": BOT_MODE})
+
+def check_webhook_config():
+    """Режим webhook потребує публічної https-адреси, інакше Telegram відхилить set_webhook з неочевидною помилкою"""
+    url = urlparse(WEBHOOK_BASE_URL)
+    if url.scheme != "https" or not url.netloc:
+        sys.exit(f"❌ BOT_MODE=webhook потребує WEBHOOK_BASE_URL з https-адресою бота (зараз: {WEBHOOK_BASE_URL!r}).")
+
+def create_app():
+    """aiohttp-застосунок для режиму webhook: приймає оновлення від Telegram та має /health"""
+    check_webhook_config()
+    app = web.Application()
+    app.router.add_get("/health", health)
+    app.router.add_get("/metrics", metrics)
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=WEBHOOK_SECRET or None).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    return app
+
 async def main():
+    runner = None
+    if METRICS_PORT:
+        # У режимі polling /health та /metrics віддає окремий невеликий aiohttp-сервер
+        app = web.Application()
+        app.router.add_get("/health", health)
+        app.router.add_get("/metrics", metrics)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, WEBAPP_HOST, METRICS_PORT).start()
+        logging.info(f"Metrics server on {WEBAPP_HOST}:{METRICS_PORT}")
+
     logging.info("Bot started polling...")
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        if runner is not None:
+            await runner.cleanup()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if BOT_MODE == "webhook":
+        logging.info(f"Bot started webhook server on {WEBAPP_HOST}:{WEBAPP_PORT}...")
+        web.run_app(create_app(), host=WEBAPP_HOST, port=WEBAPP_PORT)
+    else:
+        asyncio.run(main())
@@ -0,0 +1,67 @@
+import time
+from collections import OrderedDict, defaultdict
+
+from bot.config import RESPONSE_CACHE_TTL, RESPONSE_CACHE_SIZE
+
+
+# Тег списку працівників зі змінами (admin/workers/): після першого start у ньому з'являється новий працівник
+WORKERS_TAG = "workers"
+
+
+class ResponseCache:
+    """
+    TTL-кеш відповідей бекенду в пам'яті процесу бота з витісненням найдавніше використаних записів (LRU).
+    Запис можна позначити тегом (id працівника), щоб скинути всі його звіти після start/pause/resume/stop;
+    список працівників позначається тегом WORKERS_TAG і скидається після start.
+    Зміни, зроблені не через цей процес бота, стають видимими після закінчення TTL.
+    """
+
+    def __init__(self, ttl=RESPONSE_CACHE_TTL, max_entries=RESPONSE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # key -> (expires_at, value, tag)
+        self._tags = defaultdict(set)  # tag -> keys
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value, _ = item
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, tag=None):
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (time.monotonic() + self.ttl, value, tag)
+        if tag is not None:
+            self._tags[tag].add(key)
+        while len(self._data) > self.max_entries:
+            self._remove(next(iter(self._data)))
+
+    def invalidate(self, tag):
+        """Видаляє всі записи з тегом tag"""
+        for key in list(self._tags.pop(tag, ())):
+            self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+        self._tags.clear()
+
+    def _remove(self, key):
+        _, _, tag = self._data.pop(key)
+        if tag is not None:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def __len__(self):
+        return len(self._data)
+
+
+response_cache = ResponseCache()
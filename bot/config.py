@@ -4,6 +4,63 @@ import os
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "7884553220:AAG4MquIKRujYaaAhtG0EuZDta6qGFqL0s")
 API_URL = os.getenv("API_URL", "https://profound-wholeness-production-b760.up.railway.app/api/")
 
-# Вивід для перевірки
-print(f"API_URL: {API_URL}")  
-print(f"Telegram Bot Token: {BOT_TOKEN}")  # Дебаг
+# Налаштування HTTP-клієнта до бекенду (секунди / кількість з'єднань)
+API_TIMEOUT = float(os.getenv("API_TIMEOUT", "10"))
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "3"))
+API_MAX_CONNECTIONS = int(os.getenv("API_MAX_CONNECTIONS", "50"))
+API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "50"))
+
+# Режим отримання оновлень: "polling" (за замовчуванням) або "webhook"
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+
+# Webhook: публічна адреса, шлях, секрет (заголовок X-Telegram-Bot-Api-Secret-Token) та адреса aiohttp-сервера
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBAPP_HOST = os.getenv("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = int(os.getenv("PORT", "8080"))
+
+# Альтернативний Bot API сервер (локальний або фейковий для тестів), напр. http://localhost:8081
+TELEGRAM_API_SERVER = os.getenv("TELEGRAM_API_SERVER", "")
+
+# Сховище токенів та FSM-станів: memory://, sqlite:///bot.sqlite3 або redis://localhost:6379/0
+STORAGE_URL = os.getenv("STORAGE_URL", "memory://")
+TOKEN_TTL = int(os.getenv("TOKEN_TTL", str(7 * 24 * 3600)))
+FSM_TTL = int(os.getenv("FSM_TTL", str(24 * 3600)))
+
+# Кеш звітних відповідей у процесі бота: час життя (секунди) та максимальна кількість записів
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+
+# Відповіді з ETag для умовних запитів (If-None-Match): час життя (секунди) та кількість записів
+CONDITIONAL_CACHE_TTL = int(os.getenv("CONDITIONAL_CACHE_TTL", str(24 * 3600)))
+CONDITIONAL_CACHE_SIZE = int(os.getenv("CONDITIONAL_CACHE_SIZE", "2000"))
+
+# Надсилання довгих звітів: ліміти повідомлень (на секунду) і довжина, після якої звіт іде файлом
+CHAT_MESSAGE_RATE = float(os.getenv("CHAT_MESSAGE_RATE", "1"))
+CHAT_MESSAGE_BURST = int(os.getenv("CHAT_MESSAGE_BURST", "3"))
+GLOBAL_MESSAGE_RATE = float(os.getenv("GLOBAL_MESSAGE_RATE", "25"))
+MESSAGE_FILE_THRESHOLD = int(os.getenv("MESSAGE_FILE_THRESHOLD", str(4 * 4096)))
+
+# Excel-звіт формується на бекенді у фоні: як часто перевіряти готовність і скільки чекати (секунди)
+EXPORT_POLL_INTERVAL = float(os.getenv("EXPORT_POLL_INTERVAL", "2"))
+EXPORT_WAIT_TIMEOUT = float(os.getenv("EXPORT_WAIT_TIMEOUT", "300"))
+
+# Планувальник незавершених змін (вмикається, якщо задано токен службового адміністратора):
+# інтервал сканування, через скільки секунд від початку зміни нагадувати і коли завершувати автоматично
+SCHEDULER_API_TOKEN = os.getenv("SCHEDULER_API_TOKEN", "")
+SCHEDULER_INTERVAL = int(os.getenv("SCHEDULER_INTERVAL", "300"))
+SCHEDULER_BATCH_SIZE = int(os.getenv("SCHEDULER_BATCH_SIZE", "20"))
+SESSION_REMIND_AFTER = int(os.getenv("SESSION_REMIND_AFTER", str(10 * 3600)))
+SESSION_AUTO_CLOSE_AFTER = int(os.getenv("SESSION_AUTO_CLOSE_AFTER", str(16 * 3600)))
+
+# Локальна черга дій зі зміною (файл SQLite): як часто повторювати надсилання (секунди),
+# таймаут одного запиту з пакетом дій до бекенду та скільки разів повторювати дії,
+# які бекенд відхиляє (4xx), перш ніж відмовитися від них і повідомити користувача
+ACTION_QUEUE_PATH = os.getenv("ACTION_QUEUE_PATH", "actions.sqlite3")
+ACTION_FLUSH_INTERVAL = float(os.getenv("ACTION_FLUSH_INTERVAL", "5"))
+ACTION_FLUSH_TIMEOUT = float(os.getenv("ACTION_FLUSH_TIMEOUT", "3"))
+ACTION_MAX_ATTEMPTS = int(os.getenv("ACTION_MAX_ATTEMPTS", "5"))
+
+# Порт /health та /metrics у режимі polling (0 – вимкнено; у режимі webhook вони на WEBAPP_PORT)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
@@ -1,6 +1,9 @@
+import asyncio
 from datetime import datetime
+import logging
+import os
+import tempfile
 
-import requests
 import pytz
 
 from aiogram import F, Router, types
@@ -9,13 +12,45 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup, FSInputFile
 
-from bot.config import API_URL
+from bot.action_queue import ACTION_LABELS, action_queue
+from bot.api import api
+from bot.auth import authenticate, get_token
+from bot.cache import WORKERS_TAG, response_cache
+from bot.config import EXPORT_POLL_INTERVAL, EXPORT_WAIT_TIMEOUT
+from bot.keyboards import main_menu_keyboard, sessions_page_keyboard
+from bot.messaging import answer_long, split_days
 
 router = Router()
-user_tokens = {}
 
 kyiv_tz = pytz.timezone("Europe/Kyiv")
 
+async def current_status(token):
+    """Статус зміни з /api/me/state/ для вибору клавіатури ("none", якщо бекенд недоступний)"""
+    response = await api.get("me/state/", token=token)
+    if response.status_code != 200:
+        return "none"
+    return response.json().get("status", "none")
+
+
+async def cached_get(user, path, token, tag=None):
+    """
+    GET звітного ендпоінта через кеш бота; ключ – (користувач, шлях), тег – id працівника зі звіту
+    (WORKERS_TAG для списку працівників)
+    """
+    key = (user.id, path)
+    response = response_cache.get(key)
+    if response is None:
+        response = await api.get(path, token=token)
+        if response.status_code == 200:
+            response_cache.set(key, response, tag=tag)
+    return response
+
+
+WORKERS_PAGE_SIZE = 20
+NEXT_WORKERS_BUTTON = "➡️ Наступні працівники"
+FIRST_WORKERS_BUTTON = "⏮ Перші працівники"
+
+
 class ReportState(StatesGroup):
     choosing_worker = State()
     choosing_year = State()
@@ -24,23 +59,10 @@ class ReportState(StatesGroup):
 
 @router.message(Command("start"))
 async def start(message: types.Message):
-    telegram_id = message.from_user.id
-    username = message.from_user.username or f"user_{telegram_id}"
+    token = await authenticate(message.from_user)
 
-    response = requests.post(f"{API_URL}auth/", json={"telegram_id": telegram_id, "username": username})
-
-    if response.status_code == 200:
-        data = response.json()
-        user_tokens[telegram_id] = data["token"]
-
-        keyboard = ReplyKeyboardMarkup(
-            keyboard=[
-                [KeyboardButton(text="▶️ Почати роботу")],
-                [KeyboardButton(text="📊 Мої години")],
-                [KeyboardButton(text="📋 Звіт")]
-            ],
-            resize_keyboard=True
-        )
+    if token:
+        keyboard = main_menu_keyboard(await current_status(token))
 
         await message.answer(
             "🍰 Вітаємо в DESSEE!\n\n"
@@ -58,118 +80,53 @@ async def start(message: types.Message):
         await message.answer("❌ Помилка автентифікації.")
 
 
-@router.message(Command("start_work"))
-async def start_work(message: types.Message):
-    telegram_id = message.from_user.id
-    token = user_tokens.get(telegram_id)
+# Стан, у який зміна перейде після дії (для клавіатури, поки дія чекає в черзі)
+EXPECTED_STATUS = {"start": "active", "pause": "paused", "resume": "active", "stop": "none"}
 
-    if not token:
-        await message.answer("❌ Будь ласка, спершу введіть /start для автентифікації.")
-        return
 
-    response = requests.post(f"{API_URL}start_work/", headers={"Authorization": f"Token {token}"})
-    data = response.json()
+async def session_action(message: types.Message, action):
+    """
+    Дія фіксується в локальній черзі з часом повідомлення Telegram, і користувач одразу отримує підтвердження.
+    Надсилає дію фоновий флашер (з ключем ідемпотентності, тож повтор не виконає її двічі)
+    і він же одним повідомленням повідомляє результат з сервера.
+    """
+    key = f"{message.chat.id}:{message.message_id}"
+    await action_queue.enqueue(message.from_user, message.chat.id, action, message.date, key)
+    action_queue.wake()
 
-    if response.status_code == 200:
-        keyboard = ReplyKeyboardMarkup(
-            keyboard=[
-                [KeyboardButton(text="⏸ Пауза"), KeyboardButton(text="🛑 Завершити")],
-                [KeyboardButton(text="📊 Мої години"), KeyboardButton(text="📋 Звіт")]
-            ],
-            resize_keyboard=True
-        )
+    at = message.date.astimezone(kyiv_tz).strftime("%H:%M")
+    await message.answer(
+        f"🕓 Дію «{ACTION_LABELS[action]}» зафіксовано о {at}. Результат надішлемо, щойно сервер її збереже.",
+        reply_markup=main_menu_keyboard(EXPECTED_STATUS[action])
+    )
 
-        await message.answer("✅ Роботу розпочато! Гарного дня!🌞", reply_markup=keyboard)
-    else:
-        await message.answer(data.get("error", "❌ Помилка: неможливо розпочати зміну."))
+
+@router.message(Command("start_work"))
+async def start_work(message: types.Message):
+    await session_action(message, "start")
 
 @router.message(Command("pause_work"))
 async def pause_work(message: types.Message):
-    telegram_id = message.from_user.id
-    token = user_tokens.get(telegram_id)
-
-    if not token:
-        await message.answer("❌ Будь ласка, спершу введіть /start для автентифікації.")
-        return
-
-    response = requests.post(f"{API_URL}pause_work/", headers={"Authorization": f"Token {token}"})
-    data = response.json()
-
-    if response.status_code == 200:
-        keyboard = ReplyKeyboardMarkup(
-            keyboard=[
-                [KeyboardButton(text="▶️ Відновити"), KeyboardButton(text="🛑 Завершити")],
-                [KeyboardButton(text="📊 Мої години"), KeyboardButton(text="📋 Звіт")]
-            ],
-            resize_keyboard=True
-        )
-
-        await message.answer("⏸ Робота поставлена на паузу!", reply_markup=keyboard)
-    else:
-        await message.answer(data.get("error", "❌ Помилка: немає активної сесії."))
+    await session_action(message, "pause")
 
 @router.message(Command("resume_work"))
 async def resume_work(message: types.Message):
-    telegram_id = message.from_user.id
-    token = user_tokens.get(telegram_id)
-
-    if not token:
-        await message.answer("❌ Будь ласка, спершу введіть /start для автентифікації.")
-        return
-
-    response = requests.post(f"{API_URL}resume_work/", headers={"Authorization": f"Token {token}"})
-    data = response.json()
-
-    if response.status_code == 200:
-        keyboard = ReplyKeyboardMarkup(
-            keyboard=[
-                [KeyboardButton(text="⏸ Пауза"), KeyboardButton(text="🛑 Завершити")],
-                [KeyboardButton(text="📊 Мої години"), KeyboardButton(text="📋 Звіт")]
-            ],
-            resize_keyboard=True
-        )
-
-        await message.answer("▶️ Робота відновлена!", reply_markup=keyboard)
-    else:
-        await message.answer(data.get("error", "❌ Помилка: немає сесії на паузі."))
+    await session_action(message, "resume")
 
 @router.message(Command("stop_work"))
 async def stop_work(message: types.Message):
-    telegram_id = message.from_user.id
-    token = user_tokens.get(telegram_id)
-
-    if not token:
-        await message.answer("❌ Будь ласка, спершу введіть /start для автентифікації.")
-        return
-
-    response = requests.post(f"{API_URL}stop_work/", headers={"Authorization": f"Token {token}"})
-    data = response.json()
-
-    if response.status_code == 200:
-        keyboard = ReplyKeyboardMarkup(
-            keyboard=[
-                [KeyboardButton(text="▶️ Почати роботу")],
-                [KeyboardButton(text="📊 Мої години")],
-                [KeyboardButton(text="📋 Звіт")]
-            ],
-            resize_keyboard=True
-        )
-
-        await message.answer("✅ Робоча зміна завершена! Дякуємо за роботу!", reply_markup=keyboard)
-    else:
-        await message.answer(data.get("error", "❌ Помилка: немає активної зміни."))
+    await session_action(message, "stop")
 
 
 @router.message(Command("my_hours"))
 async def my_hours(message: types.Message):
-    telegram_id = message.from_user.id
-    token = user_tokens.get(telegram_id)
+    token = await get_token(message.from_user)
 
     if not token:
-        await message.answer("❌ Будь ласка, спершу введіть /start для автентифікації.")
+        await message.answer("❌ Помилка автентифікації. Спробуйте пізніше або введіть /start.")
         return
 
-    response = requests.get(f"{API_URL}my_hours/", headers={"Authorization": f"Token {token}"})
+    response = await api.get("my_hours/", token=token)
     data = response.json()
 
     if response.status_code == 200:
@@ -177,35 +134,6 @@ async def my_hours(message: types.Message):
             await message.answer(data["error"])
             return
 
-        summary = data["summary"]
-        days_list = "\n".join(data["days"])
-
-        keyboard = ReplyKeyboardMarkup(
-            keyboard=[[KeyboardButton(text="⏪ Попередній місяць")]],
-            resize_keyboard=True
-        )
-
-        await message.answer(f"{summary}\n\n{days_list}", reply_markup=keyboard)
-    else:
-        await message.answer("❌ Помилка отримання годин.")@router.message(Command("my_hours"))
-async def my_hours(message: types.Message):
-    telegram_id = message.from_user.id
-    token = user_tokens.get(telegram_id)
-
-    if not token:
-        await message.answer("❌ Будь ласка, спершу введіть /start для автентифікації.")
-        return
-
-    response = requests.get(f"{API_URL}my_hours/", headers={"Authorization": f"Token {token}"})
-    data = response.json()
-
-    if response.status_code == 200:
-        if "error" in data:
-            await message.answer(data["error"])
-            return
-
-        summary = data["summary"]
-        days_list = "\n".join(data["days"])
 
         keyboard = ReplyKeyboardMarkup(
             keyboard=[
@@ -214,75 +142,44 @@ async def my_hours(message: types.Message):
             resize_keyboard=True
         )
 
-        await message.answer(f"{summary}\n\n{days_list}", reply_markup=keyboard)
+        # Дні не розриваються між повідомленнями, дуже довгий список надсилається файлом
+        await answer_long(message, [f"{data['summary']}\n", *data["days"]], reply_markup=keyboard,
+                          filename="мої_години.txt")
     else:
         await message.answer("❌ Помилка отримання годин.")
 
 @router.message(F.text == "⬅️ Назад")
 async def go_back(message: types.Message):
-    telegram_id = message.from_user.id
-    token = user_tokens.get(telegram_id)
+    token = await get_token(message.from_user)
 
     if not token:
-        await message.answer("❌ Будь ласка, спершу введіть /start для автентифікації.")
+        await message.answer("❌ Помилка автентифікації. Спробуйте пізніше або введіть /start.")
         return
 
-    response = requests.get(f"{API_URL}active_session/", headers={"Authorization": f"Token {token}"})
-    data = response.json()
-
-    if response.status_code == 200 and data.get("active", False):
-        keyboard = ReplyKeyboardMarkup(
-            keyboard=[
-                [KeyboardButton(text="⏸ Пауза"), KeyboardButton(text="🛑 Завершити")],
-                [KeyboardButton(text="📊 Мої години")],
-                [KeyboardButton(text="📋 Звіт")]
-            ],
-            resize_keyboard=True
-        )
-    else:
-        keyboard = ReplyKeyboardMarkup(
-            keyboard=[
-                [KeyboardButton(text="▶️ Почати роботу")],
-                [KeyboardButton(text="📊 Мої години")],
-                [KeyboardButton(text="📋 Звіт")]
-            ],
-            resize_keyboard=True
-        )
-
-    await message.answer("🔙 Повернення в головне меню:", reply_markup=keyboard)
+    await message.answer("🔙 Повернення в головне меню:", reply_markup=main_menu_keyboard(await current_status(token)))
 
 @router.message(ReportState.choosing_worker)
 async def handle_worker_choice(message: types.Message, state: FSMContext):
     # Якщо натиснуто кнопку повернення ("⬅️ Назад" або "все")
     if message.text in ["В головне меню"]:
         await state.clear()  # Очищення/скидання стану
-        telegram_id = message.from_user.id
-        token = user_tokens.get(telegram_id)
+        token = await get_token(message.from_user)
         if not token:
-            await message.answer("❌ Будь ласка, спершу введіть /start для автентифікації.")
+            await message.answer("❌ Помилка автентифікації. Спробуйте пізніше або введіть /start.")
             return
 
-        response = requests.get(f"{API_URL}active_session/", headers={"Authorization": f"Token {token}"})
-        data = response.json()
-        if response.status_code == 200 and data.get("active", False):
-            keyboard = ReplyKeyboardMarkup(
-                keyboard=[
-                    [KeyboardButton(text="⏸ Пауза"), KeyboardButton(text="🛑 Завершити")],
-                    [KeyboardButton(text="📊 Мої години")],
-                    [KeyboardButton(text="📋 Звіт")]
-                ],
-                resize_keyboard=True
-            )
-        else:
-            keyboard = ReplyKeyboardMarkup(
-                keyboard=[
-                    [KeyboardButton(text="▶️ Почати роботу")],
-                    [KeyboardButton(text="📊 Мої години")],
-                    [KeyboardButton(text="📋 Звіт")]
-                ],
-                resize_keyboard=True
-            )
-        await message.answer("🔙 Повернення в головне меню:", reply_markup=keyboard)
+        await message.answer("🔙 Повернення в головне меню:", reply_markup=main_menu_keyboard(await current_status(token)))
+        return
+
+    # Гортання списку працівників
+    if message.text in [NEXT_WORKERS_BUTTON, FIRST_WORKERS_BUTTON]:
+        token = await get_token(message.from_user)
+        if not token:
+            await message.answer("❌ Помилка автентифікації. Спробуйте пізніше або введіть /start.")
+            return
+        data = await state.get_data()
+        after = data.get("workers_next") if message.text == NEXT_WORKERS_BUTTON else 0
+        await show_workers_page(message, state, token, after or 0)
         return
 
     # Якщо натиснуто кнопку з ім'ям працівника, отримуємо дані стану
@@ -293,9 +190,8 @@ async def handle_worker_choice(message: types.Message, state: FSMContext):
         return
 
     # Якщо працівника знайдено – переходимо до вибору року
-    telegram_id = message.from_user.id
-    token = user_tokens.get(telegram_id)
-    response = requests.get(f"{API_URL}admin/years/{worker['id']}/", headers={"Authorization": f"Token {token}"})
+    token = await get_token(message.from_user)
+    response = await cached_get(message.from_user, f"admin/years/{worker['id']}/", token, worker["id"])
     if response.status_code == 200 and response.json():
         years = response.json()
         keyboard = ReplyKeyboardMarkup(
@@ -308,24 +204,25 @@ async def handle_worker_choice(message: types.Message, state: FSMContext):
     else:
         await message.answer("❌ Немає даних за жоден рік.")
 
-@router.message(Command("report"))
-async def start_report(message: types.Message, state: FSMContext):
-    telegram_id = message.from_user.id
-    token = user_tokens.get(telegram_id)
-
-    if not token:
-        await message.answer("❌ Будь ласка, спершу введіть /start для автентифікації.")
-        return
-
-    response = requests.get(f"{API_URL}admin/workers/", headers={"Authorization": f"Token {token}"})
-    if response.status_code == 200 and response.json():
-        workers = response.json()
+async def show_workers_page(message: types.Message, state: FSMContext, token, after=0):
+    """Сторінка списку працівників (admin/workers/?limit=&after=) з кнопками гортання"""
+    path = f"admin/workers/?limit={WORKERS_PAGE_SIZE}&after={after}"
+    response = await cached_get(message.from_user, path, token, WORKERS_TAG)
+    if response.status_code == 200 and response.json()["results"]:
+        data = response.json()
+        workers = data["results"]
+        paging = []
+        if after:
+            paging.append(KeyboardButton(text=FIRST_WORKERS_BUTTON))
+        if data["next"] is not None:
+            paging.append(KeyboardButton(text=NEXT_WORKERS_BUTTON))
         keyboard = ReplyKeyboardMarkup(
-            keyboard=[[KeyboardButton(text=worker["name"])] for worker in workers] + [[KeyboardButton(text="В головне меню")]],
+            keyboard=[[KeyboardButton(text=worker["name"])] for worker in workers]
+                     + ([paging] if paging else []) + [[KeyboardButton(text="В головне меню")]],
             resize_keyboard=True,
         )
         await state.set_state(ReportState.choosing_worker)
-        await state.update_data(workers=workers)
+        await state.update_data(workers=workers, workers_next=data["next"])
         await message.answer("👤 Оберіть працівника:", reply_markup=keyboard)
     else:
         try:
@@ -335,6 +232,16 @@ async def start_report(message: types.Message, state: FSMContext):
             error = "❌ Немає доступних працівників."
         await message.answer(error)
 
+@router.message(Command("report"))
+async def start_report(message: types.Message, state: FSMContext):
+    token = await get_token(message.from_user)
+
+    if not token:
+        await message.answer("❌ Помилка автентифікації. Спробуйте пізніше або введіть /start.")
+        return
+
+    await show_workers_page(message, state, token)
+
 @router.message(ReportState.choosing_worker)
 async def choose_year(message: types.Message, state: FSMContext):
     data = await state.get_data()
@@ -344,10 +251,9 @@ async def choose_year(message: types.Message, state: FSMContext):
         await message.answer("❌ Невірний вибір, спробуйте ще раз.")
         return
 
-    telegram_id = message.from_user.id
-    token = user_tokens.get(telegram_id)
+    token = await get_token(message.from_user)
 
-    response = requests.get(f"{API_URL}admin/years/{worker['id']}/", headers={"Authorization": f"Token {token}"})
+    response = await cached_get(message.from_user, f"admin/years/{worker['id']}/", token, worker["id"])
     if response.status_code == 200 and response.json():
         years = response.json()
         keyboard = ReplyKeyboardMarkup(
@@ -366,10 +272,9 @@ async def choose_month(message: types.Message, state: FSMContext):
     data = await state.get_data()
     worker, year = data["worker"], message.text
 
-    telegram_id = message.from_user.id
-    token = user_tokens.get(telegram_id)
+    token = await get_token(message.from_user)
 
-    response = requests.get(f"{API_URL}admin/months/{worker['id']}/{year}/", headers={"Authorization": f"Token {token}"})
+    response = await cached_get(message.from_user, f"admin/months/{worker['id']}/{year}/", token, worker["id"])
     if response.status_code == 200 and response.json():
         months = response.json()
         keyboard = ReplyKeyboardMarkup(
@@ -394,10 +299,9 @@ async def show_report(message: types.Message, state: FSMContext):
         await message.answer("❌ Сталася помилка. Спробуйте ще раз.")
         return
 
-    telegram_id = message.from_user.id
-    token = user_tokens.get(telegram_id)
+    token = await get_token(message.from_user)
 
-    response = requests.get(f"{API_URL}admin/report/{worker['id']}/{year}/{month}/", headers={"Authorization": f"Token {token}"})
+    response = await cached_get(message.from_user, f"admin/report/{worker['id']}/{year}/{month}/", token, worker["id"])
 
     temp_data = {"year": year, "month": month}
 
@@ -417,10 +321,62 @@ async def show_report(message: types.Message, state: FSMContext):
             resize_keyboard=True
         )
 
-        await message.answer(report, reply_markup=keyboard)
+        await answer_long(message, split_days(report), reply_markup=keyboard,
+                          filename=f"звіт_{worker['name']}_{month}_{year}.txt")
     else:
         await message.answer("❌ Помилка отримання звіту.")
 
+SESSIONS_PAGE_SIZE = 10
+
+
+async def sessions_page(token, cursor=None):
+    """Текст і кнопки однієї сторінки /api/admin/sessions/ (None, якщо сторінку отримати не вдалося)"""
+    path = f"admin/sessions/?limit={SESSIONS_PAGE_SIZE}&fields=user_name,start_time,end_time,work_seconds"
+    if cursor:
+        path += f"&cursor={cursor}"
+
+    response = await api.get(path, token=token)
+    if response.status_code != 200:
+        return None, None
+    data = response.json()
+
+    lines = []
+    for session in data["results"]:
+        start = datetime.fromisoformat(session["start_time"]).astimezone(kyiv_tz)
+        end = datetime.fromisoformat(session["end_time"]).astimezone(kyiv_tz).strftime("%H:%M") if session["end_time"] else "Ще триває"
+        hours, minutes = divmod(session["work_seconds"] // 60, 60)
+        lines.append(f"👤 {session['user_name']}\n📅 {start.strftime('%d.%m.%Y')} 🕒 {start.strftime('%H:%M')} - {end} ({hours} год {minutes} хв)")
+
+    text = "\n\n".join(lines) or "📊 Змін ще немає."
+    return f"📋 Зміни працівників:\n\n{text}", sessions_page_keyboard(data["prev"], data["next"])
+
+
+@router.message(Command("sessions"))
+async def list_sessions(message: types.Message):
+    token = await get_token(message.from_user)
+
+    if not token:
+        await message.answer("❌ Помилка автентифікації. Спробуйте пізніше або введіть /start.")
+        return
+
+    text, keyboard = await sessions_page(token)
+    if text is None:
+        await message.answer("❌ Помилка отримання змін.")
+        return
+    await message.answer(text, reply_markup=keyboard)
+
+
+@router.callback_query(F.data.startswith("sessions:"))
+async def page_sessions(callback: types.CallbackQuery):
+    token = await get_token(callback.from_user)
+    text, keyboard = await sessions_page(token, callback.data.split(":", 1)[1]) if token else (None, None)
+
+    if text is None:
+        await callback.answer("❌ Помилка отримання змін.", show_alert=True)
+        return
+    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.answer()
+
 @router.message(F.text == "▶️ Почати роботу")
 async def button_start_work(message: types.Message):
     await start_work(message)
@@ -445,56 +401,68 @@ async def button_my_hours(message: types.Message):
 async def button_report(message: types.Message, state: FSMContext):
     await start_report(message, state)
 
+async def wait_for_export(job_id, token):
+    """Опитує статус завдання експорту, доки воно не завершиться або не мине EXPORT_WAIT_TIMEOUT"""
+    deadline = asyncio.get_running_loop().time() + EXPORT_WAIT_TIMEOUT
+    while asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(EXPORT_POLL_INTERVAL)
+        response = await api.get(f"admin/export_jobs/{job_id}/", token=token)
+        if response.status_code == 200 and response.json()["status"] in ("done", "failed"):
+            return response.json()
+    return None
+
 @router.message(F.text == "📥 Завантажити Excel")
 async def download_excel_report(message: types.Message, state: FSMContext):
     data = await state.get_data()
     year, month = data.get("year"), data.get("month")
 
-    print(f"DEBUG: Year={year}, Month={month}")
+    logging.debug(f"Excel-звіт: year={year}, month={month}")
 
     if not year or not month:
         await message.answer("❌ Спершу оберіть рік і місяць для звіту.")
         return
 
-    telegram_id = message.from_user.id
-    token = user_tokens.get(telegram_id)
+    token = await get_token(message.from_user)
 
     if not token:
-        await message.answer("❌ Будь ласка, спершу введіть /start для автентифікації.")
+        await message.answer("❌ Помилка автентифікації. Спробуйте пізніше або введіть /start.")
         return
 
-    file_url = f"{API_URL}admin/export_excel/{year}/{month}/"
-    headers = {"Authorization": f"Token {token}"}
-
-    print(f"DEBUG: Запит до {file_url} з headers={headers}")  # Лог запиту
-
-    response = requests.get(file_url, headers=headers)
-
-    print(f"DEBUG: Статус код = {response.status_code}")
+    # Файл формується на бекенді у фоні: ставимо завдання і чекаємо, поки воно буде готове
+    response = await api.post("admin/export_jobs/", token=token, json={"year": int(year), "month": int(month)})
+    if response.status_code == 429:
+        await message.answer(response.json().get("error", "⏳ Зараз формується забагато звітів, спробуйте за хвилину."))
+        return
+    if response.status_code not in (200, 202):
+        await message.answer("❌ Не вдалося отримати файл.")
+        return
 
-    if response.status_code == 200:
-        file_path = f"звіт_годин_за_{month}_{year}.xlsx"
+    job = response.json()
+    if job["status"] != "done":
+        progress = await message.answer("⏳ Формуємо звіт…")
+        job = await wait_for_export(job["job_id"], token)
+        await progress.delete()
+    if not job or job["status"] != "done":
+        await message.answer("❌ Не вдалося сформувати звіт. Спробуйте пізніше.")
+        return
 
-        with open(file_path, "wb") as file:
-            file.write(response.content)
+    # Файл завантажується потоково у тимчасовий файл, а не збирається в пам'яті
+    with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as file:
+        status_code = await api.download(f"admin/export_jobs/{job['job_id']}/download/", file, token=token, timeout=120)
 
-        print(f"DEBUG: Файл збережено як {file_path}")
+    logging.debug(f"Excel-звіт {job['job_id']}: статус завантаження {status_code}")
 
-        import os
-        if os.path.exists(file_path):
-            print(f"DEBUG: Файл {file_path} існує, пробуємо відправити")
-        else:
-            print(f"ERROR: Файл {file_path} не знайдено!")
-            await message.answer("❌ Помилка: Файл не знайдено після завантаження.")
+    try:
+        if status_code != 200:
+            await message.answer("❌ Не вдалося отримати файл.")
             return
 
         # Відправляємо файл в Telegram через FSInputFile
         try:
-            document = FSInputFile(file_path)  # Ось тут ми правильно передаємо файл
+            document = FSInputFile(file.name, filename=f"звіт_годин_за_{month}_{year}.xlsx")
             await message.answer_document(document)
-            print("DEBUG: Файл успішно надіслано у Telegram")
         except Exception as e:
-            print(f"ERROR: Не вдалося відправити файл. Помилка: {e}")
+            logging.exception("Не вдалося відправити файл звіту")
             await message.answer(f"❌ Помилка відправлення файлу: {e}")
-    else:
-        await message.answer("❌ Не вдалося отримати файл.")
\ No newline at end of file
+    finally:
+        os.remove(file.name)
@@ -0,0 +1,29 @@
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup
+
+
+def main_menu_keyboard(status="none"):
+    """Головне меню за станом зміни з /api/me/state/: none – зміни немає, active – триває, paused – на паузі"""
+    if status == "active":
+        shift_row = [KeyboardButton(text="⏸ Пауза"), KeyboardButton(text="🛑 Завершити")]
+    elif status == "paused":
+        shift_row = [KeyboardButton(text="▶️ Відновити"), KeyboardButton(text="🛑 Завершити")]
+    else:
+        shift_row = [KeyboardButton(text="▶️ Почати роботу")]
+
+    return ReplyKeyboardMarkup(
+        keyboard=[
+            shift_row,
+            [KeyboardButton(text="📊 Мої години"), KeyboardButton(text="📋 Звіт")]
+        ],
+        resize_keyboard=True
+    )
+
+
+def sessions_page_keyboard(prev_cursor=None, next_cursor=None):
+    """Кнопки гортання списку змін; курсор передається в callback_data (sessions:<курсор>)"""
+    buttons = []
+    if prev_cursor:
+        buttons.append(InlineKeyboardButton(text="⬅️ Новіші", callback_data=f"sessions:{prev_cursor}"))
+    if next_cursor:
+        buttons.append(InlineKeyboardButton(text="Старіші ➡️", callback_data=f"sessions:{next_cursor}"))
+    return InlineKeyboardMarkup(inline_keyboard=[buttons]) if buttons else None
@@ -0,0 +1,150 @@
+"""
+Надсилання довгих звітів у Telegram.
+Текст ділиться на повідомлення до 4096 символів по межах днів, відправка обмежується token bucket
+на кожен чат (і загальним на бота), а надто довгий звіт надсилається одним текстовим файлом.
+"""
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.types import BufferedInputFile
+
+from bot.config import CHAT_MESSAGE_RATE, CHAT_MESSAGE_BURST, GLOBAL_MESSAGE_RATE, MESSAGE_FILE_THRESHOLD
+
+MESSAGE_LIMIT = 4096
+CAPTION_LIMIT = 1024
+
+
+class TokenBucket:
+    """Не більше rate повідомлень на секунду в середньому з можливим сплеском до capacity"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                current = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (current - self.updated) * self.rate)
+                self.updated = current
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ChatThrottle:
+    """Token bucket на кожен чат (ліміт Telegram ~1 повідомлення/с у чаті) плюс загальний ~30/с на бота"""
+
+    def __init__(self, chat_rate=CHAT_MESSAGE_RATE, chat_burst=CHAT_MESSAGE_BURST,
+                 global_rate=GLOBAL_MESSAGE_RATE, max_chats=10000):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_chats = max_chats
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chats = OrderedDict()
+
+    async def acquire(self, chat_id):
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+            if len(self._chats) > self.max_chats:
+                self._chats.popitem(last=False)
+        self._chats.move_to_end(chat_id)
+        await bucket.acquire()
+        await self._global.acquire()
+
+
+throttle = ChatThrottle()
+
+
+def text_length(text):
+    """Довжина так, як її рахує Telegram (у кодових одиницях UTF-16: емодзі займають 2)"""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def split_days(report):
+    """Ділить текст звіту на блоки, кожен з яких починається з рядка дня "📅 ..." (перший блок – заголовок)"""
+    return [block for block in re.split(r"\n(?=📅 )", report.strip()) if block]
+
+
+def _hard_split(block, limit):
+    """Блок, що сам не вміщується в повідомлення: по рядках, а надто довгий рядок – по символах"""
+    chunk = ""
+    for line in block.split("\n"):
+        while text_length(line) > limit:
+            cut = limit
+            while text_length(line[:cut]) > limit:
+                cut -= 1
+            if chunk:
+                yield chunk
+                chunk = ""
+            yield line[:cut]
+            line = line[cut:]
+        candidate = f"{chunk}\n{line}" if chunk else line
+        if text_length(candidate) > limit:
+            yield chunk
+            candidate = line
+        chunk = candidate
+    if chunk:
+        yield chunk
+
+
+def split_message(blocks, limit=MESSAGE_LIMIT, separator="\n"):
+    """Склеює блоки в повідомлення до limit символів, не розриваючи блок (день) між повідомленнями"""
+    chunks, current = [], ""
+    for block in blocks:
+        candidate = f"{current}{separator}{block}" if current else block
+        if text_length(candidate) <= limit:
+            current = candidate
+            continue
+        if current:
+            chunks.append(current)
+        if text_length(block) <= limit:
+            current = block
+        else:
+            *parts, current = _hard_split(block, limit)
+            chunks.extend(parts)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def send_throttled(chat_id, send):
+    """Викликає send() (корутину відправки) після дозволу token bucket чату, з одним повтором після RetryAfter"""
+    await throttle.acquire(chat_id)
+    try:
+        return await send()
+    except TelegramRetryAfter as e:
+        # Telegram все одно обмежив – чекаємо скільки сказано і пробуємо ще раз
+        logging.warning(f"Flood control у чаті {chat_id}, повтор через {e.retry_after} с")
+        await asyncio.sleep(e.retry_after)
+        return await send()
+
+
+async def answer_long(message, blocks, reply_markup=None, filename="report.txt", separator="\n"):
+    """
+    Надсилає блоки тексту відповіддю на message: кілька повідомлень по межах блоків,
+    або – якщо текст довший за MESSAGE_FILE_THRESHOLD – один файл з першим блоком як підписом.
+    Клавіатура додається до останнього повідомлення.
+    """
+    chat_id = message.chat.id
+    text = separator.join(blocks)
+
+    if text_length(text) > MESSAGE_FILE_THRESHOLD:
+        caption = split_message(blocks[:1], CAPTION_LIMIT)[0] if blocks else None
+        document = BufferedInputFile(text.encode("utf-8"), filename=filename)
+        await send_throttled(chat_id, lambda: message.answer_document(document, caption=caption, reply_markup=reply_markup))
+        return
+
+    chunks = split_message(blocks, separator=separator)
+    for i, chunk in enumerate(chunks):
+        markup = reply_markup if i == len(chunks) - 1 else None
+        await send_throttled(chat_id, lambda: message.answer(chunk, reply_markup=markup))
@@ -0,0 +1,93 @@
+"""
+Метрики бота у текстовому форматі Prometheus: латентність обробників aiogram та викликів бекенду.
+Віддаються на /metrics aiohttp-сервера (webhook-режим або METRICS_PORT у режимі polling).
+"""
+import json
+import logging
+import re
+import time
+
+from aiogram import BaseMiddleware
+from aiohttp import web
+
+logger = logging.getLogger("bot.requests")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Histogram:
+    """Гістограма з мітками: накопичувальні лічильники по кошиках, сума та кількість спостережень"""
+
+    def __init__(self, name, help_text, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # значення міток -> ([лічильники кошиків..., +Inf], сума)
+
+    def observe(self, value, *label_values):
+        # Event loop однопотоковий, блокування не потрібне.
+        # Мітки – рядки: статус буває і числом (HTTP), і "error", а ряди сортуються при виводі
+        label_values = tuple(str(value) for value in label_values)
+        counts, total = self._series.get(label_values, ([0] * (len(self.buckets) + 1), 0))
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        counts[-1] += 1
+        self._series[label_values] = (counts, total + value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total) in sorted(self._series.items()):
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.labels, label_values))
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {counts[-1]}")
+        return "\n".join(lines)
+
+
+handler_latency = Histogram("bot_handler_duration_seconds", "Час виконання обробника", ("handler", "status"))
+api_latency = Histogram("bot_api_request_duration_seconds", "Час виклику бекенду", ("method", "endpoint", "status"))
+
+HISTOGRAMS = (handler_latency, api_latency)
+
+
+def endpoint_label(path):
+    """Шлях без query-рядка та з числами, заміненими на :id (щоб кількість рядів метрики не росла)"""
+    return re.sub(r"\d+", ":id", path.split("?", 1)[0])
+
+
+def observe_api_call(method, path, status, duration):
+    api_latency.observe(duration, method, endpoint_label(path), status)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Внутрішній middleware aiogram: латентність кожного обробника повідомлень та callback-запитів"""
+
+    async def __call__(self, handler, event, data):
+        name = data["handler"].callback.__name__ if "handler" in data else "unknown"
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            return await handler(event, data)
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            handler_latency.observe(duration, name, status)
+            logger.info(json.dumps({
+                "handler": name,
+                "status": status,
+                "duration_ms": round(duration * 1000, 1),
+                "user_id": getattr(getattr(event, "from_user", None), "id", None),
+            }, ensure_ascii=False))
+
+
+async def metrics(request):
+    """Метрики бота у форматі Prometheus"""
+    return web.Response(
+        text="\n\n".join(histogram.render() for histogram in HISTOGRAMS) + "\n",
+        content_type="text/plain", charset="utf-8", headers={"X-Content-Type-Options": "nosniff"},
+    )
@@ -0,0 +1,122 @@
+"""
+Фоновий планувальник у процесі бота: нагадує про забуті незавершені зміни і автоматично завершує їх.
+Кожне сканування – один запит до /api/admin/open_sessions/ та не більше одного /api/admin/sessions/close/,
+незалежно від кількості працівників. Працює від імені службового адміністратора (SCHEDULER_API_TOKEN).
+"""
+import asyncio
+import logging
+from datetime import datetime
+
+import pytz
+from aiogram.exceptions import TelegramAPIError
+
+from bot.api import api
+from bot.cache import response_cache
+from bot.config import (
+    SCHEDULER_API_TOKEN, SCHEDULER_INTERVAL, SCHEDULER_BATCH_SIZE, SESSION_REMIND_AFTER, SESSION_AUTO_CLOSE_AFTER,
+)
+from bot.messaging import send_throttled
+
+kyiv_tz = pytz.timezone("Europe/Kyiv")
+
+
+class SessionScheduler:
+    def __init__(self, bot, token=SCHEDULER_API_TOKEN, interval=SCHEDULER_INTERVAL,
+                 remind_after=SESSION_REMIND_AFTER, close_after=SESSION_AUTO_CLOSE_AFTER,
+                 batch_size=SCHEDULER_BATCH_SIZE):
+        self.bot = bot
+        self.token = token
+        self.interval = interval
+        self.remind_after = remind_after
+        self.close_after = close_after
+        self.batch_size = batch_size
+        self._reminded = set()  # id сесій, про які вже нагадали
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.scan()
+            except Exception:
+                logging.exception("Помилка планувальника незавершених змін")
+            await asyncio.sleep(self.interval)
+
+    async def scan(self):
+        response = await api.get(f"admin/open_sessions/?older_than={self.remind_after}", token=self.token)
+        if response.status_code != 200:
+            logging.warning(f"Планувальник: open_sessions повернув {response.status_code}")
+            return
+        sessions = response.json()
+
+        current = datetime.now(kyiv_tz)
+        to_close = [
+            s for s in sessions
+            if (current - datetime.fromisoformat(s["start_time"])).total_seconds() >= self.close_after
+        ]
+        closing_ids = {s["id"] for s in to_close}
+        to_remind = [s for s in sessions if s["id"] not in closing_ids and s["id"] not in self._reminded]
+
+        await self._notify(to_remind, self._reminder_text)
+        self._reminded.update(s["id"] for s in to_remind)
+
+        if to_close:
+            # Активна зміна завершується через remind_after від початку, зміна на паузі – в момент паузи
+            response = await api.post(
+                "admin/sessions/close/", token=self.token,
+                json={"session_ids": sorted(closing_ids), "max_duration": self.remind_after},
+            )
+            if response.status_code != 200:
+                logging.warning(f"Планувальник: sessions/close повернув {response.status_code}")
+                return
+            closed = response.json()["closed"]
+            for session in closed:
+                response_cache.invalidate(session["user_id"])
+            await self._notify(closed, self._closed_text)
+            logging.info(f"Планувальник: автоматично завершено змін: {len(closed)}")
+
+        # Пам'ятаємо лише ще відкриті сесії, щоб множина не росла
+        self._reminded &= {s["id"] for s in sessions} - closing_ids
+
+    @staticmethod
+    def _reminder_text(session):
+        start = datetime.fromisoformat(session["start_time"]).astimezone(kyiv_tz)
+        state = "на паузі" if session["status"] == "paused" else "досі триває"
+        return (
+            f"⏰ Ваша зміна, розпочата {start.strftime('%d.%m.%Y %H:%M')}, {state}.\n"
+            f"Не забудьте натиснути 🛑 Завершити, інакше її буде завершено автоматично."
+        )
+
+    @staticmethod
+    def _closed_text(session):
+        start = datetime.fromisoformat(session["start_time"]).astimezone(kyiv_tz)
+        end = datetime.fromisoformat(session["end_time"]).astimezone(kyiv_tz)
+        return (
+            f"🛑 Зміну, розпочату {start.strftime('%d.%m.%Y %H:%M')}, завершено автоматично о "
+            f"{end.strftime('%d.%m.%Y %H:%M')}. Якщо час неправильний – зверніться до адміністратора."
+        )
+
+    async def _notify(self, sessions, text):
+        """Розсилка пачками по batch_size; темп задає token bucket з bot.messaging"""
+        recipients = [s for s in sessions if s.get("telegram_id")]
+        for i in range(0, len(recipients), self.batch_size):
+            await asyncio.gather(*(self._send(s["telegram_id"], text(s)) for s in recipients[i:i + self.batch_size]))
+
+    async def _send(self, chat_id, text):
+        try:
+            await send_throttled(chat_id, lambda: self.bot.send_message(chat_id, text))
+        except TelegramAPIError as e:
+            # Користувач заблокував бота або чат недоступний – не зупиняємо розсилку
+            logging.warning(f"Не вдалося надіслати повідомлення {chat_id}: {e}")
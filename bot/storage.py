@@ -0,0 +1,208 @@
+from abc import ABC, abstractmethod
+import asyncio
+import json
+import sqlite3
+import time
+from urllib.parse import urlparse
+
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from bot.config import STORAGE_URL, TOKEN_TTL, FSM_TTL
+
+
+class TokenStorage(ABC):
+    """Сховище даних автентифікації користувачів: telegram_id -> {"token", "user_id", "role"}"""
+
+    @abstractmethod
+    async def get(self, telegram_id):
+        ...
+
+    @abstractmethod
+    async def set(self, telegram_id, data):
+        ...
+
+    @abstractmethod
+    async def delete(self, telegram_id):
+        ...
+
+    async def close(self):
+        pass
+
+
+class MemoryTokenStorage(TokenStorage):
+    """Зберігання в пам'яті процесу (лише для одного процесу, втрачається при перезапуску)"""
+
+    def __init__(self, ttl=TOKEN_TTL):
+        self.ttl = ttl
+        self._data = {}
+
+    async def get(self, telegram_id):
+        item = self._data.get(telegram_id)
+        if item is None:
+            return None
+        expires_at, data = item
+        if expires_at < time.time():
+            del self._data[telegram_id]
+            return None
+        return data
+
+    async def set(self, telegram_id, data):
+        self._data[telegram_id] = (time.time() + self.ttl, data)
+
+    async def delete(self, telegram_id):
+        self._data.pop(telegram_id, None)
+
+
+class SQLiteKV:
+    """
+    Просте key-value сховище з TTL у файлі SQLite, спільне для кількох процесів на одному сервері.
+    Запити виконуються в окремому потоці, щоб не блокувати event loop.
+    """
+
+    def __init__(self, path, table):
+        self.table = table
+        self._lock = asyncio.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        # Прострочені записи прибираємо при старті, під час роботи вони просто не читаються
+        self._connection.execute(f"DELETE FROM {table} WHERE expires_at < ?", (time.time(),))
+
+    async def _execute(self, sql, params=()):
+        async with self._lock:
+            return await asyncio.to_thread(lambda: self._connection.execute(sql, params).fetchone())
+
+    async def get(self, key):
+        row = await self._execute(
+            f"SELECT value FROM {self.table} WHERE key = ? AND expires_at >= ?", (key, time.time())
+        )
+        return json.loads(row[0]) if row else None
+
+    async def set(self, key, value, ttl):
+        await self._execute(
+            f"INSERT INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?) "
+            f"ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, json.dumps(value), time.time() + ttl),
+        )
+
+    async def delete(self, key):
+        await self._execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    async def close(self):
+        await asyncio.to_thread(self._connection.close)
+
+
+class SQLiteTokenStorage(TokenStorage):
+    def __init__(self, path, ttl=TOKEN_TTL):
+        self.ttl = ttl
+        self._kv = SQLiteKV(path, "auth_tokens")
+
+    async def get(self, telegram_id):
+        return await self._kv.get(str(telegram_id))
+
+    async def set(self, telegram_id, data):
+        await self._kv.set(str(telegram_id), data, self.ttl)
+
+    async def delete(self, telegram_id):
+        await self._kv.delete(str(telegram_id))
+
+    async def close(self):
+        await self._kv.close()
+
+
+class RedisTokenStorage(TokenStorage):
+    """Зберігання в Redis (або сумісному сервері) – спільне для всіх реплік бота"""
+
+    def __init__(self, redis, ttl=TOKEN_TTL, prefix="auth_token"):
+        self.redis = redis
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, telegram_id):
+        return f"{self.prefix}:{telegram_id}"
+
+    async def get(self, telegram_id):
+        value = await self.redis.get(self._key(telegram_id))
+        return json.loads(value) if value else None
+
+    async def set(self, telegram_id, data):
+        await self.redis.set(self._key(telegram_id), json.dumps(data), ex=self.ttl)
+
+    async def delete(self, telegram_id):
+        await self.redis.delete(self._key(telegram_id))
+
+    async def close(self):
+        await self.redis.aclose()
+
+
+class SQLiteStorage(BaseStorage):
+    """FSM-сховище aiogram у файлі SQLite (стан та дані ReportState переживають перезапуск)"""
+
+    def __init__(self, path, ttl=FSM_TTL):
+        self.ttl = ttl
+        self.key_builder = DefaultKeyBuilder(with_destiny=True)
+        self._kv = SQLiteKV(path, "fsm")
+
+    async def set_state(self, key, state=None):
+        state = state.state if hasattr(state, "state") else state
+        if state is None:
+            await self._kv.delete(self.key_builder.build(key, "state"))
+        else:
+            await self._kv.set(self.key_builder.build(key, "state"), state, self.ttl)
+
+    async def get_state(self, key):
+        return await self._kv.get(self.key_builder.build(key, "state"))
+
+    async def set_data(self, key, data):
+        if data:
+            await self._kv.set(self.key_builder.build(key, "data"), data, self.ttl)
+        else:
+            await self._kv.delete(self.key_builder.build(key, "data"))
+
+    async def get_data(self, key):
+        return await self._kv.get(self.key_builder.build(key, "data")) or {}
+
+    async def close(self):
+        await self._kv.close()
+
+
+def _redis_from_url(url):
+    try:
+        from redis.asyncio import Redis
+    except ImportError:
+        raise RuntimeError("Для STORAGE_URL=redis://... встановіть пакет redis: pip install redis")
+    return Redis.from_url(url)
+
+
+def _sqlite_path(parsed):
+    # sqlite:///bot.sqlite3 – відносний шлях, sqlite:////data/bot.sqlite3 – абсолютний
+    return parsed.path[1:]
+
+
+def create_token_storage(url=STORAGE_URL, ttl=TOKEN_TTL):
+    """Сховище токенів за STORAGE_URL: memory://, sqlite:///шлях/до/файлу або redis://хост:порт/бд"""
+    parsed = urlparse(url)
+    if parsed.scheme == "sqlite":
+        return SQLiteTokenStorage(_sqlite_path(parsed), ttl)
+    if parsed.scheme in ("redis", "rediss"):
+        return RedisTokenStorage(_redis_from_url(url), ttl)
+    return MemoryTokenStorage(ttl)
+
+
+def create_fsm_storage(url=STORAGE_URL, ttl=FSM_TTL):
+    """FSM-сховище aiogram за тим самим STORAGE_URL"""
+    parsed = urlparse(url)
+    if parsed.scheme == "sqlite":
+        return SQLiteStorage(_sqlite_path(parsed), ttl)
+    if parsed.scheme in ("redis", "rediss"):
+        redis = _redis_from_url(url)
+        from aiogram.fsm.storage.redis import RedisStorage
+        return RedisStorage(redis, state_ttl=ttl, data_ttl=ttl)
+    return MemoryStorage()
+
+
+token_storage = create_token_storage()
+fsm_storage = create_fsm_storage()
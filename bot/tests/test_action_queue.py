@@ -0,0 +1,98 @@
+import json as json_module
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+os.environ.setdefault("ACTION_QUEUE_PATH", ":memory:")
+
+from bot import action_queue as module  # noqa: E402
+from bot.action_queue import ActionQueue  # noqa: E402
+from bot.api import ApiResponse  # noqa: E402
+
+
+class FakeBackend:
+    """Відповідає на /events/batch/ за telegram_id з токена: статус або успіх для всіх подій"""
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.calls = []
+
+    async def request_token(self, user):
+        return f"token-{user.id}", 200
+
+    async def post(self, path, token=None, json=None, timeout=None):
+        user_id = int(token.split("-")[1])
+        self.calls.append(user_id)
+        status = self.statuses.get(user_id, 200)
+        if status != 200:
+            return ApiResponse(status, b'{"error": "no"}')
+        results = [{"ok": True, "status": "active"} for _ in json["events"]]
+        return ApiResponse(200, json_module.dumps({"results": results}).encode())
+
+
+class ActionQueueTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.queue = ActionQueue(path=os.path.join(self.directory.name, "actions.sqlite3"), max_attempts=3)
+        self.sent = []
+        self.queue.bot = SimpleNamespace(send_message=self.send_message)
+
+    async def asyncTearDown(self):
+        await self.queue.close()
+        self.directory.cleanup()
+
+    async def send_message(self, chat_id, text, reply_markup=None):
+        self.sent.append((chat_id, text))
+
+    async def enqueue(self, user_id, message_id):
+        user = SimpleNamespace(id=user_id, username=f"u{user_id}")
+        at = datetime(2026, 10, 18, 6, 0, tzinfo=timezone.utc)
+        await self.queue.enqueue(user, user_id, "start", at, f"{user_id}:{message_id}")
+
+    async def flush(self, backend):
+        with mock.patch.object(module, "api", backend), \
+                mock.patch.object(module, "request_token", backend.request_token), \
+                mock.patch.object(module, "stored_auth", mock.AsyncMock(return_value=None)), \
+                mock.patch.object(module, "invalidate_worker_cache", mock.AsyncMock()), \
+                mock.patch.object(module, "send_throttled", lambda chat_id, send: send()):
+            return await self.queue.flush()
+
+    async def test_failing_user_does_not_block_others(self):
+        await self.enqueue(1, 1)
+        await self.enqueue(2, 1)
+
+        sent = await self.flush(FakeBackend({1: 503}))
+
+        self.assertEqual(sent, 1)
+        self.assertEqual([item.user.id for item in await self.queue.pending()], [1])
+        self.assertEqual([chat_id for chat_id, _ in self.sent], [2])
+
+    async def test_rejected_actions_are_dropped_after_max_attempts(self):
+        await self.enqueue(1, 1)
+        backend = FakeBackend({1: 403})
+
+        for _ in range(2):
+            await self.flush(backend)
+            self.assertEqual(len(await self.queue.pending()), 1)
+        await self.flush(backend)
+
+        self.assertEqual(await self.queue.pending(), [])
+        self.assertEqual(len(self.sent), 1)
+        self.assertIn("HTTP 403", self.sent[0][1])
+
+    async def test_unavailable_backend_keeps_actions(self):
+        await self.enqueue(1, 1)
+        backend = FakeBackend({1: 503})
+
+        for _ in range(5):
+            await self.flush(backend)
+
+        self.assertEqual(len(await self.queue.pending()), 1)
+        self.assertEqual(self.sent, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
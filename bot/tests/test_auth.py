@@ -0,0 +1,37 @@
+import json
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from bot import auth
+from bot.api import ApiResponse
+from bot.cache import WORKERS_TAG, response_cache
+
+
+class InvalidateWorkerCacheTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+        self.addCleanup(auth._user_ids.clear)
+        self.user = SimpleNamespace(id=7, username="worker")
+
+    async def test_start_invalidates_reports_without_stored_token(self):
+        body = json.dumps({"token": "t", "user_id": 42, "role": "worker"}).encode()
+        storage = SimpleNamespace(set=mock.AsyncMock(), get=mock.AsyncMock(return_value=None))
+        with mock.patch.object(auth, "api", SimpleNamespace(post=mock.AsyncMock(return_value=ApiResponse(200, body)))), \
+                mock.patch.object(auth, "token_storage", storage):
+            await auth.request_token(self.user)
+            response_cache.set((1, "admin/workers/"), "workers", tag=WORKERS_TAG)
+            response_cache.set((1, "admin/years/42/"), "years", tag=42)
+            response_cache.set((1, "admin/years/43/"), "years", tag=43)
+
+            # Токен у сховищі вже прострочений
+            await auth.invalidate_worker_cache(self.user, started=True)
+
+        self.assertIsNone(response_cache.get((1, "admin/workers/")))
+        self.assertIsNone(response_cache.get((1, "admin/years/42/")))
+        self.assertEqual(response_cache.get((1, "admin/years/43/")), "years")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+
+from bot.metrics import Histogram
+
+
+class HistogramTests(unittest.TestCase):
+    def test_render_mixes_numeric_and_text_statuses(self):
+        histogram = Histogram("api_seconds", "Час виклику", ("endpoint", "status"), buckets=(0.1, 1))
+        histogram.observe(0.05, "/api/my_hours/", 200)
+        histogram.observe(2, "/api/my_hours/", "error")
+        histogram.observe(0.5, "/api/my_hours/", 404)
+
+        lines = histogram.render().splitlines()
+
+        self.assertIn('api_seconds_count{endpoint="/api/my_hours/",status="200"} 1', lines)
+        self.assertIn('api_seconds_count{endpoint="/api/my_hours/",status="error"} 1', lines)
+        self.assertIn('api_seconds_bucket{endpoint="/api/my_hours/",status="404",le="1"} 1', lines)
+
+    def test_same_status_as_int_and_str_is_one_series(self):
+        histogram = Histogram("api_seconds", "Час виклику", ("status",), buckets=(1,))
+        histogram.observe(0.5, 200)
+        histogram.observe(0.5, "200")
+
+        self.assertIn('api_seconds_count{status="200"} 2', histogram.render().splitlines())
+
+
+if __name__ == "__main__":
+    unittest.main()